@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Iterator, List, Optional, Tuple
+
+
+# One scan yields Latin/number words, CJK runs and sentence terminators (with trailing space)
+_SCAN_RE = re.compile(r"(?P<w>[^\W\u4e00-\u9fff]+)|(?P<c>[\u4e00-\u9fff]+)|(?P<p>[。！？.!?]\s*)")
+
+
+def _tokens_of(match: re.Match) -> Iterator[str]:
+    word = match.group("w")
+    if word is not None:
+        yield word.lower()
+        return
+    run = match.group("c")
+    if run is None:
+        return
+    if len(run) == 1:
+        yield run
+        return
+    # CJK has no word boundaries: index overlapping bigrams
+    for i in range(len(run) - 1):
+        yield run[i:i + 2]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-cased Latin words plus CJK bigrams (single CJK characters stay unigrams)."""
+    if not text:
+        return []
+    return [tok for m in _SCAN_RE.finditer(text) for tok in _tokens_of(m)]
+
+
+@dataclass
+class TextAnalysis:
+    """Result of analysing one article; shared by simhash, summary, keywords and indexing."""
+    content: str
+    tokens: List[str]  # title tokens followed by content tokens, in order
+    sentences: List[Tuple[int, int]]  # spans into ``content`` between sentence terminators
+    _counts: Optional[Counter] = field(default=None, repr=False)
+
+    @property
+    def counts(self) -> Counter:
+        """Token frequencies; insertion order follows first occurrence (stable ties)."""
+        if self._counts is None:
+            self._counts = Counter(self.tokens)
+        return self._counts
+
+    def sentence_texts(self) -> List[str]:
+        return [s for s in (self.content[a:b].strip() for a, b in self.sentences) if s]
+
+
+def analyze(title: str, content: str) -> TextAnalysis:
+    """Tokenize title and content once and record sentence spans of the content.
+
+    Equivalent to tokenizing ``title + " " + content`` without building that string, and
+    to splitting ``content`` on ``[。！？.!?]\\s*`` as ``summarize_text`` does.
+    """
+    title = title or ""
+    content = content or ""
+    tokens = tokenize(title)
+    sentences: List[Tuple[int, int]] = []
+    start = 0
+    for m in _SCAN_RE.finditer(content):
+        if m.group("p") is not None:
+            sentences.append((start, m.start()))
+            start = m.end()
+            continue
+        tokens.extend(_tokens_of(m))
+    sentences.append((start, len(content)))
+    return TextAnalysis(content=content, tokens=tokens, sentences=sentences)
@@ -2,12 +2,11 @@ from __future__ import annotations
 
 import re
 from collections import Counter
-from typing import List
+from typing import List, Optional, Sequence
 
 
-# sentence split regex (not used directly in summarize_text now)
+# sentence split regex (ai.analysis splits the same way in its single scan)
 _SENT_SPLIT = re.compile(r"[。！？.!?]\s*")
-_WORD_RE = re.compile(r"[\w\u4e00-\u9fff]{2,}")
 _STOPWORDS = set([
     "the","and","for","that","with","from","this","have","has","are","was","were","will",
     "of","to","in","on","at","by","an","a","is","as","it","or","be","we","you",
@@ -15,7 +14,8 @@ _STOPWORDS = set([
 ])
 
 
-def summarize_text(text: str, max_chars: int = 200) -> str:
+def summarize_text(text: str, max_chars: int = 200, sentences: Optional[Sequence[str]] = None) -> str:
+    """sentences: 预先切分好的句子（ai.analysis.TextAnalysis.sentence_texts），避免重复切分"""
     if not text:
         return ""
     
@@ -31,7 +31,10 @@ def summarize_text(text: str, max_chars: int = 200) -> str:
             return title
     
     # 处理普通文本：按句子分割
-    parts = [p.strip() for p in re.split(r"[。！？.!?]\s*", text) if p.strip()]
+    if sentences is not None:
+        parts = list(sentences)
+    else:
+        parts = [p.strip() for p in _SENT_SPLIT.split(text) if p.strip()]
     if parts:
         summary = []
         total = 0
@@ -54,14 +57,14 @@ def summarize_text(text: str, max_chars: int = 200) -> str:
         return text[:max_chars-3] + "..."
 
 
-def extract_keywords(text: str, top_k: int = 10) -> List[str]:
-    if not text:
-        return []
-    tokens = [t.lower() for t in _WORD_RE.findall(text)]
-    tokens = [t for t in tokens if t not in _STOPWORDS and len(t) > 1]
-    if not tokens:
-        return []
-    freq = Counter(tokens)
+def extract_keywords(text: str, top_k: int = 10, counts: Optional[Counter] = None) -> List[str]:
+    """按词频取关键词；counts 为 ai.analysis 的词频（拉丁词 + 中文二元组），不传则现场分词"""
+    if counts is None:
+        if not text:
+            return []
+        from .analysis import tokenize
+        counts = Counter(tokenize(text))
+    freq = Counter({t: c for t, c in counts.items() if t not in _STOPWORDS and len(t) > 1})
     return [w for w, _ in freq.most_common(top_k)]
 
 
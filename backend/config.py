@@ -11,17 +11,74 @@ class Settings(BaseModel):
     db_max_overflow: int = int(os.getenv('DB_MAX_OVERFLOW', '20'))
     db_pool_timeout: int = int(os.getenv('DB_POOL_TIMEOUT', '60'))
     db_pool_recycle: int = int(os.getenv('DB_POOL_RECYCLE', '3600'))
+    # SQLite 连接配置档（data.db.SQLITE_PROFILES）：default、balanced（WAL + synchronous=NORMAL）、durable、fast
+    sqlite_profile: str = os.getenv('SQLITE_PROFILE', 'balanced')
+    # 启动时自动执行数据库迁移（关闭后需手动运行 scripts/migrate.py）
+    db_auto_migrate: bool = os.getenv('DB_AUTO_MIGRATE', 'true').lower() == 'true'
     
     # Ingestion settings
     fetch_timeout_sec: int = int(os.getenv('FETCH_TIMEOUT_SEC', '8'))
     fetch_retries: int = int(os.getenv('FETCH_RETRIES', '3'))
     rate_limit_domain_qps: float = float(os.getenv('RATE_LIMIT_DOMAIN_QPS', '1'))
+    robots_cache_ttl_sec: int = int(os.getenv('ROBOTS_CACHE_TTL_SEC', '3600'))
+    robots_negative_ttl_sec: int = int(os.getenv('ROBOTS_NEGATIVE_TTL_SEC', '600'))
+    # 按域名熔断：连续失败（或慢于阈值）达到次数后熔断，到期放行一次探测请求
+    circuit_failure_threshold: int = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', '3'))
+    circuit_slow_call_sec: float = float(os.getenv('CIRCUIT_SLOW_CALL_SEC', '6'))
+    circuit_open_sec: float = float(os.getenv('CIRCUIT_OPEN_SEC', '300'))
+    circuit_max_open_sec: float = float(os.getenv('CIRCUIT_MAX_OPEN_SEC', '3600'))
+    # 订阅源下载上限与流式解析（超大聚合源）
+    feed_max_bytes: int = int(os.getenv('FEED_MAX_BYTES', str(50 * 1024 * 1024)))
+    feed_streaming: bool = os.getenv('FEED_STREAMING', 'false').lower() == 'true'
+    # 原始 feed 归档（gzip 压缩、按 sha256 去重存放），用于不重新抓取的重新处理
+    feed_archive_enabled: bool = os.getenv('FEED_ARCHIVE_ENABLED', 'true').lower() == 'true'
+    feed_archive_dir: str = os.getenv('FEED_ARCHIVE_DIR', os.path.abspath("../feed_archive"))
+    # 正文抓取（RSS 条目无摘要/正文时抓取原网页并抽取正文）
+    enable_article_fetch: bool = os.getenv('ENABLE_ARTICLE_FETCH', 'false').lower() == 'true'
+    article_fetch_workers: int = int(os.getenv('ARTICLE_FETCH_WORKERS', '4'))
+    article_fetch_budget_sec: float = float(os.getenv('ARTICLE_FETCH_BUDGET_SEC', '30'))
+    article_max_bytes: int = int(os.getenv('ARTICLE_MAX_BYTES', str(2 * 1024 * 1024)))
+    article_cache_size: int = int(os.getenv('ARTICLE_CACHE_SIZE', '2000'))
     enable_enrich: bool = os.getenv('ENABLE_ENRICH', 'true').lower() == 'true'
     enable_embed: bool = os.getenv('ENABLE_EMBED', 'true').lower() == 'true'
     embed_batch_size: int = int(os.getenv('EMBED_BATCH_SIZE', '64'))
     chunk_size: int = int(os.getenv('CHUNK_SIZE', '800'))
     chunk_overlap: int = int(os.getenv('CHUNK_OVERLAP', '120'))
     simhash_hamming_threshold: int = int(os.getenv('SIMHASH_HAMMING_THRESHOLD', '4'))
+    # 近似重复处理：link（入库并归入已有文章的重复组）、skip（跳过不入库）、off（不检测）
+    near_duplicate_policy: str = os.getenv('NEAR_DUPLICATE_POLICY', 'link').lower()
+    # 知识库列表分页：默认每页条数与上限
+    kb_page_size: int = int(os.getenv('KB_PAGE_SIZE', '50'))
+    kb_page_size_max: int = int(os.getenv('KB_PAGE_SIZE_MAX', '200'))
+    bulk_insert_chunk_size: int = int(os.getenv('BULK_INSERT_CHUNK_SIZE', '500'))
+    # 采集流水线：各阶段并发数、阶段间队列容量（背压）与批大小
+    pipeline_fetch_workers: int = int(os.getenv('PIPELINE_FETCH_WORKERS', '4'))
+    pipeline_enrich_workers: int = int(os.getenv('PIPELINE_ENRICH_WORKERS', '2'))
+    pipeline_queue_size: int = int(os.getenv('PIPELINE_QUEUE_SIZE', '8'))
+    pipeline_batch_size: int = int(os.getenv('PIPELINE_BATCH_SIZE', '50'))
+    # 文本加工（simhash/摘要/关键词）进程池：进程数（0 为在线程内执行）、每个任务的文章数、进程 nice 值
+    enrich_process_workers: int = int(os.getenv('ENRICH_PROCESS_WORKERS', str(min(4, max(1, (os.cpu_count() or 2) - 1)))))
+    enrich_process_batch: int = int(os.getenv('ENRICH_PROCESS_BATCH', '25'))
+    enrich_process_nice: int = int(os.getenv('ENRICH_PROCESS_NICE', '10'))
+    # 采集任务队列：失败重试的指数退避（秒）、租约时长与轮询间隔
+    ingest_retry_base_sec: float = float(os.getenv('INGEST_RETRY_BASE_SEC', '60'))
+    ingest_retry_max_sec: float = float(os.getenv('INGEST_RETRY_MAX_SEC', '1800'))
+    ingest_job_lease_sec: int = int(os.getenv('INGEST_JOB_LEASE_SEC', '600'))
+    ingest_job_poll_sec: int = int(os.getenv('INGEST_JOB_POLL_SEC', '60'))
+    # 仪表盘/分析接口响应缓存（按数据版本号失效，带 ETag）
+    response_cache_enabled: bool = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    response_cache_max_entries: int = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '256'))
+    # 热词检测：时间桶长度（分钟）、基线时长（小时）、count-min sketch 宽/深、每桶 Space-Saving 容量、最低出现次数
+    trending_bucket_minutes: int = int(os.getenv('TRENDING_BUCKET_MINUTES', '15'))
+    trending_baseline_hours: int = int(os.getenv('TRENDING_BASELINE_HOURS', '72'))
+    trending_sketch_width: int = int(os.getenv('TRENDING_SKETCH_WIDTH', '1024'))
+    trending_sketch_depth: int = int(os.getenv('TRENDING_SKETCH_DEPTH', '4'))
+    trending_topk_capacity: int = int(os.getenv('TRENDING_TOPK_CAPACITY', '200'))
+    trending_min_count: int = int(os.getenv('TRENDING_MIN_COUNT', '3'))
+    # 知识库计数器（kb_counters）校正间隔（小时，0 关闭定时校正）
+    counters_reconcile_hours: float = float(os.getenv('COUNTERS_RECONCILE_HOURS', '24'))
+    # 检查离线脚本改库（index_epoch）并重建内存索引的间隔（秒，0 关闭）
+    index_sync_sec: int = int(os.getenv('INDEX_SYNC_SEC', '60'))
     
     # 百度搜索API配置
     baidu_api_key: str = os.getenv('BAIDU_API_KEY', '')
@@ -1,11 +1,14 @@
+import logging
 from datetime import timedelta
 from flask import Flask
 from apscheduler.schedulers.background import BackgroundScheduler  # type: ignore
 import os
 from flask_cors import CORS  # type: ignore
 from config import Settings
-from data.db import init_db, engine, Base, close_db
-from crawler.ingest_utils import ensure_columns_for_dedup, ensure_columns_for_enrich
+from data import db as _db
+from data.db import init_db, close_db
+from data.migrations import run_migrations
+from core import index_sync
 from routes.auth import auth_bp
 from routes.users import users_bp
 from routes.rss import rss_bp
@@ -20,6 +23,9 @@ from routes.user_sessions import user_sessions_bp
 from routes.email_test import email_test_bp
 
 
+logger = logging.getLogger(__name__)
+
+
 def create_app() -> Flask:
     app = Flask(__name__)
     CORS(app, supports_credentials=True, origins=['http://localhost:3000', 'http://localhost:3001'])
@@ -45,28 +51,37 @@ def create_app() -> Flask:
     import atexit
     atexit.register(close_db)
     
-    # import models so SQLAlchemy knows all tables
-    try:
-        from data import models as _models  # noqa: F401
-        from data import user_management_models as _user_models  # noqa: F401
-    except Exception:
+    # 按版本执行数据库迁移（建表、补列），业务路径不再做 DDL 检查
+    # 迁移失败时不启动服务：否则会在结构不完整的库上提供服务
+    if settings.db_auto_migrate:
         try:
-            from data import models as _models  # type: ignore # noqa: F401
-            from data import user_management_models as _user_models  # type: ignore # noqa: F401
-        except Exception:
-            pass
-    # ensure all tables exist (long-term approach)
+            applied = run_migrations(_db.engine)
+            if applied:
+                print(f"✅ 数据库迁移完成: {applied}")
+        except Exception as e:
+            logger.exception("database migration failed at startup")
+            print(f"❌ 数据库迁移失败: {e}")
+            raise
+    # 记录内存索引构建时的 index_epoch，之后离线脚本改库会触发重建（core.index_sync）
+    index_sync.mark_current()
+    # 从库中重建 simhash 近似重复索引（失败时首次采集再懒加载）
     try:
-        if engine:  # 添加空值检查
-            Base.metadata.create_all(engine)
-    except Exception:
-        pass
-    # ensure schema columns once at startup
+        from crawler.near_dup import simhash_index
+        simhash_index.rebuild(settings.simhash_hamming_threshold)
+    except Exception as e:
+        print(f"⚠️ simhash 索引重建失败: {e}")
+    # 知识库列表筛选位图索引（失败时首次筛选再懒加载）
     try:
-        ensure_columns_for_dedup()
-        ensure_columns_for_enrich()
-    except Exception:
-        pass
+        from data.filter_index import article_filter_index
+        article_filter_index.rebuild()
+    except Exception as e:
+        print(f"⚠️ 筛选索引重建失败: {e}")
+    # 热词检测的时间桶从近期文章重建（失败时首次查询再懒加载）
+    try:
+        from crawler.trending import trending_detector
+        trending_detector.rebuild()
+    except Exception as e:
+        print(f"⚠️ 热词检测重建失败: {e}")
 
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(users_bp, url_prefix='/api')
@@ -96,6 +111,19 @@ def create_app() -> Flask:
                 pass
 
         # 启动调度器但不自动添加任务，让用户通过前端控制
+        # 仅常驻重试轮询：处理任务队列中到期的失败重试（含重启前遗留的任务）
+        from crawler.job_queue import process_due_jobs
+        scheduler.add_job(process_due_jobs, 'interval', seconds=max(5, settings.ingest_job_poll_sec),
+                          id='rss_ingest_retry', replace_existing=True, max_instances=1, coalesce=True)
+        # 定时校正 kb_counters（直接改库等原因造成的偏差）
+        if settings.counters_reconcile_hours > 0:
+            from data.rollups import reconcile_counters_job
+            scheduler.add_job(reconcile_counters_job, 'interval', hours=settings.counters_reconcile_hours,
+                              id='kb_counters_reconcile', replace_existing=True, max_instances=1, coalesce=True)
+        # 离线脚本改库后重建本进程的内存索引
+        if settings.index_sync_sec > 0:
+            scheduler.add_job(index_sync.sync_indexes, 'interval', seconds=settings.index_sync_sec,
+                              id='index_sync', replace_existing=True, max_instances=1, coalesce=True)
         scheduler.start()
         app.config['scheduler'] = scheduler
         print("✅ 调度器已启动，等待用户手动开启自动采集")
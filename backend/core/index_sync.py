@@ -0,0 +1,69 @@
+"""
+离线脚本改库后同步本进程的内存索引
+
+近似重复索引（crawler.near_dup）、筛选位图（data.filter_index）与热词检测（crawler.trending）
+由本进程的写入监听器增量维护，看不到其它进程直接改库。reprocess_archive.py、
+recompute_simhash.py 等脚本改写文章后在同一事务内递增 kb_counters 中的 index_epoch
+（data.rollups.bump_index_epoch）；服务每 INDEX_SYNC_SEC 秒检查一次，变化时重建这些索引。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Optional
+
+from data import db as _db, rollups
+
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_seen: Optional[int] = None
+
+
+def _read_epoch() -> int:
+    with _db.engine.connect() as conn:
+        return rollups.read_counter(conn, rollups.INDEX_EPOCH_SCOPE)
+
+
+def mark_current():
+    """Record the epoch the indexes are about to be built from (call before building them)."""
+    global _seen
+    try:
+        epoch = _read_epoch()
+    except Exception as e:
+        logger.warning("index epoch unavailable: %s", e)
+        return
+    with _lock:
+        _seen = epoch
+
+
+def _rebuild_indexes():
+    from crawler.near_dup import simhash_index
+    from crawler.trending import trending_detector
+    from data.filter_index import article_filter_index
+    simhash_index.rebuild()
+    article_filter_index.rebuild()
+    trending_detector.rebuild()
+
+
+def sync_indexes() -> bool:
+    """Rebuild the in-memory indexes if another process bumped the epoch; returns True if rebuilt."""
+    global _seen
+    if _db.engine is None:
+        return False
+    with _lock:
+        try:
+            epoch = _read_epoch()
+        except Exception as e:
+            logger.warning("index epoch unavailable: %s", e)
+            return False
+        if _seen is None or epoch == _seen:
+            _seen = epoch
+            return False
+        logger.info("index epoch changed (%s -> %s), rebuilding in-memory indexes", _seen, epoch)
+        # 先记录：重建期间再有脚本改库，下次检查会再次重建
+        _seen = epoch
+        _rebuild_indexes()
+        return True
@@ -0,0 +1,117 @@
+"""
+读多写少接口（仪表盘、分析）的响应缓存
+
+缓存键为 端点 + 查询参数 + 可选的时间维度（如 UTC 日期），条目带上生成时的数据版本号
+（data.generation，存于数据库，每个请求读取一次），版本变化即失效，因此返回的数据总是最新的，
+多个服务进程之间也是如此。响应带 ETag（版本号 + 缓存键），客户端带 If-None-Match 重复请求时
+直接返回 304，不执行查询。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import wraps
+from typing import Callable, Optional
+
+from flask import Response, current_app, request
+
+from config import Settings
+from data import generation
+
+
+# 前端用于绕过浏览器缓存的参数，不参与缓存键
+_IGNORED_ARGS = {'t', '_'}
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: 'OrderedDict[tuple, tuple]' = OrderedDict()  # key -> (generation, body, mimetype)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get(self, key: tuple, gen: int):
+        """Entry cached for ``key`` at generation ``gen``, or None; counts the hit or miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != gen:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    def put(self, key: tuple, gen: int, body: bytes, mimetype: str):
+        with self._lock:
+            self._entries[key] = (gen, body, mimetype)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        gen = generation.current()
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                    'not_modified': self.not_modified, 'generation': gen}
+
+
+_settings = Settings()
+response_cache = ResponseCache(_settings.response_cache_max_entries)
+
+
+def _finish(resp: Response, etag: str, status: str) -> Response:
+    resp.set_etag(etag)
+    # 允许缓存但每次都须向服务端校验（配合 ETag 得到 304）
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Cache'] = status
+    return resp
+
+
+def cached_response(vary: Optional[Callable[[], object]] = None):
+    """Cache a JSON view's successful response until the KB data generation changes.
+
+    ``vary`` returns extra key material for results that also depend on the clock
+    (e.g. the current UTC date for "today" figures).
+    """
+    def deco(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _settings.response_cache_enabled:
+                return fn(*args, **kwargs)
+            # 先读版本号：计算期间若有写入，本条目按旧版本保存，下次请求会重算
+            gen = generation.current()
+            if gen is None:
+                return fn(*args, **kwargs)
+            params = tuple(sorted(
+                (k, tuple(request.args.getlist(k))) for k in request.args if k not in _IGNORED_ARGS
+            ))
+            key = (request.endpoint, params, vary() if vary else None)
+            etag = f"{gen}-{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:16]}"
+
+            if etag in request.if_none_match:
+                response_cache.count_not_modified()
+                return _finish(Response(status=304), etag, 'NOT_MODIFIED')
+
+            entry = response_cache.get(key, gen)
+            if entry is not None:
+                return _finish(Response(entry[1], mimetype=entry[2]), etag, 'HIT')
+
+            resp = current_app.make_response(fn(*args, **kwargs))
+            if resp.status_code != 200:
+                return resp
+            response_cache.put(key, gen, resp.get_data(), resp.mimetype)
+            return _finish(resp, etag, 'MISS')
+        return wrapper
+    return deco
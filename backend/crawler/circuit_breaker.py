@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import requests
+
+from config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of issuing a request to a host whose circuit is open.
+
+    ``retry_in`` is the number of seconds until the breaker lets a probe request through.
+    """
+
+    def __init__(self, message: str, retry_in: float = 0.0):
+        super().__init__(message)
+        self.retry_in = retry_in
+
+
+@dataclass
+class DomainCircuit:
+    state: str = STATE_CLOSED
+    consecutive_failures: int = 0
+    trips: int = 0  # consecutive times the circuit opened without a successful probe
+    opened_at: float = 0.0
+    next_probe_at: float = 0.0
+    probe_in_flight: bool = False
+    probe_started_at: float = 0.0
+    last_error: Optional[str] = None
+    last_latency_sec: Optional[float] = None
+
+
+def is_breaker_failure(exc: BaseException) -> bool:
+    """Host-level failures only: network errors, timeouts (also mid-body), 5xx and 429.
+
+    Other 4xx (a single dead feed URL) say nothing about the host and do not count.
+    """
+    # ChunkedEncodingError: connection reset / truncated while streaming the body
+    if isinstance(exc, (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        code = exc.response.status_code
+        return code >= 500 or code == 429
+    return False
+
+
+class CircuitBreaker:
+    """Per-domain circuit breaker shared by every Fetcher.
+
+    closed: requests pass; ``circuit_failure_threshold`` consecutive failures (calls slower
+    than ``circuit_slow_call_sec`` count as failures) open the circuit.
+    open: requests fail immediately with CircuitOpenError until the probe time.
+    half_open: one probe request is let through; success closes the circuit, failure
+    reopens it with the open period doubled (capped at ``circuit_max_open_sec``).
+    For streamed responses the outcome is recorded after the body (fetcher.settle_stream).
+    """
+
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or Settings()
+        self._lock = threading.Lock()
+        self._domains: Dict[str, DomainCircuit] = {}
+
+    def _open_period(self, trips: int) -> float:
+        base = self.settings.circuit_open_sec
+        return min(self.settings.circuit_max_open_sec, base * (2 ** max(0, trips - 1)))
+
+    def before_request(self, domain: str):
+        now = time.time()
+        with self._lock:
+            circuit = self._domains.get(domain)
+            if circuit is None or circuit.state == STATE_CLOSED:
+                return
+            if circuit.state == STATE_OPEN and now >= circuit.next_probe_at:
+                circuit.state = STATE_HALF_OPEN
+                circuit.probe_in_flight = False
+            # a probe whose outcome never arrived (body never read) must not block the host forever
+            lost_probe = circuit.probe_in_flight and now - circuit.probe_started_at > self._open_period(circuit.trips)
+            if circuit.state == STATE_HALF_OPEN and (not circuit.probe_in_flight or lost_probe):
+                circuit.probe_in_flight = True
+                circuit.probe_started_at = now
+                return
+            retry_in = max(0.0, circuit.next_probe_at - now)
+            raise CircuitOpenError(
+                f"Circuit open for {domain} ({circuit.consecutive_failures} consecutive failures, "
+                f"last error: {circuit.last_error}); next probe in {int(retry_in)}s",
+                retry_in=retry_in,
+            )
+
+    def record_success(self, domain: str, latency: float):
+        if latency > self.settings.circuit_slow_call_sec:
+            self.record_failure(domain, f"slow response: {latency:.1f}s", latency)
+            return
+        with self._lock:
+            circuit = self._domains.get(domain)
+            if circuit is None:
+                return
+            if circuit.state != STATE_CLOSED:
+                logger.info("circuit for %s closed after successful probe", domain)
+            # forget healthy hosts so the table only holds domains with recent trouble
+            del self._domains[domain]
+
+    def record_failure(self, domain: str, error: str, latency: Optional[float] = None):
+        now = time.time()
+        with self._lock:
+            circuit = self._domains.setdefault(domain, DomainCircuit())
+            circuit.consecutive_failures += 1
+            circuit.last_error = (error or "")[:300]
+            circuit.last_latency_sec = latency
+            circuit.probe_in_flight = False
+            if circuit.state == STATE_HALF_OPEN or (
+                circuit.state == STATE_CLOSED
+                and circuit.consecutive_failures >= self.settings.circuit_failure_threshold
+            ):
+                circuit.trips += 1
+                circuit.state = STATE_OPEN
+                circuit.opened_at = now
+                circuit.next_probe_at = now + self._open_period(circuit.trips)
+                logger.warning("circuit for %s opened (%s failures), probing again in %ss",
+                               domain, circuit.consecutive_failures, int(circuit.next_probe_at - now))
+
+    def snapshot(self) -> List[dict]:
+        def iso(ts: float) -> Optional[str]:
+            return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts)) if ts else None
+
+        with self._lock:
+            return [
+                {
+                    "domain": domain,
+                    "state": c.state,
+                    "consecutive_failures": c.consecutive_failures,
+                    "trips": c.trips,
+                    "opened_at": iso(c.opened_at),
+                    "next_probe_at": iso(c.next_probe_at) if c.state != STATE_CLOSED else None,
+                    "last_error": c.last_error,
+                    "last_latency_sec": round(c.last_latency_sec, 3) if c.last_latency_sec is not None else None,
+                }
+                for domain, c in sorted(self._domains.items())
+            ]
+
+    def reset(self, domain: Optional[str] = None):
+        with self._lock:
+            if domain is None:
+                self._domains.clear()
+            else:
+                self._domains.pop(domain, None)
+
+
+circuit_breaker = CircuitBreaker()
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from ai.analysis import analyze
+from ai.enrich import summarize_text, extract_keywords
+from .ingest_utils import simhash_many
+
+
+logger = logging.getLogger(__name__)
+
+# (simhash hex, summary, comma-separated keywords)
+EnrichResult = Tuple[str, str, str]
+
+
+def enrich_texts(pairs: Sequence[Tuple[str, str]]) -> List[EnrichResult]:
+    """CPU part of enrichment for (title, content) pairs; runs in pool workers or in-thread.
+
+    Only the compact result tuples travel back to the parent process.
+    """
+    analyses = [analyze(title, content) for title, content in pairs]
+    fingerprints = simhash_many([a.counts for a in analyses])
+    return [
+        (
+            format(fp, 'x'),
+            summarize_text(content, max_chars=200, sentences=analysis.sentence_texts()),
+            ",".join(extract_keywords("", top_k=8, counts=analysis.counts)),
+        )
+        for (_, content), analysis, fp in zip(pairs, analyses, fingerprints)
+    ]
+
+
+def _init_worker(nice: int):
+    # 降低工作进程优先级，采集高峰时让出 CPU 给 API 请求
+    if nice and hasattr(os, "nice"):
+        try:
+            os.nice(nice)
+        except OSError:
+            pass
+
+
+class EnrichPool:
+    """Dispatch enrichment batches to a process pool, off the GIL of the Flask process.
+
+    Workers are started lazily with the ``spawn`` method (forking a process that runs
+    request and scheduler threads can copy held locks). If the pool cannot start or
+    breaks, batches run in the calling thread and the pool stays disabled.
+    """
+
+    def __init__(self, workers: int, chunk_size: int = 25, nice: int = 10):
+        self.workers = max(0, int(workers))
+        self.chunk_size = max(1, int(chunk_size))
+        self.nice = nice
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._disabled = self.workers == 0
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return not self._disabled
+
+    def _get_executor(self) -> Optional[ProcessPoolExecutor]:
+        with self._lock:
+            if self._disabled:
+                return None
+            if self._executor is None:
+                try:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker,
+                        initargs=(self.nice,),
+                    )
+                except Exception as e:
+                    logger.warning("enrich process pool unavailable, enriching in-thread: %s", e)
+                    self._disabled = True
+                    return None
+            return self._executor
+
+    def _disable(self, error: Exception):
+        logger.warning("enrich process pool failed, falling back to in-thread enrichment: %s", error)
+        with self._lock:
+            self._disabled = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, pairs: Sequence[Tuple[str, str]]) -> List[EnrichResult]:
+        """Enrich (title, content) pairs; results keep the input order."""
+        pairs = list(pairs)
+        if not pairs:
+            return []
+        executor = self._get_executor()
+        if executor is None:
+            return enrich_texts(pairs)
+        chunks = [pairs[i:i + self.chunk_size] for i in range(0, len(pairs), self.chunk_size)]
+        try:
+            futures = [executor.submit(enrich_texts, chunk) for chunk in chunks]
+            return [r for f in futures for r in f.result()]
+        except Exception as e:
+            # BrokenProcessPool, pickling errors, worker crash: finish this batch here
+            self._disable(e)
+            return enrich_texts(pairs)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: Optional[EnrichPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_enrich_pool(settings=None) -> EnrichPool:
+    """Process-wide pool, sized from Settings on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                if settings is None:
+                    from config import Settings
+                    settings = Settings()
+                _pool = EnrichPool(settings.enrich_process_workers, settings.enrich_process_batch,
+                                   settings.enrich_process_nice)
+                atexit.register(_pool.shutdown)
+    return _pool
@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional
+
+from config import Settings
+from .fetcher import Fetcher, iter_capped, settle_stream
+
+
+logger = logging.getLogger(__name__)
+
+# Elements whose text never belongs to the article body
+_SKIP_TAGS = {
+    "script", "style", "noscript", "iframe", "svg", "form", "nav", "footer",
+    "header", "aside", "button", "select", "textarea", "template", "title",
+}
+_VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link",
+    "meta", "param", "source", "track", "wbr",
+}
+_INLINE_TAGS = {
+    "a", "abbr", "b", "bdi", "bdo", "cite", "code", "data", "dfn", "em", "font", "i",
+    "kbd", "label", "mark", "q", "s", "samp", "small", "span", "strong", "sub", "sup",
+    "time", "u", "var",
+}
+# Block nodes whose own text is scored as a paragraph
+_PARAGRAPH_TAGS = {"p", "pre", "td", "blockquote", "li", "div", "section", "article"}
+_POSITIVE_RE = re.compile(r"article|body|content|entry|main|news|post|story|text|正文", re.I)
+_NEGATIVE_RE = re.compile(r"ad-|ads|banner|comment|footer|footnote|menu|meta|nav|related|share|sidebar|social|sponsor|widget", re.I)
+_COMMA_RE = re.compile(r"[,，、。；;]")
+_META_CHARSET_RE = re.compile(rb"<meta[^>]+charset=[\"']?([\w-]+)", re.I)
+_MIN_PARAGRAPH_CHARS = 20
+_MAX_LINK_DENSITY = 0.5
+
+
+class _Node:
+    __slots__ = ("tag", "parent", "children", "texts", "link_chars", "weight", "score")
+
+    def __init__(self, tag: str, parent: Optional["_Node"], attrs: Iterable = ()):
+        self.tag = tag
+        self.parent = parent
+        self.children: List[_Node] = []
+        self.texts: List[str] = []
+        self.link_chars = 0
+        self.score = 0.0
+        marker = " ".join(v for k, v in attrs if k in ("class", "id") and v)
+        self.weight = 0.0
+        if marker:
+            if _POSITIVE_RE.search(marker):
+                self.weight += 25
+            if _NEGATIVE_RE.search(marker):
+                self.weight -= 25
+
+    def text(self) -> str:
+        return re.sub(r"\s+", " ", "".join(self.texts)).strip()
+
+
+class _TreeBuilder(HTMLParser):
+    """Lenient block-level DOM builder that drops boilerplate subtrees while parsing.
+
+    Inline elements do not create nodes; their text flows into the enclosing block so a
+    paragraph keeps its reading order, and text inside <a> is tallied as link text.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.root = _Node("root", None)
+        self.stack: List[_Node] = [self.root]
+        self.skip_tag: Optional[str] = None
+        self.skip_depth = 0
+        self.link_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth += 1
+            return
+        if tag in _SKIP_TAGS:
+            self.skip_tag, self.skip_depth = tag, 1
+            return
+        if tag in _VOID_TAGS:
+            if tag == "br":
+                self.stack[-1].texts.append("\n")
+            return
+        if tag in _INLINE_TAGS:
+            if tag == "a":
+                self.link_depth += 1
+            return
+        node = _Node(tag, self.stack[-1], attrs)
+        self.stack[-1].children.append(node)
+        self.stack.append(node)
+
+    def handle_endtag(self, tag):
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+                if self.skip_depth <= 0:
+                    self.skip_tag = None
+            return
+        if tag in _INLINE_TAGS:
+            if tag == "a" and self.link_depth:
+                self.link_depth -= 1
+            return
+        # Tolerate unclosed tags: pop up to the matching open element if there is one
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].tag == tag:
+                del self.stack[i:]
+                return
+
+    def handle_data(self, data):
+        if self.skip_tag or not data.strip():
+            return
+        node = self.stack[-1]
+        node.texts.append(data)
+        if self.link_depth:
+            node.link_chars += len(data.strip())
+
+
+def _walk(root: _Node) -> List[_Node]:
+    out: List[_Node] = []
+    todo = [root]
+    while todo:
+        node = todo.pop()
+        out.append(node)
+        todo.extend(reversed(node.children))
+    return out
+
+
+def _is_linky(text: str, node: _Node) -> bool:
+    return bool(text) and node.link_chars / len(text) > _MAX_LINK_DENSITY
+
+
+def extract_main_text(html_text: str) -> str:
+    """Return the main article text of an HTML page, or "" if none is found.
+
+    Readability-style density heuristic: every text block scores by length and
+    punctuation density and propagates that score to its parent (full) and
+    grandparent (half). The best-scoring container, discounted by its link density,
+    is taken as the article and its non-link paragraphs are returned.
+    """
+    if not html_text:
+        return ""
+    builder = _TreeBuilder()
+    try:
+        builder.feed(html_text)
+        builder.close()
+    except Exception as e:
+        logger.debug("html parse failed: %s", e)
+    nodes = _walk(builder.root)
+
+    candidates = []
+    for node in nodes:
+        if node.tag not in _PARAGRAPH_TAGS:
+            continue
+        text = node.text()
+        if len(text) < _MIN_PARAGRAPH_CHARS or _is_linky(text, node):
+            continue
+        score = 1 + len(_COMMA_RE.findall(text)) + min(len(text) // 100, 3)
+        for ancestor, share in ((node.parent, 1.0), (node.parent.parent if node.parent else None, 0.5)):
+            if ancestor is None:
+                continue
+            if not ancestor.score:
+                ancestor.score = ancestor.weight + 1e-6
+                candidates.append(ancestor)
+            ancestor.score += score * share
+
+    best = None
+    best_score = 0.0
+    for cand in candidates:
+        text_len = 0
+        link_len = 0
+        for n in _walk(cand):
+            text_len += len(n.text())
+            link_len += n.link_chars
+        if not text_len:
+            continue
+        final = cand.score * (1 - min(1.0, link_len / text_len))
+        if final > best_score:
+            best, best_score = cand, final
+    if best is None:
+        return ""
+
+    paragraphs = []
+    for n in _walk(best):
+        text = n.text()
+        if text and not _is_linky(text, n):
+            paragraphs.append(text)
+    return "\n".join(paragraphs)
+
+
+def _decode_html(body: bytes, content_type: str) -> str:
+    charset = None
+    m = re.search(r"charset=([\w-]+)", content_type or "", re.I)
+    if m:
+        charset = m.group(1)
+    else:
+        m2 = _META_CHARSET_RE.search(body[:4096])
+        if m2:
+            charset = m2.group(1).decode("ascii", "ignore")
+    try:
+        return body.decode(charset or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+# 页面可访问但没有抽取到正文（非 HTML、结构无法识别）时缓存空结果的时长；请求异常不缓存
+_EMPTY_TTL_SEC = 600.0
+
+
+class _UrlCache:
+    """Small thread-safe LRU of url -> extracted text ("" marks a page without text).
+
+    Entries may carry a TTL; expired entries read as missing.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # url -> (text, expires_at or None)
+
+    def get(self, url: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(url)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= time.monotonic():
+                del self._data[url]
+                return None
+            self._data.move_to_end(url)
+            return entry[0]
+
+    def put(self, url: str, text: str, ttl: Optional[float] = None):
+        with self._lock:
+            self._data[url] = (text, None if ttl is None else time.monotonic() + ttl)
+            self._data.move_to_end(url)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+
+_url_cache = _UrlCache(Settings().article_cache_size)
+
+
+class ArticleExtractor:
+    """Fetch article pages concurrently and extract their main text within a time budget.
+
+    One instance covers one ingest cycle: ``budget_sec`` is counted from construction and
+    shared by every ``fetch_many`` call on it. Results are cached by URL process-wide.
+    """
+
+    def __init__(self, settings: Optional[Settings] = None, fetcher: Optional[Fetcher] = None,
+                 budget_sec: Optional[float] = None):
+        self.settings = settings or Settings()
+        self.fetcher = fetcher or Fetcher(self.settings)
+        budget = self.settings.article_fetch_budget_sec if budget_sec is None else budget_sec
+        self.deadline = time.monotonic() + max(0.0, budget)
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def _fetch_one(self, url: str) -> str:
+        timeout = max(1, min(self.settings.fetch_timeout_sec, int(self.remaining()) + 1))
+        try:
+            resp = self.fetcher.get(url, timeout=timeout, stream=True)
+            content_type = resp.headers.get("Content-Type", "")
+            if content_type and "html" not in content_type.lower():
+                resp.close()
+                settle_stream(resp)
+                text = ""
+            else:
+                body = b"".join(iter_capped(resp, self.settings.article_max_bytes))
+                text = extract_main_text(_decode_html(body, content_type))
+        except Exception as e:
+            # 超时、网络错误、熔断等多为暂时性失败，不缓存，下个采集周期重试
+            logger.info("article fetch failed for %s: %s", url, e)
+            return ""
+        _url_cache.put(url, text, None if text else _EMPTY_TTL_SEC)
+        return text
+
+    def fetch_many(self, urls: Iterable[str]) -> Dict[str, str]:
+        """Return {url: text} for the pages that were extracted before the budget ran out."""
+        results: Dict[str, str] = {}
+        todo = []
+        for url in dict.fromkeys(u for u in urls if u):
+            cached = _url_cache.get(url)
+            if cached is None:
+                todo.append(url)
+            elif cached:
+                results[url] = cached
+        if not todo or self.remaining() <= 0:
+            return results
+        pool = ThreadPoolExecutor(max_workers=max(1, self.settings.article_fetch_workers))
+        try:
+            futures = {pool.submit(self._fetch_one, url): url for url in todo}
+            done, _ = wait(futures, timeout=self.remaining())
+            for fut in done:
+                text = fut.result()
+                if text:
+                    results[futures[fut]] = text
+        finally:
+            # Pages still downloading finish in the background and land in the cache
+            pool.shutdown(wait=False, cancel_futures=True)
+        return results
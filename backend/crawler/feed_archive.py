@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .pipeline import StageTimings
+
+
+logger = logging.getLogger(__name__)
+
+_SUFFIX = ".xml.gz"
+
+
+def blob_path(root: str | Path, sha256: str) -> Path:
+    """Content-addressed location: <root>/<sha[:2]>/<sha>.xml.gz"""
+    return Path(root) / sha256[:2] / f"{sha256}{_SUFFIX}"
+
+
+def read_blob(root: str | Path, sha256: str) -> bytes:
+    with gzip.open(blob_path(root, sha256), "rb") as f:
+        return f.read()
+
+
+class ArchiveWriter:
+    """Tee a streamed feed body into the archive while it is being downloaded.
+
+    The body is gzip-compressed into a temporary file and hashed on the fly, then
+    renamed to its sha256 path; a body that is already archived is not stored twice.
+    Archive errors (disk full, permissions) only disable archiving for this fetch.
+    """
+
+    def __init__(self, root: str | Path, compresslevel: int = 6):
+        self.root = Path(root)
+        self.compresslevel = compresslevel
+        self.size = 0
+        self.complete = False  # the whole body was read
+        self.failed = False
+        self._hash = hashlib.sha256()
+        self._raw = None
+        self._gz: Optional[gzip.GzipFile] = None
+        self._tmp: Optional[str] = None
+
+    def _open(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, self._tmp = tempfile.mkstemp(prefix=".tmp-", suffix=_SUFFIX, dir=self.root)
+        self._raw = os.fdopen(fd, "wb")
+        # mtime=0: identical bodies give identical archive files
+        self._gz = gzip.GzipFile(fileobj=self._raw, mode="wb", compresslevel=self.compresslevel, mtime=0)
+
+    def _fail(self, error: Exception):
+        logger.warning("feed archive write failed under %s: %s", self.root, error)
+        self.failed = True
+        self._discard()
+
+    def write(self, chunk: bytes):
+        if self.failed:
+            return
+        try:
+            if self._gz is None:
+                self._open()
+            self._hash.update(chunk)
+            self._gz.write(chunk)
+            self.size += len(chunk)
+        except Exception as e:
+            self._fail(e)
+
+    def tee(self, chunks: Iterable[bytes], timings: StageTimings | None = None) -> Iterator[bytes]:
+        """Re-yield ``chunks``, archiving each; time spent archiving is charged to ``archive``."""
+        for chunk in chunks:
+            started = time.perf_counter()
+            self.write(chunk)
+            if timings is not None:
+                timings.add("archive", time.perf_counter() - started)
+            yield chunk
+        self.complete = True
+
+    def finish(self) -> Optional[dict]:
+        """Close the blob and move it into place; returns its index fields (None if nothing stored)."""
+        if self.failed or self._gz is None:
+            self._discard()
+            return None
+        try:
+            self._gz.close()
+            self._raw.close()
+            sha = self._hash.hexdigest()
+            dest = blob_path(self.root, sha)
+            stored = 0
+            if dest.exists():
+                os.unlink(self._tmp)
+            else:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                stored = os.path.getsize(self._tmp)
+                os.replace(self._tmp, dest)
+            self._tmp = None
+        except Exception as e:
+            self._fail(e)
+            return None
+        return {"sha256": sha, "size": self.size, "stored_size": stored, "truncated": not self.complete}
+
+    def _discard(self):
+        for f in (self._gz, self._raw):
+            try:
+                if f is not None:
+                    f.close()
+            except Exception:
+                pass
+        self._gz = self._raw = None
+        if self._tmp:
+            try:
+                os.unlink(self._tmp)
+            except OSError:
+                pass
+            self._tmp = None
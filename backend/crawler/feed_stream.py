@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import codecs
+import html.entities
+import logging
+import re
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Iterable, Iterator, List, Optional
+from xml.etree import ElementTree as ET
+
+import feedparser
+
+
+logger = logging.getLogger(__name__)
+
+_ENTRY_TAGS = {"item", "entry"}
+_DATE_TAGS = ("pubDate", "published", "date", "issued", "updated", "modified")
+_TEXT_FIELDS = {
+    "title": "title",
+    "link": "link",
+    "guid": "id",
+    "id": "id",
+    "description": "description",
+    "summary": "summary",
+    "encoded": "content",  # content:encoded
+    "content": "content",  # atom:content
+}
+_XML_DECL_RE = re.compile(rb"""^\s*<\?xml[^>]*encoding=["']([A-Za-z0-9._-]+)["']""")
+# HTML named entities (&nbsp; etc.) are undefined in XML but common in real feeds
+_HTML_ENTITIES = {name: chr(cp) for name, cp in html.entities.name2codepoint.items()}
+_XML_ENTITIES = {"amp", "lt", "gt", "quot", "apos"}
+_ENTITY_RE = re.compile(r"&([A-Za-z][A-Za-z0-9]{1,31});")
+_MAX_ENTITY_LEN = 34
+_SNIFF_BYTES = 512
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1] if "}" in tag else tag
+
+
+def _parse_date(value: str) -> Optional[time.struct_time]:
+    value = (value or "").strip()
+    if not value:
+        return None
+    dt = None
+    try:
+        dt = parsedate_to_datetime(value)  # RFC 822 (RSS)
+    except Exception:
+        try:
+            dt = datetime.fromisoformat(value.replace("Z", "+00:00"))  # RFC 3339 (Atom)
+        except Exception:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc).timetuple()
+
+
+class _EntryTarget:
+    """ElementTree parser target that only materializes the entry currently being read."""
+
+    def __init__(self):
+        self.ready: List[feedparser.FeedParserDict] = []
+        self._depth = 0
+        self._entry_depth = 0
+        self._entry: Optional[dict] = None
+        self._field: Optional[str] = None
+        self._field_depth = 0
+        self._buf: List[str] = []
+
+    def start(self, tag, attrib):
+        self._depth += 1
+        name = _local(tag)
+        if self._entry is None:
+            if name in _ENTRY_TAGS:
+                self._entry = {}
+                self._entry_depth = self._depth
+            return
+        if self._field is not None or self._depth != self._entry_depth + 1:
+            return
+        if name == "link" and attrib.get("href"):
+            # Atom: <link rel="alternate" href="..."/>
+            if attrib.get("rel", "alternate") == "alternate" and "link" not in self._entry:
+                self._entry["link"] = attrib["href"]
+            return
+        if name in _TEXT_FIELDS or name in _DATE_TAGS:
+            self._field = name
+            self._field_depth = self._depth
+            self._buf = []
+
+    def data(self, text):
+        if self._field is not None:
+            self._buf.append(text)
+
+    def end(self, tag):
+        if self._field is not None and self._depth == self._field_depth:
+            self._store(self._field, "".join(self._buf).strip())
+            self._field = None
+            self._buf = []
+        elif self._entry is not None and self._depth == self._entry_depth:
+            self.ready.append(self._finish(self._entry))
+            self._entry = None
+        self._depth -= 1
+
+    def close(self):
+        return None
+
+    def _store(self, name: str, value: str):
+        entry = self._entry
+        if name in _DATE_TAGS:
+            entry.setdefault("_dates", {}).setdefault(name, value)
+            return
+        key = _TEXT_FIELDS[name]
+        if not value or key in entry:
+            return
+        entry[key] = [{"value": value}] if key == "content" else value
+
+    def _finish(self, raw: dict) -> feedparser.FeedParserDict:
+        dates = raw.pop("_dates", {})
+        entry = feedparser.FeedParserDict(raw)
+        for name in _DATE_TAGS:
+            parsed = _parse_date(dates.get(name, ""))
+            if parsed:
+                entry["published_parsed"] = parsed
+                break
+        return entry
+
+
+def _replace_entity(m: re.Match) -> str:
+    name = m.group(1)
+    if name in _XML_ENTITIES or name not in _HTML_ENTITIES:
+        return m.group(0)
+    # re-escape so a decoded "<" or "&" cannot break the markup
+    return {"<": "&lt;", "&": "&amp;", ">": "&gt;"}.get(_HTML_ENTITIES[name], _HTML_ENTITIES[name])
+
+
+class _EntityRewriter:
+    """Rewrite HTML named entities to characters across chunk boundaries.
+
+    expat rejects undefined entities outright when the document has no DTD, so they
+    are substituted before the text reaches the parser.
+    """
+
+    def __init__(self):
+        self._tail = ""
+
+    def feed(self, text: str, final: bool = False) -> str:
+        text = self._tail + text
+        self._tail = ""
+        if not final:
+            amp = text.rfind("&")
+            if amp != -1 and ";" not in text[amp:] and len(text) - amp < _MAX_ENTITY_LEN:
+                text, self._tail = text[:amp], text[amp:]
+        return _ENTITY_RE.sub(_replace_entity, text)
+
+
+def _sniff_encoding(head: bytes) -> str:
+    for bom, enc in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")):
+        if head.startswith(bom):
+            return enc
+    m = _XML_DECL_RE.match(head)
+    if m:
+        enc = m.group(1).decode("ascii").lower()
+        try:
+            codecs.lookup(enc)
+            return enc
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def _entry_key(entry) -> Optional[str]:
+    return entry.get("link") or entry.get("id")
+
+
+def _head_complete(head: bytes) -> bool:
+    # the first ">" closes the XML declaration (or the first tag when there is none)
+    return len(head) >= _SNIFF_BYTES or b">" in head
+
+
+def iter_feed_entries(chunks: Iterable[bytes]) -> Iterator[feedparser.FeedParserDict]:
+    """Incrementally parse an RSS/Atom byte stream, yielding entries as they are decoded.
+
+    Entries are FeedParserDicts with the fields ``parse_rss`` reads (link, id, title,
+    summary/description, content, published_parsed). Only the entry being parsed is held
+    in memory. Input is decoded to text first so feeds in encodings expat does not
+    support (gb2312, gbk, big5 ...) still parse; the encoding is sniffed once the XML
+    declaration has fully arrived. The raw body is kept so that malformed XML (a bare
+    "&", a broken tag) falls back to feedparser's lenient parse of the whole body; the
+    entries already yielded are not repeated.
+    """
+    target = _EntryTarget()
+    parser = ET.XMLParser(target=target)
+    entities = _EntityRewriter()
+    decoder = None
+    head = b""
+    body: List[bytes] = []
+    seen = set()
+
+    def emit():
+        for entry in target.ready:
+            seen.add(_entry_key(entry))
+            yield entry
+        target.ready.clear()
+
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            body.append(chunk)
+            if decoder is None:
+                head += chunk
+                if not _head_complete(head):
+                    continue
+                decoder = codecs.getincrementaldecoder(_sniff_encoding(head[:_SNIFF_BYTES]))(errors="replace")
+                chunk, head = head, b""
+            parser.feed(entities.feed(decoder.decode(chunk)))
+            if target.ready:
+                yield from emit()
+        if decoder is None and head:
+            decoder = codecs.getincrementaldecoder(_sniff_encoding(head[:_SNIFF_BYTES]))(errors="replace")
+            parser.feed(entities.feed(decoder.decode(head)))
+        if decoder is not None:
+            parser.feed(entities.feed(decoder.decode(b"", final=True), final=True))
+            parser.close()
+    except ET.ParseError as e:
+        yield from emit()
+        logger.warning("Feed stream parse failed (%s), re-parsing the body with feedparser", e)
+        body.extend(c for c in chunks if c)
+        parsed = feedparser.parse(b"".join(body))
+        body.clear()
+        for entry in parsed.entries:
+            if _entry_key(entry) not in seen:
+                yield entry
+        return
+    yield from emit()
@@ -5,16 +5,17 @@ import threading
 import urllib.parse
 import urllib.robotparser as robotparser
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Dict, Iterator, Optional
 
 import requests
 
 from config import Settings
+from .robots_cache import robots_cache
+from .circuit_breaker import circuit_breaker, is_breaker_failure
 
 
 @dataclass
 class DomainState:
-    robots: robotparser.RobotFileParser
     last_request_ts: float = 0.0
     qps: float = 1.0
 
@@ -29,23 +30,9 @@ class Fetcher:
     def _get_domain(self, url: str) -> str:
         return urllib.parse.urlparse(url).netloc.lower()
 
-    def _load_robots(self, base_url: str) -> robotparser.RobotFileParser:
-        domain = self._get_domain(base_url)
-        with self._lock:
-            state = self._domains.get(domain)
-            if state and state.robots.mtime() and (time.time() - state.robots.mtime()) < 3600:
-                return state.robots
-        robots_url = urllib.parse.urljoin(f"https://{domain}", "/robots.txt")
-        rp = robotparser.RobotFileParser()
-        try:
-            rp.set_url(robots_url)
-            rp.read()
-        except Exception:
-            # Fail-open if robots unavailable
-            rp.parse("")
-        with self._lock:
-            self._domains[domain] = DomainState(robots=rp, last_request_ts=0.0, qps=self.settings.rate_limit_domain_qps)
-        return rp
+    def _load_robots(self, url: str) -> robotparser.RobotFileParser:
+        # robots.txt is cached process-wide (and in SQLite), not per Fetcher instance
+        return robots_cache.get(url)
 
     def can_fetch(self, url: str) -> bool:
         rp = self._load_robots(url)
@@ -55,26 +42,89 @@ class Fetcher:
             return True
 
     def _respect_rate_limit(self, domain: str):
+        # Reserve the next slot under the lock, sleep outside it so other domains proceed
         with self._lock:
             state = self._domains.get(domain)
             if not state:
-                state = DomainState(robots=robotparser.RobotFileParser(), last_request_ts=0.0, qps=self.settings.rate_limit_domain_qps)
+                state = DomainState(last_request_ts=0.0, qps=self.settings.rate_limit_domain_qps)
                 self._domains[domain] = state
             now = time.time()
             min_interval = 1.0 / max(state.qps, 0.1)
-            sleep_sec = state.last_request_ts + min_interval - now
-            if sleep_sec > 0:
-                time.sleep(sleep_sec)
-            state.last_request_ts = time.time()
+            slot = max(now, state.last_request_ts + min_interval)
+            state.last_request_ts = slot
+        if slot > now:
+            time.sleep(slot - now)
 
-    def get(self, url: str, timeout: Optional[int] = None) -> requests.Response:
+    def get(self, url: str, timeout: Optional[int] = None, stream: bool = False) -> requests.Response:
         if not self.can_fetch(url):
             raise PermissionError(f"Blocked by robots.txt: {url}")
         domain = self._get_domain(url)
+        # Fail fast for hosts that keep timing out / erroring instead of waiting out the timeout
+        circuit_breaker.before_request(domain)
         self._respect_rate_limit(domain)
         headers = {"User-Agent": self.user_agent, "Accept": "*/*"}
-        resp = requests.get(url, headers=headers, timeout=timeout or self.settings.fetch_timeout_sec)
-        resp.raise_for_status()
+        started = time.monotonic()
+        try:
+            resp = requests.get(url, headers=headers, timeout=timeout or self.settings.fetch_timeout_sec, stream=stream)
+            resp.raise_for_status()
+        except Exception as e:
+            if is_breaker_failure(e):
+                circuit_breaker.record_failure(domain, str(e), time.monotonic() - started)
+            else:
+                # the host answered (e.g. 404 for one dead feed): it is reachable
+                circuit_breaker.record_success(domain, time.monotonic() - started)
+            raise
+        latency = time.monotonic() - started
+        if stream:
+            # 正文尚未下载：读正文时的超时/连接重置同样算主机故障，由 iter_capped 读完后记录结果
+            resp._breaker_pending = (domain, latency)
+        else:
+            circuit_breaker.record_success(domain, latency)
         return resp
 
 
+def settle_stream(resp: requests.Response, error: Optional[BaseException] = None):
+    """Record the circuit-breaker outcome of a ``stream=True`` response once its body is done.
+
+    ``error`` is the exception that ended the body read, if any; the slow-call check uses the
+    time to response headers. Only the first call per response counts.
+    """
+    pending = getattr(resp, "_breaker_pending", None)
+    if pending is None:
+        return
+    resp._breaker_pending = None
+    domain, latency = pending
+    if error is not None and is_breaker_failure(error):
+        circuit_breaker.record_failure(domain, str(error), latency)
+    else:
+        circuit_breaker.record_success(domain, latency)
+
+
+class ResponseTooLarge(Exception):
+    pass
+
+
+def iter_capped(resp: requests.Response, max_bytes: int, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Yield the body of a streamed response, aborting once it exceeds ``max_bytes``.
+
+    The circuit breaker outcome is recorded when the body ends (see ``settle_stream``).
+    """
+    declared = resp.headers.get("Content-Length")
+    if max_bytes and declared and declared.isdigit() and int(declared) > max_bytes:
+        resp.close()
+        settle_stream(resp)
+        raise ResponseTooLarge(f"Response too large: {declared} > {max_bytes} bytes ({resp.url})")
+    total = 0
+    error = None
+    try:
+        for chunk in resp.iter_content(chunk_size):
+            total += len(chunk)
+            if max_bytes and total > max_bytes:
+                raise ResponseTooLarge(f"Response too large: > {max_bytes} bytes ({resp.url})")
+            yield chunk
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        resp.close()
+        settle_stream(resp, error)
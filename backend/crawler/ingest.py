@@ -4,17 +4,29 @@ from datetime import datetime, timezone
 from pathlib import Path
 import sys
 import calendar
+from dataclasses import dataclass, field
 from typing import Iterable
 
 import feedparser
+from sqlalchemy import bindparam, update
 import hashlib
 import logging
+import time
 
+from config import Settings
 from data.db import get_session
-from data.models import RssSource, NewsArticle, IngestLog
-from .ingest_utils import clean_html_to_text, url_sha256, simhash, ensure_columns_for_dedup, ensure_columns_for_enrich, ensure_ingest_log_table
-from ai.enrich import summarize_text, extract_keywords
-from .fetcher import Fetcher
+from data.models import RssSource, NewsArticle, IngestLog, IngestLogStage, FeedArchiveEntry
+from data import db as _db, rollups
+from data.bulk import BulkInsertError, bulk_insert_articles
+from .ingest_utils import SIMHASH_VERSION, clean_html_to_text, url_sha256
+from .fetcher import Fetcher, ResponseTooLarge, iter_capped
+from .circuit_breaker import CircuitOpenError
+from .feed_stream import iter_feed_entries
+from .extract import ArticleExtractor
+from .pipeline import Pipeline, Stage, StageTimings
+from .near_dup import SimhashIndex, simhash_index
+from .enrich_pool import get_enrich_pool
+from .feed_archive import ArchiveWriter
 
 # 导入邮件模块
 logger = logging.getLogger(__name__)
@@ -51,207 +63,143 @@ def check_email_available():
 logger = logging.getLogger(__name__)
 
 
+# entries handed to the article-extraction stage at a time
+_ENTRY_WINDOW = 50
+# result code of sources skipped or stopped by a cancelled run
+CANCELLED_CODE = 499
+# result code of sources whose host circuit is open (no request was made)
+CIRCUIT_OPEN_CODE = 503
+
+
 def _hash_url(url: str) -> str:
     return url_sha256(url)
 
 
-def parse_rss(source: RssSource) -> Iterable[dict]:
-    # fetch via central fetcher to respect robots and rate limits
-    fetcher = Fetcher()
-    resp = fetcher.get(source.url)
-    parsed = feedparser.parse(resp.content)
+def _entry_to_item(entry, source: RssSource) -> dict | None:
+    url = getattr(entry, "link", None) or getattr(entry, "id", None)
+    if not url:
+        return None
+        
+    title = getattr(entry, "title", "")
     
-    print(f"Parsing RSS source: {source.name}, found {len(parsed.entries)} entries")
+    # 尝试多种方式获取内容
+    content_raw = ""
+    if hasattr(entry, "summary") and entry.summary:
+        content_raw = entry.summary
+    elif hasattr(entry, "description") and entry.description:
+        content_raw = entry.description
+    elif hasattr(entry, "content") and entry.content:
+        # 某些RSS源使用content字段
+        if isinstance(entry.content, list) and len(entry.content) > 0:
+            content_raw = entry.content[0].get("value", "")
+        else:
+            content_raw = str(entry.content)
     
-    for entry in parsed.entries:
-        url = getattr(entry, "link", None) or getattr(entry, "id", None)
-        if not url:
-            continue
+    # 如果RSS中没有内容，先用占位文本，稍后由正文抽取阶段替换
+    needs_article = False
+    if not content_raw.strip():
+        print(f"Warning: No content found in RSS for {url}, title: {title}")
+        needs_article = True
+        content_raw = f"标题：{title}\n来源：{source.name}\n链接：{url}"
+    
+    content = clean_html_to_text(content_raw)
+    
+    # 如果清理后内容仍然为空，使用标题作为内容
+    if not content.strip():
+        needs_article = True
+        content = f"标题：{title}\n来源：{source.name}\n链接：{url}"
+    
+    published = getattr(entry, "published_parsed", None)
+    published_at = None
+    if published:
+        try:
+            # Convert struct_time (assumed UTC from RSS) to timezone-aware UTC datetime
+            ts = calendar.timegm(published)
+            published_at = datetime.fromtimestamp(ts, tz=timezone.utc)
+        except Exception:
+            published_at = None
             
-        title = getattr(entry, "title", "")
-        
-        # 尝试多种方式获取内容
-        content_raw = ""
-        if hasattr(entry, "summary") and entry.summary:
-            content_raw = entry.summary
-        elif hasattr(entry, "description") and entry.description:
-            content_raw = entry.description
-        elif hasattr(entry, "content") and entry.content:
-            # 某些RSS源使用content字段
-            if isinstance(entry.content, list) and len(entry.content) > 0:
-                content_raw = entry.content[0].get("value", "")
-            else:
-                content_raw = str(entry.content)
-        
-        # 如果RSS中没有内容，尝试从URL获取
-        if not content_raw.strip():
-            print(f"Warning: No content found in RSS for {url}, title: {title}")
-            # 这里可以添加网页抓取逻辑来获取完整内容
-            content_raw = f"标题：{title}\n来源：{source.name}\n链接：{url}"
-        
-        content = clean_html_to_text(content_raw)
-        
-        # 如果清理后内容仍然为空，使用标题作为内容
-        if not content.strip():
-            content = f"标题：{title}\n来源：{source.name}\n链接：{url}"
-        
-        published = getattr(entry, "published_parsed", None)
-        published_at = None
-        if published:
-            try:
-                # Convert struct_time (assumed UTC from RSS) to timezone-aware UTC datetime
-                ts = calendar.timegm(published)
-                published_at = datetime.fromtimestamp(ts, tz=timezone.utc)
-            except Exception:
-                published_at = None
-                
-        print(f"Processing entry: {title[:50]}..., content length: {len(content)}")
-        
-        yield {
-            "title": title,
-            "content": content,
-            "source_url": url,
-            "source_name": source.name,
-            "published_at": published_at,
-            "category": source.category,
-        }
+    return {
+        "title": title,
+        "content": content,
+        "source_url": url,
+        "source_name": source.name,
+        "published_at": published_at,
+        "category": source.category,
+        "_needs_article": needs_article,
+    }
 
 
-def ingest_rss_source(source_id: int) -> dict:
-    # open session
-    try:
-        db = get_session()
-    except Exception as e:
-        return {"code": 500, "msg": f"DB session error: {e}"}
-    # ensure required tables/columns exist (idempotent)
-    try:
-        ensure_ingest_log_table()
-        ensure_columns_for_dedup()
-        ensure_columns_for_enrich()
-    except Exception:
-        pass
-    # fetch source with one retry on closed connection
-    try:
-        source = db.get(RssSource, source_id)
-    except Exception as e:
-        if "Connection is closed" in str(e):
-            try:
-                db.close()
-            except Exception:
-                pass
-            db = get_session()
-            try:
-                source = db.get(RssSource, source_id)
-            except Exception as e2:
-                try:
-                    db.close()
-                except Exception:
-                    pass
-                return {"code": 500, "msg": f"Query source failed: {e2}"}
-        else:
-            try:
-                db.close()
-            except Exception:
-                pass
-            return {"code": 500, "msg": f"Query source failed: {e}"}
-    if not source or not source.is_active:
-        return {"code": 404, "msg": "Source not found or inactive"}
+def _fill_article_text(items: list[dict], extractor: ArticleExtractor | None, timings: StageTimings | None = None):
+    """用抓取到的网页正文替换占位内容（在 extractor 的时间预算内尽力而为）
 
-    created = 0
-    skipped = 0
-    new_articles = []  # 收集新文章信息用于邮件通知
+    未传 extractor 时保留 ``_needs_article`` 标记，由后续阶段（去重之后）再抽取。
+    """
+    if extractor is None:
+        return
+    urls = [it["source_url"] for it in items if it.pop("_needs_article", False)]
+    if not urls:
+        return
+    with (timings or StageTimings()).measure("extract", items=len(urls)):
+        texts = extractor.fetch_many(urls)
+    for it in items:
+        text = clean_html_to_text(texts.get(it["source_url"]) or "")
+        if text.strip():
+            it["content"] = text
+    print(f"Article extraction: {len(texts)}/{len(urls)} pages extracted")
 
-    try:
-        iterator = parse_rss(source)
-    except Exception as e:
+
+def _iter_feed_entries(source: RssSource, settings: Settings, fetcher: Fetcher | None = None,
+                       timings: StageTimings | None = None, archive: ArchiveWriter | None = None) -> Iterable:
+    timings = timings or StageTimings()
+    # fetch via central fetcher to respect robots and rate limits; the body is capped while downloading
+    fetcher = fetcher or Fetcher(settings)
+    # request: robots/rate-limit wait, DNS, connect and time to response headers
+    with timings.measure("request"):
+        resp = fetcher.get(source.url, stream=True)
+    raw = iter_capped(resp, settings.feed_max_bytes)
+    if archive is not None:
+        # 原始正文边下载边写入归档，归档耗时单独计入 archive
+        raw = archive.tee(raw, timings)
+    chunks = timings.timed_iter("download", raw, count_bytes=True, exclude="archive")
+    if settings.feed_streaming:
+        print(f"Parsing RSS source (streaming): {source.name}")
         try:
-            db.add(IngestLog(source_id=source.id, url=source.url, status='failed', error_message=str(e)))
-            db.commit()
-        except Exception:
-            try:
-                db.rollback()
-            except Exception:
-                pass
-        return {"code": 500, "msg": f"Fetch/parse failed: {e}"}
+            # download and parse interleave here; parse time excludes the chunk reads
+            yield from timings.timed_iter("parse", iter_feed_entries(chunks), exclude=("download", "archive"))
+        except ResponseTooLarge as e:
+            # 已解析出的条目保留，超出部分丢弃
+            logger.warning("Feed truncated at FEED_MAX_BYTES for %s: %s", source.url, e)
+        return
+    body = b"".join(chunks)
+    with timings.measure("parse"):
+        parsed = feedparser.parse(body)
+    timings.add("parse", items=len(parsed.entries))
+    print(f"Parsing RSS source: {source.name}, found {len(parsed.entries)} entries")
+    yield from parsed.entries
 
-    for item in iterator:
-        url = item.get("source_url")
-        url_hash = _hash_url(url) if url else None
-        
-        # 验证内容是否有效
-        title = item.get("title", "").strip()
-        content = item.get("content", "").strip()
-        
-        if not title or not content:
-            print(f"Skipping item with empty title or content: title='{title}', content_length={len(content)}")
-            skipped += 1
+
+def parse_rss(source: RssSource, extractor: ArticleExtractor | None = None,
+              settings: Settings | None = None, fetcher: Fetcher | None = None,
+              timings: StageTimings | None = None, archive: ArchiveWriter | None = None) -> Iterable[dict]:
+    settings = settings or Settings()
+    window: list[dict] = []
+    for entry in _iter_feed_entries(source, settings, fetcher, timings, archive):
+        item = _entry_to_item(entry, source)
+        if item is None:
             continue
-            
-        if url:
-            exists = db.query(NewsArticle).filter(NewsArticle.source_url == url).first()
-            if exists:
-                print(f"Skipping duplicate URL: {url}")
-                skipped += 1
-                continue
+        print(f"Processing entry: {item['title'][:50]}..., content length: {len(item['content'])}")
+        window.append(item)
+        # 按窗口批量补全正文，避免整源条目堆积在内存中
+        if len(window) >= _ENTRY_WINDOW:
+            _fill_article_text(window, extractor, timings)
+            yield from window
+            window = []
+    _fill_article_text(window, extractor, timings)
+    yield from window
 
-        sh = simhash(title + " " + content)
-
-        summary = summarize_text(content, max_chars=200)
-        keywords = ",".join(extract_keywords(title + " " + content, top_k=8))
-
-        article = NewsArticle(
-            title=title,
-            content=content,
-            source_url=url,
-            source_name=item.get("source_name"),
-            published_at=item.get("published_at"),
-            category=item.get("category"),
-            tags=None,
-        )
-        # best-effort assign dedup fields if model has them
-        try:
-            setattr(article, "url_hash", url_hash)
-        except Exception:
-            pass
-        try:
-            setattr(article, "simhash", format(sh, 'x'))
-        except Exception:
-            pass
-        try:
-            setattr(article, "summary", summary)
-            setattr(article, "keywords", keywords)
-        except Exception:
-            pass
-        db.add(article)
-        created += 1
-        
-        # 收集新文章信息用于邮件通知
-        new_articles.append({
-            "title": title,
-            "summary": summary,
-            "source": item.get("source_name"),
-            "url": url,
-            "category": item.get("category"),
-            "created_at": datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
-
-    # Record last fetch in UTC (timezone-aware)
-    source.last_fetch = datetime.now(timezone.utc)
-    try:
-        db.add(IngestLog(source_id=source.id, url=source.url, status='success', created=created, skipped=skipped))
-        db.commit()
-    except Exception as e:
-        try:
-            db.rollback()
-        except Exception:
-            pass
-        return {"code": 500, "msg": f"Commit failed: {e}"}
-    finally:
-        try:
-            db.close()
-        except Exception:
-            pass
 
+def _notify_new_articles(created: int, new_articles: list[dict]) -> dict:
     # 发送邮件通知（如果启用了邮件功能且有新文章）
     email_status = {
         "enabled": False,
@@ -326,13 +274,419 @@ def ingest_rss_source(source_id: int) -> dict:
     else:
         email_status["message"] = "邮件模块未启用"
     
-    return {
-        "code": 0, 
-        "data": {
-            "created": created, 
-            "skipped": skipped,
-            "email": email_status
+    return email_status
+
+
+@dataclass
+class _SourceRun:
+    """Per-source state carried through the ingest pipeline."""
+    source_id: int
+    source: RssSource | None = None
+    code: int = 0
+    error: str | None = None
+    created: int = 0
+    skipped: int = 0
+    near_duplicates: int = 0  # simhash matches (skipped or linked, see near_duplicate_policy)
+    batches: int = 0  # batches emitted by the fetch stage
+    persisted: int = 0  # batches handled by the persist stage
+    fetch_done: bool = False
+    new_articles: list = field(default_factory=list)
+    email: dict | None = None
+    timings: StageTimings = field(default_factory=StageTimings)
+    started: float = 0.0
+    archive: dict | None = None  # raw feed archive entry (see crawler.feed_archive)
+    retry_after: float | None = None  # seconds until the open circuit lets a probe through
+
+    def result(self) -> dict:
+        if self.code == 0:
+            return {"code": 0, "data": {"created": self.created, "skipped": self.skipped,
+                                        "near_duplicates": self.near_duplicates, "email": self.email}}
+        if self.retry_after is not None:
+            return {"code": self.code, "msg": self.error, "retry_after": round(self.retry_after, 1)}
+        return {"code": self.code, "msg": self.error}
+
+
+@dataclass
+class _Batch:
+    run: _SourceRun
+    items: list = field(default_factory=list)
+    final: bool = False  # end-of-source marker
+    failed: bool = False  # an earlier stage failed; items were dropped but the batch still counts
+
+
+def _fail_batch(batch: _Batch, error: str):
+    batch.failed = True
+    batch.items = []
+    if batch.run.code == 0:
+        batch.run.code, batch.run.error = 500, error
+
+
+class IngestPipeline:
+    """Ingest flow as explicit stages connected by bounded queues.
+
+    fetch (I/O, several workers): load source, download + parse, drop known URLs
+    extract (I/O): fetch article pages for headline-only entries that survived URL dedup
+    enrich (CPU, process pool): simhash, summary, keywords
+    persist (single writer): near-duplicate check, bulk insert, IngestLog, last_fetch
+    notify: email for sources with new articles
+    """
+
+    def __init__(self, settings: Settings | None = None, observer=None):
+        self.settings = settings or Settings()
+        # optional progress observer (see crawler.ingest_runs.IngestRun)
+        self.observer = observer
+        self.fetcher = Fetcher(self.settings)
+        # one extraction budget per ingest cycle
+        self.extractor = ArticleExtractor(self.settings, self.fetcher) if self.settings.enable_article_fetch else None
+        self._seen_urls: set[str] = set()  # only touched by the single persist worker
+
+    def run(self, source_ids: list[int]) -> dict:
+        runs = [_SourceRun(source_id=sid) for sid in source_ids]
+        pipeline = Pipeline([
+            Stage("fetch", self._fetch, workers=self.settings.pipeline_fetch_workers),
+            Stage("extract", self._extract, workers=self.settings.pipeline_fetch_workers),
+            Stage("enrich", self._enrich, workers=self.settings.pipeline_enrich_workers),
+            Stage("persist", self._persist, workers=1),
+            Stage("notify", self._notify, workers=1),
+        ], queue_size=self.settings.pipeline_queue_size)
+        stages = pipeline.run(runs)
+        return {
+            "results": [{"id": r.source_id, **r.result()} for r in runs],
+            "stages": stages,
+            "elapsed_sec": round(pipeline.elapsed, 3),
         }
-    }
 
+    def _cancelled(self) -> bool:
+        return self.observer is not None and self.observer.cancelled()
+
+    def _observe(self, hook: str, *args):
+        fn = getattr(self.observer, hook, None)
+        if fn is None:
+            return
+        try:
+            fn(*args)
+        except Exception as e:
+            logger.debug("ingest observer %s failed: %s", hook, e)
+
+    # -- stages -------------------------------------------------------------------------
+
+    def _fetch(self, run: _SourceRun):
+        run.started = time.perf_counter()
+        if self._cancelled():
+            run.code, run.error = CANCELLED_CODE, "Cancelled"
+            yield _Batch(run, final=True)
+            return
+        db = get_session()
+        try:
+            run.source = db.get(RssSource, run.source_id)
+        except Exception as e:
+            run.code, run.error = 500, f"Query source failed: {e}"
+        finally:
+            try:
+                db.close()
+            except Exception:
+                pass
+        if run.code == 0 and (not run.source or not run.source.is_active):
+            run.code, run.error = 404, "Source not found or inactive"
+        if run.code != 0:
+            run.source = None
+            yield _Batch(run, final=True)
+            return
+
+        self._observe("source_started", run.source_id, run.source.name)
+        archive = ArchiveWriter(self.settings.feed_archive_dir) if self.settings.feed_archive_enabled else None
+        batch: list[dict] = []
+        try:
+            # 正文抽取放到 extract 阶段（URL 去重之后），已入库的条目不再抓取原网页
+            for item in parse_rss(run.source, None, self.settings, self.fetcher, run.timings, archive):
+                if self._cancelled():
+                    # 已入队的批次照常落库，剩余条目放弃
+                    run.code, run.error = CANCELLED_CODE, "Cancelled"
+                    break
+                batch.append(item)
+                if len(batch) >= self.settings.pipeline_batch_size:
+                    # 计数放在去重查询之后：查询失败时该批次不会进入下游，也不应计入
+                    fresh = self._drop_known(run, batch)
+                    run.batches += 1
+                    yield _Batch(run, fresh)
+                    batch = []
+            if batch:
+                fresh = self._drop_known(run, batch)
+                run.batches += 1
+                yield _Batch(run, fresh)
+        except CircuitOpenError as e:
+            # 熔断期间没有发出请求：单独的结果码，任务队列按熔断恢复时间重排而不消耗重试次数
+            run.code, run.error, run.retry_after = CIRCUIT_OPEN_CODE, str(e), e.retry_in
+        except Exception as e:
+            run.code, run.error = 500, f"Fetch/parse failed: {e}"
+        if archive is not None:
+            run.archive = archive.finish()
+        yield _Batch(run, final=True)
+
+    def _drop_known(self, run: _SourceRun, items: list[dict]) -> list[dict]:
+        """Skip empty entries and URLs already stored, with one IN query per batch."""
+        valid = []
+        for item in items:
+            item["title"] = (item.get("title") or "").strip()
+            item["content"] = (item.get("content") or "").strip()
+            if not item["title"] or not item["content"]:
+                print(f"Skipping item with empty title or content: title='{item['title']}', content_length={len(item['content'])}")
+                run.skipped += 1
+                continue
+            valid.append(item)
+        urls = [it["source_url"] for it in valid if it.get("source_url")]
+        if not urls:
+            return valid
+        db = get_session()
+        try:
+            with run.timings.measure("dedup", items=len(urls)):
+                known = {u for (u,) in db.query(NewsArticle.source_url).filter(NewsArticle.source_url.in_(urls)).all()}
+        finally:
+            db.close()
+        fresh = []
+        for item in valid:
+            if item.get("source_url") in known:
+                print(f"Skipping duplicate URL: {item['source_url']}")
+                run.skipped += 1
+                continue
+            fresh.append(item)
+        return fresh
+
+    def _extract(self, batch: _Batch):
+        if batch.final or batch.failed or self.extractor is None or not batch.items:
+            yield batch
+            return
+        try:
+            _fill_article_text(batch.items, self.extractor, batch.run.timings)
+        except Exception as e:
+            # 正文抽取尽力而为：失败时保留 RSS 中的占位内容
+            logger.warning("article extraction failed for source %s: %s", batch.run.source_id, e)
+        yield batch
+
+    def _enrich(self, batch: _Batch):
+        if batch.final or batch.failed:
+            yield batch
+            return
+        started = time.perf_counter()
+        try:
+            batch.items = self._enrich_rows(batch.items)
+        except Exception as e:
+            # 批次仍须送达 persist 计数，否则该源永远不会结束
+            logger.exception("enrich failed for source %s: %s", batch.run.source_id, e)
+            _fail_batch(batch, f"Enrich failed: {e}")
+            yield batch
+            return
+        batch.run.timings.add("enrich", time.perf_counter() - started, items=len(batch.items))
+        yield batch
+
+    def _enrich_rows(self, items: list[dict]) -> list[dict]:
+        # 一次分词，simhash/摘要/关键词共用；CPU 部分在进程池中执行，不占用 API 进程的 GIL
+        enriched = get_enrich_pool(self.settings).run([(item["title"], item["content"]) for item in items])
+        rows = []
+        for item, (sh, summary, keywords) in zip(items, enriched):
+            title, content, url = item["title"], item["content"], item.get("source_url")
+            rows.append({
+                "title": title,
+                "content": content,
+                "source_url": url,
+                "source_name": item.get("source_name"),
+                "published_at": item.get("published_at"),
+                "category": item.get("category"),
+                "tags": None,
+                "url_hash": _hash_url(url) if url else None,
+                "simhash": sh,
+                "simhash_version": SIMHASH_VERSION,
+                "summary": summary,
+                "keywords": keywords,
+            })
+        return rows
+
+    def _persist(self, batch: _Batch):
+        run = batch.run
+        if batch.final:
+            run.fetch_done = True
+        else:
+            # 每个批次（含上游失败的批次）都计数，保证该源最终写入日志并结束
+            try:
+                if not batch.failed:
+                    self._persist_rows(run, batch.items)
+            except Exception as e:
+                logger.exception("persist failed for source %s: %s", run.source_id, e)
+                if run.code == 0:
+                    run.code, run.error = 500, f"Persist failed: {e}"
+            finally:
+                run.persisted += 1
+            self._observe("batch_persisted", run.source_id)
+        # enrich workers may reorder batches: finish a source once all of its batches are in
+        if run.fetch_done and run.persisted == run.batches:
+            # 开始前就被取消的源没有加载 RssSource，也要写入 cancelled 日志
+            if run.source is not None or run.code == CANCELLED_CODE:
+                self._finish_source(run)
+            yield run
+
+    def _persist_rows(self, run: _SourceRun, rows: list[dict]):
+        fresh = []
+        for row in rows:
+            url = row.get("source_url")
+            if url and url in self._seen_urls:
+                run.skipped += 1
+                continue
+            if url:
+                self._seen_urls.add(url)
+            fresh.append(row)
+        fresh, pending = self._check_near_duplicates(run, fresh)
+        if not fresh:
+            return
+        try:
+            with run.timings.measure("persist", items=len(fresh)):
+                ids = bulk_insert_articles(fresh)
+        except BulkInsertError as e:
+            run.code, run.error = 500, f"Commit failed: {e}"
+            # 失败前已提交的分块照常计数、归组，并由 _notify 通知
+            ids = e.ids
+            fresh = fresh[:len(ids)]
+            pending = [(pos, root) for pos, root in pending if pos < len(ids)]
+        except Exception as e:
+            run.code, run.error = 500, f"Commit failed: {e}"
+            return
+        run.created += len(ids)
+        if pending:
+            self._link_batch_duplicates(fresh, ids, pending)
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        for row, article_id in zip(fresh, ids):
+            # 收集新文章信息用于邮件通知
+            run.new_articles.append({
+                "id": article_id,
+                "title": row["title"],
+                "summary": row["summary"],
+                "source": row["source_name"],
+                "url": row["source_url"],
+                "category": row["category"],
+                "created_at": now,
+            })
+
+    def _check_near_duplicates(self, run: _SourceRun, rows: list[dict]) -> tuple[list[dict], list[tuple[int, int]]]:
+        """Match each row's simhash against stored articles and earlier rows of the batch.
+
+        ``skip`` drops matches; ``link`` keeps them with ``dedup_group_id`` set to the
+        matched group. Rows matching a row of the same batch have no id yet: they are
+        returned as (position, root position) pairs and linked after the insert.
+        """
+        policy = self.settings.near_duplicate_policy
+        if policy not in ("link", "skip") or not rows:
+            return rows, []
+        try:
+            simhash_index.ensure_loaded()
+        except Exception as e:
+            logger.warning("simhash index unavailable, near-duplicate check skipped: %s", e)
+            return rows, []
+        threshold = self.settings.simhash_hamming_threshold
+        local = SimhashIndex(threshold)  # keys: position in ``kept`` + 1
+        groups: dict[int, int] = {}  # position -> stored group id
+        roots: dict[int, int] = {}  # position -> position of the first row of its batch-local group
+        kept: list[dict] = []
+        pending: list[tuple[int, int]] = []
+        with run.timings.measure("dedup"):
+            for row in rows:
+                pos = len(kept)
+                hit = simhash_index.nearest(row.get("simhash"), threshold)
+                local_hit = None if hit else local.nearest(row.get("simhash"), threshold)
+                if hit or local_hit:
+                    run.near_duplicates += 1
+                    if policy == "skip":
+                        run.skipped += 1
+                        continue
+                if hit:
+                    row["dedup_group_id"] = hit[2]
+                    groups[pos] = hit[2]
+                elif local_hit:
+                    other = local_hit[0] - 1
+                    if other in groups:
+                        row["dedup_group_id"] = groups[other]
+                        groups[pos] = groups[other]
+                    else:
+                        roots[pos] = roots.get(other, other)
+                        pending.append((pos, roots[pos]))
+                local.add(pos + 1, row.get("simhash"))
+                kept.append(row)
+        return kept, pending
+
+    def _link_batch_duplicates(self, rows: list[dict], ids: list[int], pending: list[tuple[int, int]]):
+        table = NewsArticle.__table__
+        params = []
+        for pos, root in pending:
+            rows[pos]["dedup_group_id"] = ids[root]
+            params.append({"b_id": ids[pos], "b_group": ids[root]})
+        try:
+            with _db.engine.begin() as conn:
+                conn.execute(
+                    update(table).where(table.c.id == bindparam("b_id")).values(dedup_group_id=bindparam("b_group")),
+                    params,
+                )
+        except Exception as e:
+            logger.warning("linking near-duplicate articles failed: %s", e)
+            return
+        for pos, root in pending:
+            if simhash_index.loaded:
+                simhash_index.add(ids[pos], rows[pos].get("simhash"), ids[root])
 
+    def _finish_source(self, run: _SourceRun):
+        db = get_session()
+        try:
+            source = db.get(RssSource, run.source_id)
+            if source is not None and run.code == 0:
+                # Record last fetch in UTC (timezone-aware)
+                source.last_fetch = datetime.now(timezone.utc)
+            url = (run.source or source).url if (run.source or source) is not None else None
+            log = IngestLog(
+                source_id=run.source_id,
+                url=url,
+                status='success' if run.code == 0 else ('cancelled' if run.code == CANCELLED_CODE else 'failed'),
+                created=run.created,
+                skipped=run.skipped,
+                error_message=run.error,
+            )
+            db.add(log)
+            db.flush()
+            rollups.add_ingest_logs(db, [(log.created_at, log.status, log.error_message)])
+            # 各阶段耗时/字节数与日志同一事务写入
+            run.timings.add("total", time.perf_counter() - run.started, items=run.created)
+            for t in run.timings.to_list():
+                db.add(IngestLogStage(log_id=log.id, source_id=run.source_id, created_at=log.created_at, **t))
+            if run.archive:
+                db.add(FeedArchiveEntry(source_id=run.source_id, log_id=log.id, url=url,
+                                        fetched_at=log.created_at, **run.archive))
+            db.commit()
+        except Exception as e:
+            try:
+                db.rollback()
+            except Exception:
+                pass
+            if run.code == 0:
+                run.code, run.error = 500, f"Commit failed: {e}"
+        finally:
+            try:
+                db.close()
+            except Exception:
+                pass
+
+    def _notify(self, run: _SourceRun):
+        # 源失败或取消前已提交的文章同样已入库，照常通知
+        if run.code == 0 or run.created > 0:
+            run.email = _notify_new_articles(run.created, run.new_articles)
+        self._observe("source_finished", run.source_id, run.result())
+        return ()
+
+
+def ingest_sources(source_ids: list[int], settings: Settings | None = None, observer=None) -> dict:
+    """Ingest several sources through one pipeline run; results keep the order of ``source_ids``."""
+    return IngestPipeline(settings, observer).run(list(source_ids))
+
+
+def ingest_rss_source(source_id: int) -> dict:
+    out = ingest_sources([source_id])
+    result = out["results"][0]
+    result.pop("id", None)
+    if result.get("code") == 0:
+        result["data"]["stages"] = out["stages"]
+    return result
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+
+logger = logging.getLogger(__name__)
+
+# finished runs kept for status polling
+_MAX_RUNS = 20
+
+STATUS_RUNNING = "running"
+STATUS_CANCELLING = "cancelling"
+STATUS_DONE = "done"
+STATUS_CANCELLED = "cancelled"
+STATUS_FAILED = "failed"
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    if not ts:
+        return None
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class IngestRun:
+    """Progress of one background batch ingest; also the pipeline's observer.
+
+    The pipeline calls ``source_started`` / ``source_finished`` from its worker threads
+    and polls ``cancelled`` between sources and entries.
+    """
+
+    def __init__(self, total: int):
+        self.id = uuid.uuid4().hex
+        self.status = STATUS_RUNNING
+        self.total = total
+        self.done = 0
+        self.created = 0
+        self.skipped = 0
+        self.failed = 0
+        self.current: "OrderedDict[int, str]" = OrderedDict()  # source_id -> name, being fetched
+        self.started_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    # -- observer hooks ---------------------------------------------------------------
+
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def source_started(self, source_id: int, name: Optional[str]):
+        with self._lock:
+            self.current[source_id] = name or str(source_id)
+
+    def source_finished(self, source_id: int, result: dict):
+        with self._lock:
+            self.current.pop(source_id, None)
+            self.done += 1
+            if result.get("code") == 0:
+                data = result.get("data") or {}
+                self.created += data.get("created", 0)
+                self.skipped += data.get("skipped", 0)
+            else:
+                self.failed += 1
+
+    # -- control ----------------------------------------------------------------------
+
+    def cancel(self):
+        with self._lock:
+            if self.status == STATUS_RUNNING:
+                self.status = STATUS_CANCELLING
+                self._cancel.set()
+
+    def finish(self, result: Optional[dict] = None, error: Optional[str] = None):
+        with self._lock:
+            self.result = result
+            self.error = error
+            self.current.clear()
+            self.finished_at = time.time()
+            if error:
+                self.status = STATUS_FAILED
+            elif self._cancel.is_set():
+                self.status = STATUS_CANCELLED
+            else:
+                self.done = self.total
+                self.status = STATUS_DONE
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            end = self.finished_at or time.time()
+            elapsed = end - self.started_at
+            eta = None
+            if self.finished_at is None and self.done:
+                eta = round(elapsed / self.done * max(0, self.total - self.done), 1)
+            current = [{"id": sid, "name": name} for sid, name in self.current.items()]
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "total": self.total,
+                "done": self.done,
+                "created": self.created,
+                "skipped": self.skipped,
+                "failed": self.failed,
+                "current_source": current[0] if current else None,
+                "current_sources": current,
+                "started_at": _iso(self.started_at),
+                "finished_at": _iso(self.finished_at),
+                "elapsed_sec": round(elapsed, 1),
+                "eta_sec": eta,
+                "result": self.result,
+                "error": self.error,
+            }
+
+
+_lock = threading.Lock()
+_runs: "OrderedDict[str, IngestRun]" = OrderedDict()
+
+
+def active_run() -> Optional[IngestRun]:
+    with _lock:
+        for run in reversed(_runs.values()):
+            if run.finished_at is None:
+                return run
+    return None
+
+
+def get_run(job_id: Optional[str] = None) -> Optional[IngestRun]:
+    """Run by id, or the most recent run when ``job_id`` is empty."""
+    with _lock:
+        if job_id:
+            return _runs.get(job_id)
+        return next(reversed(_runs.values()), None)
+
+
+def start_run(total: int, target: Callable[[IngestRun], dict]) -> IngestRun:
+    """Start ``target(run)`` on a background thread; returns the already-active run if any."""
+    with _lock:
+        for existing in _runs.values():
+            if existing.finished_at is None:
+                return existing
+        run = IngestRun(total)
+        _runs[run.id] = run
+        finished = [rid for rid, r in _runs.items() if r.finished_at is not None]
+        for rid in finished[:max(0, len(_runs) - _MAX_RUNS)]:
+            _runs.pop(rid, None)
+
+    def _main():
+        try:
+            run.finish(result=target(run))
+        except Exception as e:
+            logger.exception("background ingest run %s failed", run.id)
+            run.finish(error=str(e))
+
+    threading.Thread(target=_main, name=f"ingest-run-{run.id[:8]}", daemon=True).start()
+    return run
@@ -3,10 +3,12 @@ from __future__ import annotations
 import re
 import html
 import hashlib
-from typing import Iterable
+from collections import Counter
+from typing import Iterable, List, Mapping, Optional, Sequence
 
-from sqlalchemy import text
-from data.db import get_session, engine, Base
+import numpy as np
+
+from ai.analysis import tokenize
 
 
 TAG_RE = re.compile(r"<[^>]+>")
@@ -27,72 +29,122 @@ def url_sha256(url: str) -> str:
 
 
 def _tokenize(text_: str) -> Iterable[str]:
-    return re.findall(r"[\w\u4e00-\u9fff]+", (text_ or "").lower())
+    return tokenize(text_ or "")
+
+
+# Stored with each fingerprint (news_articles.simhash_version). Bump whenever tokenization or
+# token hashing changes: fingerprints of different versions are not comparable.
+# 1: md5 over CJK runs; 2: FNV-1a/fmix64 over analysis tokens
+SIMHASH_VERSION = 2
+
+# 64-bit FNV-1a + murmur3 fmix64 finalizer, vectorized over all tokens at once
+_FNV_OFFSET = 0xCBF29CE484222325
+_FNV_PRIME = np.uint64(0x100000001B3)
+_FMIX_C1 = np.uint64(0xFF51AFD7ED558CCD)
+_FMIX_C2 = np.uint64(0xC4CEB9FE1A85EC53)
+_SHIFT_33 = np.uint64(33)
+
+
+def hash_tokens64(tokens: Sequence[str]) -> np.ndarray:
+    """Stable 64-bit hashes (uint64 array) of ``tokens``; independent of PYTHONHASHSEED.
+
+    All tokens are encoded in one call (NUL separated; tokens never contain NUL) and ordered
+    by length, so step j gathers byte j of the prefix of tokens longer than j straight from
+    the encoded buffer; no (tokens, max_len) matrix, so one long token costs only its length.
+    """
+    n = len(tokens)
+    if not n:
+        return np.zeros(0, dtype=np.uint64)
+    raw = np.frombuffer("\0".join(tokens).encode("utf-8"), dtype=np.uint8)
+    seps = np.flatnonzero(raw == 0)
+    starts = np.concatenate(([0], seps + 1))
+    lengths = np.concatenate((seps, [raw.size])) - starts
+    order = np.argsort(-lengths, kind="stable")
+    sorted_lengths = lengths[order]
+    sorted_starts = starts[order]
+    max_len = int(sorted_lengths[0])
+    h = np.full(n, _FNV_OFFSET, dtype=np.uint64)
+    if max_len:
+        # rows still active at column j: len > j (lengths are sorted descending)
+        active = np.searchsorted(-sorted_lengths, -np.arange(max_len), side="left")
+        for j in range(max_len):
+            k = active[j]
+            h[:k] ^= raw[sorted_starts[:k] + j]
+            h[:k] *= _FNV_PRIME
+    h ^= h >> _SHIFT_33
+    h *= _FMIX_C1
+    h ^= h >> _SHIFT_33
+    h *= _FMIX_C2
+    h ^= h >> _SHIFT_33
+    out = np.empty(n, dtype=np.uint64)
+    out[order] = h
+    return out
+
+
+def _hash_bits(hashes: np.ndarray) -> np.ndarray:
+    """(n,) uint64 -> (n, 64) uint8 matrix, column i = bit i."""
+    return np.unpackbits(hashes.astype("<u8").view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+
+
+def _fingerprint(column_sums: np.ndarray, bits: int) -> int:
+    # bit i is set when the weighted votes for it are >= 0 (ties count as 1, as before)
+    set_bits = column_sums >= 0
+    set_bits[bits:] = False
+    return int.from_bytes(np.packbits(set_bits, bitorder="little").tobytes(), "little")
+
+
+def simhash_tokens(tokens: Sequence[str], weights: Optional[Sequence[float]] = None, bits: int = 64) -> int:
+    """Simhash of ``tokens``: each token votes +w/-w on every bit of its hash."""
+    if bits > 64:
+        raise ValueError("simhash supports at most 64 bits")
+    if not len(tokens):
+        return 0
+    b = _hash_bits(hash_tokens64(tokens))
+    w = np.ones(len(tokens)) if weights is None else np.asarray(weights, dtype=np.float64)
+    # sum of +w for set bits and -w for unset bits = 2 * (w @ B) - sum(w)
+    return _fingerprint(2.0 * (w @ b) - w.sum(), bits)
 
 
-def simhash(text_: str, bits: int = 64) -> int:
-    tokens = list(_tokenize(text_))
-    if not tokens:
+def simhash(text_: str, bits: int = 64, counts: Optional[Mapping[str, float]] = None) -> int:
+    """counts: 预先统计的词频/权重（ai.analysis），每个不同的词只哈希一次"""
+    if counts is None:
+        counts = Counter(_tokenize(text_))
+    if not counts:
         return 0
-    v = [0] * bits
-    for token in tokens:
-        h = int(hashlib.md5(token.encode("utf-8")).hexdigest(), 16)
-        for i in range(bits):
-            v[i] += 1 if (h >> i) & 1 else -1
-    fingerprint = 0
-    for i in range(bits):
-        if v[i] >= 0:
-            fingerprint |= (1 << i)
-    return fingerprint
+    return simhash_tokens(list(counts.keys()), list(counts.values()), bits)
+
+
+def simhash_many(counts_list: Sequence[Mapping[str, float]], bits: int = 64) -> List[int]:
+    """Fingerprints for a batch of documents with a single hashing / bit-unpacking pass.
+
+    Per-document column sums are segment sums over the concatenated tokens, so memory stays
+    O(tokens x 64) however many documents are in the batch.
+    """
+    if bits > 64:
+        raise ValueError("simhash supports at most 64 bits")
+    tokens: List[str] = []
+    weights: List[float] = []
+    sizes: List[int] = []
+    for counts in counts_list:
+        tokens.extend(counts.keys())
+        weights.extend(counts.values())
+        sizes.append(len(counts))
+    if not tokens:
+        return [0] * len(sizes)
+    w = np.asarray(weights, dtype=np.float64)
+    b = _hash_bits(hash_tokens64(tokens))
+    # per-document segment sums of the votes (2 * w @ B - sum(w), as in simhash_tokens);
+    # a document's tokens are contiguous, so only the (tokens, 64) bit matrix is materialized
+    sums = np.zeros((len(sizes), 64))
+    end = 0
+    for i, size in enumerate(sizes):
+        start, end = end, end + size
+        if size:
+            ws = w[start:end]
+            sums[i] = 2.0 * (ws @ b[start:end]) - ws.sum()
+    return [_fingerprint(sums[i], bits) if sizes[i] else 0 for i in range(len(sizes))]
 
 
 def hamming_distance(a: int, b: int) -> int:
     return (a ^ b).bit_count()
 
-
-def _connect():
-    # Prefer global engine; fallback to session bind
-    if engine is not None:
-        return engine.connect()
-    db = get_session()
-    return db.connection()
-
-
-def ensure_columns_for_dedup():
-    # Add url_hash and simhash columns to news_articles if missing
-    with _connect() as conn:
-        cols = [r[1] for r in conn.exec_driver_sql("PRAGMA table_info(news_articles)").fetchall()]
-        if "url_hash" not in cols:
-            conn.exec_driver_sql("ALTER TABLE news_articles ADD COLUMN url_hash VARCHAR(128)")
-            conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS idx_news_url_hash ON news_articles(url_hash)")
-        if "simhash" not in cols:
-            conn.exec_driver_sql("ALTER TABLE news_articles ADD COLUMN simhash VARCHAR(32)")
-            conn.exec_driver_sql("CREATE INDEX IF NOT EXISTS idx_news_simhash ON news_articles(simhash)")
-        try:
-            conn.commit()
-        except Exception:
-            pass
-
-
-def ensure_columns_for_enrich():
-    # Add summary and keywords columns if missing
-    with _connect() as conn:
-        cols = [r[1] for r in conn.exec_driver_sql("PRAGMA table_info(news_articles)").fetchall()]
-        if "summary" not in cols:
-            conn.exec_driver_sql("ALTER TABLE news_articles ADD COLUMN summary TEXT")
-        if "keywords" not in cols:
-            conn.exec_driver_sql("ALTER TABLE news_articles ADD COLUMN keywords TEXT")
-        try:
-            conn.commit()
-        except Exception:
-            pass
-
-
-
-def ensure_ingest_log_table():
-    """Ensure ORM-declared tables (including ingest_logs) are created on the current DB bind."""
-    if engine is not None:
-        try:
-            Base.metadata.create_all(engine)
-        except Exception:
-            pass
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import and_, delete, insert, or_, select, update
+
+from config import Settings
+from data import db as _db
+from data.models import IngestJob
+
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_FAILED = "failed"  # retries exhausted or not retriable
+
+# result codes worth retrying: fetch/parse/commit failures; 404 (missing or inactive source) is final
+_RETRIABLE_CODES = {500}
+
+_table = IngestJob.__table__
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def backoff_delay(attempt: int, settings: Optional[Settings] = None) -> float:
+    """Delay before retry number ``attempt`` (1-based): exponential, capped, with equal jitter."""
+    settings = settings or Settings()
+    delay = min(settings.ingest_retry_max_sec, settings.ingest_retry_base_sec * (2 ** max(0, attempt - 1)))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def _due(now: datetime):
+    # pending and due, or running with an expired lease (worker crashed / process restarted)
+    return or_(
+        and_(_table.c.status == STATUS_PENDING, _table.c.next_run_at <= now),
+        and_(_table.c.status == STATUS_RUNNING, _table.c.lease_expires_at < now),
+    )
+
+
+def enqueue(source_ids: Iterable[int], force: bool = False) -> List[int]:
+    """Queue one job per source unless it already has a pending or running job.
+
+    Returns the ids of the sources that got a new job. Old exhausted jobs for those
+    sources are dropped so the table only keeps the latest outcome. With ``force``
+    (manual runs) pending jobs waiting out a retry backoff are made due immediately.
+    """
+    ids = list(dict.fromkeys(int(s) for s in source_ids))
+    if not ids:
+        return []
+    now = datetime.utcnow()
+    with _db.engine.begin() as conn:
+        if force:
+            conn.execute(
+                update(_table)
+                .where(_table.c.source_id.in_(ids), _table.c.status == STATUS_PENDING, _table.c.next_run_at > now)
+                .values(next_run_at=now, updated_at=now)
+            )
+        busy = set(conn.execute(
+            select(_table.c.source_id).where(
+                _table.c.source_id.in_(ids),
+                _table.c.status.in_([STATUS_PENDING, STATUS_RUNNING]),
+            )
+        ).scalars())
+        fresh = [sid for sid in ids if sid not in busy]
+        if fresh:
+            conn.execute(delete(_table).where(_table.c.source_id.in_(fresh), _table.c.status == STATUS_FAILED))
+            conn.execute(insert(_table), [
+                {"source_id": sid, "status": STATUS_PENDING, "attempt": 0, "next_run_at": now,
+                 "created_at": now, "updated_at": now}
+                for sid in fresh
+            ])
+    return fresh
+
+
+def claim(owner: Optional[str] = None, limit: int = 50, source_ids: Optional[Iterable[int]] = None,
+          settings: Optional[Settings] = None) -> List[dict]:
+    """Atomically lease up to ``limit`` due jobs.
+
+    The lease is taken by a single UPDATE ... WHERE id IN (due jobs), which SQLite runs
+    under its write lock, so two workers can never claim the same job. Each claim gets a
+    unique token stored in ``lease_owner``; complete/fail only touch rows that still
+    carry it, so a worker whose lease expired cannot overwrite the new owner's result.
+    """
+    settings = settings or Settings()
+    now = datetime.utcnow()
+    token = f"{owner or default_owner()}:{uuid.uuid4().hex[:12]}"
+    due = select(_table.c.id).where(_due(now))
+    if source_ids is not None:
+        due = due.where(_table.c.source_id.in_(list(source_ids)))
+    due = due.order_by(_table.c.next_run_at, _table.c.id).limit(max(1, limit))
+    with _db.engine.begin() as conn:
+        conn.execute(
+            update(_table)
+            .where(_table.c.id.in_(due.scalar_subquery()), _due(now))
+            .values(status=STATUS_RUNNING, lease_owner=token,
+                    lease_expires_at=now + timedelta(seconds=settings.ingest_job_lease_sec),
+                    updated_at=now)
+        )
+        rows = conn.execute(select(_table).where(_table.c.lease_owner == token).order_by(_table.c.id)).mappings().all()
+    return [dict(r) for r in rows]
+
+
+def renew(job: dict, settings: Optional[Settings] = None) -> int:
+    """Extend the lease of the still-running jobs claimed together with ``job``.
+
+    Jobs of one claim share the lease token, so one UPDATE renews them all.
+    Returns the number of renewed jobs.
+    """
+    settings = settings or Settings()
+    now = datetime.utcnow()
+    with _db.engine.begin() as conn:
+        res = conn.execute(
+            update(_table)
+            .where(_table.c.lease_owner == job["lease_owner"], _table.c.status == STATUS_RUNNING)
+            .values(lease_expires_at=now + timedelta(seconds=settings.ingest_job_lease_sec), updated_at=now)
+        )
+    return res.rowcount or 0
+
+
+class _LeaseKeeper:
+    """Pipeline observer that renews the claim's lease as sources start and batches land.
+
+    Renewals are throttled to one per tenth of the lease; other hooks are forwarded to
+    the wrapped observer (e.g. the progress of a background run).
+    """
+
+    def __init__(self, job: dict, observer=None, settings: Optional[Settings] = None):
+        self.job = job
+        self.observer = observer
+        self.settings = settings or Settings()
+        self.interval = max(1.0, self.settings.ingest_job_lease_sec / 10)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _renew(self):
+        with self._lock:
+            if time.monotonic() - self._last < self.interval:
+                return
+            self._last = time.monotonic()
+        try:
+            renew(self.job, self.settings)
+        except Exception as e:
+            logger.warning("renewing ingest job lease failed: %s", e)
+
+    def _forward(self, hook: str, *args):
+        fn = getattr(self.observer, hook, None)
+        if fn is not None:
+            fn(*args)
+
+    def cancelled(self) -> bool:
+        return self.observer is not None and self.observer.cancelled()
+
+    def source_started(self, *args):
+        self._renew()
+        self._forward("source_started", *args)
+
+    def batch_persisted(self, *args):
+        self._renew()
+        self._forward("batch_persisted", *args)
+
+    def source_finished(self, *args):
+        self._renew()
+        self._forward("source_finished", *args)
+
+
+def complete(job: dict):
+    with _db.engine.begin() as conn:
+        conn.execute(delete(_table).where(_table.c.id == job["id"], _table.c.lease_owner == job["lease_owner"]))
+
+
+def fail(job: dict, error: str, retriable: bool = True, settings: Optional[Settings] = None) -> dict:
+    """Record a failed attempt; reschedule with backoff until ``fetch_retries`` is used up."""
+    settings = settings or Settings()
+    now = datetime.utcnow()
+    attempt = int(job.get("attempt") or 0) + 1
+    values = {"attempt": attempt, "last_error": (error or "")[:2000], "lease_owner": None,
+              "lease_expires_at": None, "updated_at": now}
+    if retriable and attempt <= settings.fetch_retries:
+        values.update(status=STATUS_PENDING, next_run_at=now + timedelta(seconds=backoff_delay(attempt, settings)))
+    else:
+        values.update(status=STATUS_FAILED)
+    with _db.engine.begin() as conn:
+        conn.execute(update(_table).where(_table.c.id == job["id"], _table.c.lease_owner == job["lease_owner"]).values(**values))
+    return {
+        "attempt": attempt,
+        "status": values["status"],
+        "next_run_at": values["next_run_at"].isoformat() if values.get("next_run_at") else None,
+    }
+
+
+def defer(job: dict, error: str, delay: float) -> dict:
+    """Reschedule a job that made no attempt (host circuit open) without counting it."""
+    now = datetime.utcnow()
+    next_run_at = now + timedelta(seconds=max(1.0, delay))
+    with _db.engine.begin() as conn:
+        conn.execute(
+            update(_table).where(_table.c.id == job["id"], _table.c.lease_owner == job["lease_owner"]).values(
+                status=STATUS_PENDING, next_run_at=next_run_at, last_error=(error or "")[:2000],
+                lease_owner=None, lease_expires_at=None, updated_at=now,
+            )
+        )
+    return {"attempt": int(job.get("attempt") or 0), "status": STATUS_PENDING, "next_run_at": next_run_at.isoformat()}
+
+
+def run_jobs(owner: Optional[str] = None, source_ids: Optional[Iterable[int]] = None,
+             limit: Optional[int] = None, settings: Optional[Settings] = None, observer=None) -> dict:
+    """Claim due jobs, ingest them through one pipeline run and settle each job.
+
+    Returns the pipeline output; failed results carry a ``retry`` entry describing the
+    scheduled retry (or that retries are exhausted). Jobs of a cancelled run are dropped;
+    the next cycle queues those sources again.
+    """
+    from .ingest import ingest_sources, CANCELLED_CODE, CIRCUIT_OPEN_CODE
+
+    settings = settings or Settings()
+    if source_ids is not None:
+        source_ids = list(source_ids)
+        limit = limit or len(source_ids)
+    jobs = claim(owner, limit or 50, source_ids, settings)
+    if not jobs:
+        return {"results": [], "stages": [], "elapsed_sec": 0.0}
+    by_source = {j["source_id"]: j for j in jobs}
+    # 整批任务共用一个租约：采集过程中按源/批次续租，避免长时间运行时被轮询任务重复领取
+    out = ingest_sources(list(by_source), settings, _LeaseKeeper(jobs[0], observer, settings))
+    for result in out["results"]:
+        job = by_source.get(result["id"])
+        if job is None:
+            continue
+        try:
+            if result.get("code") in (0, CANCELLED_CODE):
+                complete(job)
+            elif result.get("code") == CIRCUIT_OPEN_CODE:
+                # 熔断恢复后再试，不计入重试次数
+                result["retry"] = defer(job, result.get("msg") or "", result.get("retry_after") or 0.0)
+            else:
+                retry = fail(job, result.get("msg") or "", result.get("code") in _RETRIABLE_CODES, settings)
+                result["retry"] = retry
+                logger.info("ingest job for source %s failed (attempt %s), status=%s next_run_at=%s",
+                            job["source_id"], retry["attempt"], retry["status"], retry["next_run_at"])
+        except Exception as e:
+            # lease expires on its own; the job is picked up again later
+            logger.warning("settling ingest job %s failed: %s", job["id"], e)
+    return out
+
+
+def process_due_jobs():
+    """Scheduler entry: run whatever retries are due."""
+    try:
+        run_jobs()
+    except Exception:
+        logger.exception("processing ingest jobs failed")
+
+
+def list_jobs(limit: int = 100) -> List[dict]:
+    with _db.engine.connect() as conn:
+        rows = conn.execute(select(_table).order_by(_table.c.next_run_at).limit(limit)).mappings().all()
+    return [dict(r) for r in rows]
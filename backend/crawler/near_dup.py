@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, func, or_, select, update
+
+from config import Settings
+from data import db as _db
+from data.bulk import on_articles_deleted, on_articles_inserted
+from data.models import NewsArticle
+from ai.analysis import analyze
+from .ingest_utils import SIMHASH_VERSION, hamming_distance, simhash_many
+
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+
+
+def parse_fingerprint(value) -> Optional[int]:
+    """Stored simhash (hex string) -> int; None for missing/invalid or empty-text fingerprints."""
+    if value is None or value == "":
+        return None
+    try:
+        fp = int(value, 16) if isinstance(value, str) else int(value)
+    except (TypeError, ValueError):
+        return None
+    # 0 is the fingerprint of an empty text: every empty article would "match" every other
+    if fp <= 0 or fp >> FINGERPRINT_BITS:
+        return None
+    return fp
+
+
+def _band_layout(threshold: int) -> List[Tuple[int, int]]:
+    """Split 64 bits into ``threshold + 1`` contiguous bands as (shift, mask).
+
+    Pigeonhole: two fingerprints within ``threshold`` differing bits agree exactly on at
+    least one band, so looking up each band finds every candidate within the threshold.
+    """
+    n = max(1, min(FINGERPRINT_BITS, threshold + 1))
+    base, extra = divmod(FINGERPRINT_BITS, n)
+    bands = []
+    shift = 0
+    for i in range(n):
+        width = base + (1 if i < extra else 0)
+        bands.append((shift, (1 << width) - 1))
+        shift += width
+    return bands
+
+
+class SimhashIndex:
+    """In-memory banded LSH index over article simhash fingerprints.
+
+    Each fingerprint is stored under its value in every band; a query only compares
+    against articles sharing at least one band, instead of scanning the whole table.
+    Each entry also remembers its duplicate group (the first article of the story).
+    """
+
+    def __init__(self, threshold: Optional[int] = None):
+        self._lock = threading.RLock()
+        self._threshold = -1
+        self._bands: List[Tuple[int, int]] = []
+        self._tables: List[Dict[int, List[int]]] = []
+        self._entries: Dict[int, Tuple[int, int]] = {}  # article id -> (fingerprint, group id)
+        self.loaded = False
+        self.stale = 0  # stored fingerprints of another SIMHASH_VERSION, left out of the index
+        self._reset(Settings().simhash_hamming_threshold if threshold is None else threshold)
+
+    def _reset(self, threshold: int):
+        self._threshold = max(0, int(threshold))
+        self._bands = _band_layout(self._threshold)
+        self._tables = [dict() for _ in self._bands]
+        self._entries = {}
+
+    @property
+    def threshold(self) -> int:
+        return self._threshold
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _keys(self, fp: int):
+        for table, (shift, mask) in zip(self._tables, self._bands):
+            yield table, (fp >> shift) & mask
+
+    def _unlink(self, article_id: int, fp: int):
+        for table, key in self._keys(fp):
+            bucket = table.get(key)
+            if not bucket:
+                continue
+            try:
+                bucket.remove(article_id)
+            except ValueError:
+                pass
+            if not bucket:
+                del table[key]
+
+    def add(self, article_id: int, fingerprint, group_id: Optional[int] = None):
+        fp = parse_fingerprint(fingerprint)
+        if fp is None:
+            return
+        article_id = int(article_id)
+        with self._lock:
+            old = self._entries.get(article_id)
+            if old is not None:
+                self._unlink(article_id, old[0])
+            self._entries[article_id] = (fp, int(group_id) if group_id else article_id)
+            for table, key in self._keys(fp):
+                table.setdefault(key, []).append(article_id)
+
+    def remove(self, article_ids: Iterable[int]):
+        with self._lock:
+            for article_id in article_ids:
+                old = self._entries.pop(int(article_id), None)
+                if old is not None:
+                    self._unlink(int(article_id), old[0])
+
+    def regroup(self, removed_ids: Iterable[int]):
+        """Re-root groups whose root was removed: the oldest (lowest id) member becomes the root.
+
+        Mirrors ``release_group_roots`` so the index keeps matching the stored dedup_group_id.
+        """
+        removed = {int(i) for i in removed_ids}
+        with self._lock:
+            orphans: Dict[int, List[int]] = {}
+            for article_id, (_, group) in self._entries.items():
+                if group in removed and article_id != group:
+                    orphans.setdefault(group, []).append(article_id)
+            for members in orphans.values():
+                root = min(members)
+                for article_id in members:
+                    fp = self._entries[article_id][0]
+                    self._entries[article_id] = (fp, root)
+
+    def query(self, fingerprint, max_distance: Optional[int] = None) -> List[Tuple[int, int, int]]:
+        """Stored articles within ``max_distance`` bits as (article id, distance, group id).
+
+        Sorted by distance, then id. ``max_distance`` is capped at the threshold the bands
+        were laid out for; larger distances are not guaranteed to be found.
+        """
+        fp = parse_fingerprint(fingerprint)
+        if fp is None:
+            return []
+        limit = self._threshold if max_distance is None else min(int(max_distance), self._threshold)
+        seen = set()
+        out = []
+        with self._lock:
+            for table, key in self._keys(fp):
+                for article_id in table.get(key, ()):
+                    if article_id in seen:
+                        continue
+                    seen.add(article_id)
+                    other, group = self._entries[article_id]
+                    dist = hamming_distance(fp, other)
+                    if dist <= limit:
+                        out.append((article_id, dist, group))
+        out.sort(key=lambda r: (r[1], r[0]))
+        return out
+
+    def nearest(self, fingerprint, max_distance: Optional[int] = None) -> Optional[Tuple[int, int, int]]:
+        hits = self.query(fingerprint, max_distance)
+        return hits[0] if hits else None
+
+    def rebuild(self, threshold: Optional[int] = None, batch: int = 5000) -> int:
+        """Reload every current-version fingerprint from news_articles; returns the number indexed.
+
+        Fingerprints of another SIMHASH_VERSION are skipped (they never match current ones)
+        and counted in ``stale``.
+        """
+        if _db.engine is None:
+            raise RuntimeError('DB not initialized')
+        table = NewsArticle.__table__
+        threshold = Settings().simhash_hamming_threshold if threshold is None else threshold
+        with self._lock:
+            self._reset(threshold)
+            last_id = 0
+            with _db.engine.connect() as conn:
+                while True:
+                    rows = conn.execute(
+                        select(table.c.id, table.c.simhash, table.c.dedup_group_id)
+                        .where(table.c.id > last_id, table.c.simhash.isnot(None),
+                               table.c.simhash_version == SIMHASH_VERSION)
+                        .order_by(table.c.id)
+                        .limit(batch)
+                    ).all()
+                    if not rows:
+                        break
+                    for r in rows:
+                        self.add(r.id, r.simhash, r.dedup_group_id)
+                    last_id = rows[-1].id
+                self.stale = conn.execute(
+                    select(func.count()).select_from(table)
+                    .where(table.c.simhash.isnot(None), _stale_version(table))
+                ).scalar() or 0
+            self.loaded = True
+            if self.stale:
+                logger.warning("simhash index skipped %d fingerprints of an old version; "
+                               "run backend/scripts/recompute_simhash.py", self.stale)
+            logger.info("simhash index rebuilt: %d articles, %d bands", len(self._entries), len(self._bands))
+            return len(self._entries)
+
+    def ensure_loaded(self):
+        if self.loaded:
+            return
+        with self._lock:
+            if not self.loaded:
+                self.rebuild()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "articles": len(self._entries),
+                "threshold": self._threshold,
+                "bands": len(self._bands),
+                "buckets": sum(len(t) for t in self._tables),
+                "loaded": self.loaded,
+                "stale": self.stale,
+            }
+
+
+simhash_index = SimhashIndex()
+
+
+def _stale_version(table):
+    return or_(table.c.simhash_version.is_(None), table.c.simhash_version != SIMHASH_VERSION)
+
+
+def release_group_roots(conn, ids: Iterable[int]) -> Dict[int, int]:
+    """Before deleting ``ids``: promote the oldest surviving member of each group they root.
+
+    The promoted article gets ``dedup_group_id = NULL`` and the other survivors point at it.
+    ``conn`` may be a Connection or a Session (the caller commits). Returns {old root: new root}.
+    """
+    removed = {int(i) for i in ids if isinstance(i, int) or str(i).isdigit()}
+    ids = sorted(removed)
+    t = NewsArticle.__table__
+    members: Dict[int, List[int]] = {}
+    for i in range(0, len(ids), 500):
+        rows = conn.execute(
+            select(t.c.id, t.c.dedup_group_id).where(t.c.dedup_group_id.in_(ids[i:i + 500]))
+        ).all()
+        for r in rows:
+            if r.id not in removed:
+                members.setdefault(r.dedup_group_id, []).append(r.id)
+    moved: Dict[int, int] = {}
+    params = []
+    for old_root, group in members.items():
+        new_root = min(group)
+        moved[old_root] = new_root
+        params.extend({"b_id": m, "b_group": None if m == new_root else new_root} for m in group)
+    if params:
+        conn.execute(update(t).where(t.c.id == bindparam("b_id")).values(dedup_group_id=bindparam("b_group")), params)
+    return moved
+
+
+def fingerprint_fields(pairs: Sequence[Tuple[str, str]]) -> List[dict]:
+    """simhash columns for (title, content) pairs, computed as at ingest (enrich_texts)."""
+    fingerprints = simhash_many([analyze(title or "", content or "").counts for title, content in pairs])
+    return [{"simhash": format(fp, "x"), "simhash_version": SIMHASH_VERSION} for fp in fingerprints]
+
+
+def recompute_fingerprints(conn, batch: int = 500, stale_only: bool = True) -> int:
+    """Recompute stored simhash fingerprints with the current algorithm; returns rows updated.
+
+    ``stale_only`` limits it to rows whose ``simhash_version`` is not SIMHASH_VERSION
+    (fingerprints of another version never match current ones). The caller commits.
+    """
+    t = NewsArticle.__table__
+    last_id = 0
+    total = 0
+    while True:
+        stmt = select(t.c.id, t.c.title, t.c.content).where(t.c.id > last_id)
+        if stale_only:
+            stmt = stmt.where(_stale_version(t))
+        rows = conn.execute(stmt.order_by(t.c.id).limit(batch)).all()
+        if not rows:
+            break
+        fields = fingerprint_fields([(r.title, r.content) for r in rows])
+        conn.execute(
+            update(t).where(t.c.id == bindparam("b_id"))
+            .values(simhash=bindparam("b_simhash"), simhash_version=bindparam("b_simhash_version")),
+            [{"b_id": r.id, **{f"b_{k}": v for k, v in f.items()}} for r, f in zip(rows, fields)],
+        )
+        last_id = rows[-1].id
+        total += len(rows)
+    return total
+
+
+def _on_inserted(ids: List[int], rows: List[dict]):
+    with simhash_index._lock:
+        # 未加载时由首次 rebuild 从库中读入，这里无需维护
+        if not simhash_index.loaded:
+            return
+        for article_id, row in zip(ids, rows):
+            if row.get("simhash_version") == SIMHASH_VERSION:
+                simhash_index.add(article_id, row.get("simhash"), row.get("dedup_group_id"))
+
+
+def _on_deleted(ids: List[int], rows: Optional[List[dict]]):
+    with simhash_index._lock:
+        if simhash_index.loaded:
+            simhash_index.remove(ids)
+            # 与删除前 release_group_roots 对库中 dedup_group_id 的调整保持一致
+            simhash_index.regroup(ids)
+
+
+on_articles_inserted(_on_inserted)
+on_articles_deleted(_on_deleted)
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int
+    items_in: int = 0
+    items_out: int = 0
+    errors: int = 0
+    busy_sec: float = 0.0
+    blocked_sec: float = 0.0  # time spent waiting on a full downstream queue (backpressure)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, items_out: int, busy: float, blocked: float, error: bool):
+        with self._lock:
+            self.items_in += 1
+            self.items_out += items_out
+            self.busy_sec += busy
+            self.blocked_sec += blocked
+            self.errors += 1 if error else 0
+
+    def to_dict(self, elapsed: float) -> dict:
+        elapsed = max(elapsed, 1e-9)
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "errors": self.errors,
+            "busy_sec": round(self.busy_sec, 4),
+            "blocked_sec": round(self.blocked_sec, 4),
+            "throughput_per_sec": round(self.items_in / elapsed, 3),
+            "utilization": round(self.busy_sec / (elapsed * self.workers), 3),
+        }
+
+
+class StageTimings:
+    """Wall time, bytes and item counts per named step of one unit of work (one source).
+
+    Several pipeline workers may add to the same instance (enrich batches of one source
+    run in parallel), so updates are locked.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[str, List[float]] = {}  # name -> [seconds, bytes, items]
+
+    def add(self, name: str, seconds: float = 0.0, nbytes: int = 0, items: int = 0):
+        with self._lock:
+            entry = self._data.setdefault(name, [0.0, 0, 0])
+            entry[0] += seconds
+            entry[1] += nbytes
+            entry[2] += items
+
+    def seconds(self, name: str) -> float:
+        with self._lock:
+            return self._data.get(name, [0.0])[0]
+
+    @contextmanager
+    def measure(self, name: str, items: int = 0):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started, items=items)
+
+    def timed_iter(self, name: str, iterable: Iterable, count_bytes: bool = False,
+                   exclude: Union[str, Sequence[str], None] = None) -> Iterator:
+        """Re-yield ``iterable`` charging the time spent producing each item to ``name``.
+
+        ``exclude`` names steps timed further down the same iterator chain (e.g. the
+        download under a streaming parser) whose time is subtracted so it is not counted twice.
+        """
+        excluded = (exclude,) if isinstance(exclude, str) else tuple(exclude or ())
+        it = iter(iterable)
+        while True:
+            started = time.perf_counter()
+            before = sum(self.seconds(n) for n in excluded)
+            try:
+                item = next(it)
+            except StopIteration:
+                item = _DONE
+            spent = time.perf_counter() - started
+            if excluded:
+                spent -= sum(self.seconds(n) for n in excluded) - before
+            if item is _DONE:
+                self.add(name, spent)
+                return
+            self.add(name, spent, len(item) if count_bytes else 0, 0 if count_bytes else 1)
+            yield item
+
+    def to_list(self) -> List[dict]:
+        with self._lock:
+            return [
+                {"stage": name, "duration_ms": round(sec * 1000, 3), "bytes": int(nbytes), "items": int(items)}
+                for name, (sec, nbytes, items) in self._data.items()
+            ]
+
+
+class Stage:
+    """One pipeline step: ``fn(item)`` returns an iterable of items for the next stage."""
+
+    def __init__(self, name: str, fn: Callable[[object], Optional[Iterable]], workers: int = 1):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, int(workers))
+        self.stats = StageStats(name=name, workers=self.workers)
+
+
+class Pipeline:
+    """Run stages on their own worker threads connected by bounded queues.
+
+    Each stage reads from its own queue of ``queue_size`` items. When a downstream
+    queue is full the upstream worker blocks on ``put`` (backpressure) instead of
+    buffering, so a slow stage throttles everything before it. Outputs of the last
+    stage are dropped; stages report results through the objects they pass along.
+    """
+
+    def __init__(self, stages: List[Stage], queue_size: int = 8):
+        if not stages:
+            raise ValueError("pipeline needs at least one stage")
+        self.stages = stages
+        self.queues: List[queue.Queue] = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+        self._lock = threading.Lock()
+        self._finished = [0] * len(stages)
+        self.elapsed = 0.0
+
+    def _worker(self, idx: int):
+        stage = self.stages[idx]
+        inq = self.queues[idx]
+        outq = self.queues[idx + 1] if idx + 1 < len(self.stages) else None
+        while True:
+            item = inq.get()
+            if item is _DONE:
+                break
+            started = time.perf_counter()
+            blocked = 0.0
+            produced = 0
+            error = False
+            try:
+                for out in stage.fn(item) or ():
+                    produced += 1
+                    if outq is not None:
+                        t0 = time.perf_counter()
+                        outq.put(out)
+                        blocked += time.perf_counter() - t0
+            except Exception as e:
+                error = True
+                logger.exception("pipeline stage %s failed: %s", stage.name, e)
+            stage.stats.add(produced, time.perf_counter() - started - blocked, blocked, error)
+        with self._lock:
+            self._finished[idx] += 1
+            last = self._finished[idx] == stage.workers
+        if last and outq is not None:
+            for _ in range(self.stages[idx + 1].workers):
+                outq.put(_DONE)
+
+    def run(self, inputs: Iterable) -> List[dict]:
+        started = time.perf_counter()
+        threads = []
+        for idx, stage in enumerate(self.stages):
+            for n in range(stage.workers):
+                t = threading.Thread(target=self._worker, args=(idx,), name=f"ingest-{stage.name}-{n}", daemon=True)
+                t.start()
+                threads.append(t)
+        try:
+            for item in inputs:
+                self.queues[0].put(item)
+        finally:
+            for _ in range(self.stages[0].workers):
+                self.queues[0].put(_DONE)
+            for t in threads:
+                t.join()
+            self.elapsed = time.perf_counter() - started
+        return self.stats()
+
+    def stats(self) -> List[dict]:
+        return [s.stats.to_dict(self.elapsed) for s in self.stages]
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import urllib.parse
+import urllib.robotparser as robotparser
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+import requests
+from sqlalchemy import delete, select
+
+from config import Settings
+from data import db as _db
+from data.models import RobotsCacheEntry
+
+
+logger = logging.getLogger(__name__)
+
+ROBOTS_USER_AGENT = "hua-news-fetcher/0.1"
+
+# How the parsed robots.txt should be interpreted (mirrors RobotFileParser.read)
+MODE_PARSED = "parsed"
+MODE_ALLOW_ALL = "allow_all"        # 4xx other than 401/403
+MODE_DISALLOW_ALL = "disallow_all"  # 401/403
+MODE_FAILED = "failed"              # network error / 5xx, negatively cached and fail-open
+
+
+@dataclass
+class RobotsEntry:
+    parser: robotparser.RobotFileParser
+    mode: str
+    expires_at: float
+
+
+def _build_parser(mode: str, body: str = "") -> robotparser.RobotFileParser:
+    rp = robotparser.RobotFileParser()
+    if mode == MODE_DISALLOW_ALL:
+        rp.disallow_all = True
+    elif mode == MODE_PARSED:
+        rp.parse(body.splitlines())
+    else:
+        rp.allow_all = True
+    rp.modified()
+    return rp
+
+
+class RobotsCache:
+    """Process-wide robots.txt cache shared by every Fetcher.
+
+    Entries live in memory with a TTL and are persisted to the ``robots_cache`` table so a
+    restart does not re-download them. Loading is single-flight per domain: concurrent
+    callers for the same host wait for the first download instead of issuing their own.
+    Hosts whose robots.txt cannot be fetched are cached as allow-all for a shorter TTL.
+    """
+
+    def __init__(self, settings: Optional[Settings] = None):
+        self.settings = settings or Settings()
+        self._lock = threading.Lock()
+        self._entries: Dict[str, RobotsEntry] = {}
+        self._inflight: Dict[str, threading.Event] = {}
+
+    def get(self, url: str) -> robotparser.RobotFileParser:
+        parts = urllib.parse.urlparse(url)
+        domain = parts.netloc.lower()
+        scheme = parts.scheme or "https"
+        with self._lock:
+            entry = self._entries.get(domain)
+            if entry and entry.expires_at > time.time():
+                return entry.parser
+            event = self._inflight.get(domain)
+            leader = event is None
+            if leader:
+                event = threading.Event()
+                self._inflight[domain] = event
+        if not leader:
+            event.wait(self.settings.fetch_timeout_sec + 1)
+            with self._lock:
+                entry = self._entries.get(domain)
+            return entry.parser if entry else _build_parser(MODE_FAILED)
+        try:
+            entry = self._load_persisted(domain) or self._download(domain, scheme)
+            with self._lock:
+                self._entries[domain] = entry
+            return entry.parser
+        finally:
+            with self._lock:
+                self._inflight.pop(domain, None)
+            event.set()
+
+    def invalidate(self, domain: Optional[str] = None):
+        with self._lock:
+            if domain is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(domain.lower(), None)
+
+    def _download(self, domain: str, scheme: str) -> RobotsEntry:
+        robots_url = f"{scheme}://{domain}/robots.txt"
+        body = ""
+        error = None
+        try:
+            resp = requests.get(
+                robots_url,
+                headers={"User-Agent": ROBOTS_USER_AGENT},
+                timeout=self.settings.fetch_timeout_sec,
+            )
+            if resp.status_code in (401, 403):
+                mode = MODE_DISALLOW_ALL
+            elif 400 <= resp.status_code < 500:
+                mode = MODE_ALLOW_ALL
+            elif resp.status_code >= 500:
+                mode = MODE_FAILED
+                error = f"HTTP {resp.status_code}"
+            else:
+                mode = MODE_PARSED
+                body = resp.text
+        except Exception as e:
+            # Fail-open if robots unavailable
+            mode = MODE_FAILED
+            error = str(e)
+        ttl = self.settings.robots_negative_ttl_sec if mode == MODE_FAILED else self.settings.robots_cache_ttl_sec
+        entry = RobotsEntry(parser=_build_parser(mode, body), mode=mode, expires_at=time.time() + ttl)
+        self._persist(domain, mode, body, entry.expires_at, error)
+        return entry
+
+    def _load_persisted(self, domain: str) -> Optional[RobotsEntry]:
+        if _db.engine is None:
+            return None
+        table = RobotsCacheEntry.__table__
+        try:
+            with _db.engine.connect() as conn:
+                row = conn.execute(select(table).where(table.c.domain == domain)).mappings().first()
+        except Exception as e:
+            logger.debug("robots cache read failed for %s: %s", domain, e)
+            return None
+        if not row or not row["expires_at"]:
+            return None
+        expires_at = row["expires_at"].timestamp() if isinstance(row["expires_at"], datetime) else float(row["expires_at"])
+        if expires_at <= time.time():
+            return None
+        mode = row["mode"] or MODE_FAILED
+        return RobotsEntry(parser=_build_parser(mode, row["body"] or ""), mode=mode, expires_at=expires_at)
+
+    def _persist(self, domain: str, mode: str, body: str, expires_at: float, error: Optional[str]):
+        if _db.engine is None:
+            return
+        table = RobotsCacheEntry.__table__
+        try:
+            with _db.engine.begin() as conn:
+                conn.execute(delete(table).where(table.c.domain == domain))
+                conn.execute(table.insert().values(
+                    domain=domain,
+                    mode=mode,
+                    body=body,
+                    error_message=error,
+                    fetched_at=datetime.fromtimestamp(time.time()),
+                    expires_at=datetime.fromtimestamp(expires_at),
+                ))
+        except Exception as e:
+            logger.debug("robots cache write failed for %s: %s", domain, e)
+
+
+robots_cache = RobotsCache()
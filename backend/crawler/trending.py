@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import heapq
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import select
+
+from config import Settings
+from data import db as _db
+from data.bulk import on_articles_deleted, on_articles_inserted
+from data.models import NewsArticle
+from data.rollups import split_keywords
+
+
+logger = logging.getLogger(__name__)
+
+WINDOWS = {"hour": 60, "day": 24 * 60}
+
+
+class SpaceSaving:
+    """Space-Saving heavy hitters: at most ``capacity`` counters, counts never underestimate.
+
+    A new key evicts the current minimum and inherits its count (kept as the error bound).
+    The minimum is found through a lazy heap of (count, key) entries.
+    """
+
+    __slots__ = ("capacity", "counts", "errors", "_heap")
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self.counts: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self._heap: List[tuple] = []
+
+    def add(self, key: str, n: int = 1):
+        counts = self.counts
+        if key in counts:
+            counts[key] += n
+        elif len(counts) < self.capacity:
+            counts[key] = n
+            self.errors[key] = 0
+        else:
+            while True:
+                c, k = heapq.heappop(self._heap)
+                if counts.get(k) == c:
+                    break
+            del counts[k]
+            del self.errors[k]
+            counts[key] = c + n
+            self.errors[key] = c
+        heapq.heappush(self._heap, (counts[key], key))
+        # 堆中过期条目过多时重建
+        if len(self._heap) > 4 * self.capacity + 64:
+            self._heap = [(c, k) for k, c in counts.items()]
+            heapq.heapify(self._heap)
+
+    def clear(self):
+        self.counts.clear()
+        self.errors.clear()
+        self._heap.clear()
+
+
+class TrendingDetector:
+    """Keywords whose recent frequency is unusually high compared with the preceding baseline.
+
+    Time is split into buckets of ``bucket_minutes``; each bucket holds a count-min sketch
+    (one slice of a ``buckets x depth x width`` array) and a Space-Saving summary. Buckets form
+    a ring covering the baseline plus the longest window, so memory does not grow with the
+    corpus. A query merges the Space-Saving candidates of the window buckets and estimates
+    each candidate's window and baseline counts from the sketches.
+    """
+
+    def __init__(self, bucket_minutes: int = 15, baseline_hours: int = 72, width: int = 1024,
+                 depth: int = 4, capacity: int = 200, min_count: int = 3):
+        self._lock = threading.RLock()
+        self.bucket_minutes = max(1, int(bucket_minutes))
+        self.baseline_buckets = max(1, math.ceil(baseline_hours * 60 / self.bucket_minutes))
+        self.max_window_buckets = math.ceil(max(WINDOWS.values()) / self.bucket_minutes)
+        self.n_buckets = self.baseline_buckets + self.max_window_buckets
+        self.width = max(16, int(width))
+        self.depth = max(1, int(depth))
+        self.capacity = capacity
+        self.min_count = max(1, int(min_count))
+        self._seeds = [0x9E3779B1 * (i + 1) for i in range(self.depth)]
+        self._rows = np.arange(self.depth)
+        self._counts = np.zeros((self.n_buckets, self.depth, self.width), dtype=np.int32)
+        self._bucket_ids = np.full(self.n_buckets, -1, dtype=np.int64)
+        self._topk = [SpaceSaving(capacity) for _ in range(self.n_buckets)]
+        self._first_bucket: Optional[int] = None  # 最早有数据覆盖的桶，用于基线尚未积累满时按实际时长折算
+        self.loaded = False
+
+    @classmethod
+    def from_settings(cls, settings: Settings | None = None) -> "TrendingDetector":
+        s = settings or Settings()
+        return cls(s.trending_bucket_minutes, s.trending_baseline_hours, s.trending_sketch_width,
+                   s.trending_sketch_depth, s.trending_topk_capacity, s.trending_min_count)
+
+    def _bucket_of(self, ts: float) -> int:
+        return int(ts // (self.bucket_minutes * 60))
+
+    def _cols(self, key: str) -> List[int]:
+        return [hash((seed, key)) % self.width for seed in self._seeds]
+
+    def _slot(self, bucket: int, now_bucket: int) -> Optional[int]:
+        if bucket <= now_bucket - self.n_buckets:
+            return None
+        slot = bucket % self.n_buckets
+        current = int(self._bucket_ids[slot])
+        if current != bucket:
+            if current > bucket:
+                return None
+            # 槽位被新的时间桶复用：清空旧计数
+            self._counts[slot] = 0
+            self._topk[slot].clear()
+            self._bucket_ids[slot] = bucket
+        return slot
+
+    def add(self, keywords: Iterable[str], at: datetime | float | None = None, now: float | None = None):
+        now = time.time() if now is None else now
+        if isinstance(at, datetime):
+            ts = (at if at.tzinfo else at.replace(tzinfo=timezone.utc)).timestamp()
+        else:
+            ts = now if at is None else float(at)
+        now_bucket = self._bucket_of(now)
+        # 未来时间按当前桶计
+        bucket = min(self._bucket_of(ts), now_bucket)
+        with self._lock:
+            slot = self._slot(bucket, now_bucket)
+            if slot is None:
+                return
+            if self._first_bucket is None or bucket < self._first_bucket:
+                self._first_bucket = bucket
+            sketch, topk = self._counts[slot], self._topk[slot]
+            for kw in keywords:
+                sketch[self._rows, self._cols(kw)] += 1
+                topk.add(kw)
+
+    def _slots_in(self, lo: int, hi: int) -> List[int]:
+        ids = self._bucket_ids
+        return [int(s) for s in np.nonzero((ids >= lo) & (ids <= hi))[0]]
+
+    def _estimate(self, slots: List[int], cols: np.ndarray) -> np.ndarray:
+        if not slots or not len(cols):
+            return np.zeros(len(cols), dtype=np.int64)
+        # (buckets, keys, depth) -> 各桶求和后取各行最小值
+        vals = self._counts[slots][:, self._rows[None, :], cols]
+        return vals.sum(axis=0, dtype=np.int64).min(axis=1)
+
+    def query(self, window: str = "hour", limit: int = 10, now: float | None = None,
+              min_count: Optional[int] = None) -> List[dict]:
+        """Top ``limit`` trending keywords for ``window`` (hour | day), highest lift first.
+
+        ``lift = (count + 1) / (expected + 1)``, where ``expected`` is the keyword's baseline
+        count scaled to the window length.
+        """
+        window_buckets = math.ceil(WINDOWS[window] / self.bucket_minutes)
+        now_bucket = self._bucket_of(time.time() if now is None else now)
+        min_count = self.min_count if min_count is None else min_count
+        win_lo = now_bucket - window_buckets + 1
+        base_hi = win_lo - 1
+        base_lo = base_hi - self.baseline_buckets + 1
+        with self._lock:
+            win_slots = self._slots_in(win_lo, now_bucket)
+            base_slots = self._slots_in(base_lo, base_hi)
+            merged: Counter = Counter()
+            for slot in win_slots:
+                merged.update(self._topk[slot].counts)
+            candidates = [k for k, _ in merged.most_common(max(100, 10 * limit))]
+            if not candidates:
+                return []
+            cols = np.array([self._cols(k) for k in candidates], dtype=np.int64)
+            win_est = self._estimate(win_slots, cols)
+            base_est = self._estimate(base_slots, cols)
+            first = self._first_bucket if self._first_bucket is not None else win_lo
+        elapsed = max(0, min(self.baseline_buckets, base_hi - max(base_lo, first) + 1))
+        scale = window_buckets / elapsed if elapsed else 0.0
+        out = []
+        for key, ss_count, w, b in zip(candidates, (merged[k] for k in candidates), win_est, base_est):
+            # Space-Saving 与 sketch 都只会高估，取较小者
+            count = int(min(ss_count, w))
+            if count < min_count:
+                continue
+            expected = float(b) * scale
+            out.append({
+                "keyword": key,
+                "count": count,
+                "expected": round(expected, 2),
+                "lift": round((count + 1) / (expected + 1), 2),
+            })
+        out.sort(key=lambda x: (-x["lift"], -x["count"], x["keyword"]))
+        return out[:limit]
+
+    def rebuild(self, batch: int = 2000, now: float | None = None) -> int:
+        """Reload keywords of articles created within the ring span from news_articles."""
+        if _db.engine is None:
+            raise RuntimeError("DB not initialized")
+        now = time.time() if now is None else now
+        span_start = (self._bucket_of(now) - self.n_buckets + 1) * self.bucket_minutes * 60
+        since = datetime.fromtimestamp(span_start, timezone.utc).replace(tzinfo=None)
+        t = NewsArticle.__table__
+        added = 0
+        with self._lock:
+            self._counts[:] = 0
+            self._bucket_ids[:] = -1
+            for ss in self._topk:
+                ss.clear()
+            self._first_bucket = None
+            last = (since - timedelta(microseconds=1), 0)
+            with _db.engine.connect() as conn:
+                while True:
+                    rows = conn.execute(
+                        select(t.c.id, t.c.created_at, t.c.keywords)
+                        .where(t.c.created_at >= since)
+                        .where((t.c.created_at > last[0]) | ((t.c.created_at == last[0]) & (t.c.id > last[1])))
+                        .order_by(t.c.created_at, t.c.id).limit(batch)
+                    ).all()
+                    if not rows:
+                        break
+                    for r in rows:
+                        self.add(split_keywords(r.keywords), r.created_at, now=now)
+                    added += len(rows)
+                    last = (rows[-1].created_at, rows[-1].id)
+            # 库里的历史覆盖整个环形窗口
+            self._first_bucket = self._bucket_of(span_start)
+            self.loaded = True
+        logger.info("trending detector rebuilt from %d articles", added)
+        return added
+
+    def invalidate(self):
+        """Drop the in-memory state; the next ``ensure_loaded`` rebuilds it from news_articles.
+
+        Used when articles are deleted or their keywords rewritten: the sketches cannot
+        subtract counts they no longer know the source of.
+        """
+        with self._lock:
+            self.loaded = False
+
+    def ensure_loaded(self):
+        if self.loaded:
+            return
+        with self._lock:
+            if not self.loaded:
+                self.rebuild()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "buckets": self.n_buckets,
+                "bucket_minutes": self.bucket_minutes,
+                "sketch_bytes": int(self._counts.nbytes),
+                "loaded": self.loaded,
+            }
+
+
+trending_detector = TrendingDetector.from_settings()
+
+
+def _on_inserted(ids: List[int], rows: List[dict]):
+    with trending_detector._lock:
+        # 未加载时由首次 rebuild 从库中读入
+        if not trending_detector.loaded:
+            return
+        for row in rows:
+            trending_detector.add(split_keywords(row.get("keywords")), row.get("created_at"))
+
+
+def _on_deleted(ids: List[int], rows: Optional[List[dict]]):
+    trending_detector.invalidate()
+
+
+on_articles_inserted(_on_inserted)
+on_articles_deleted(_on_deleted)
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Sequence
+
+from sqlalchemy import insert
+
+from config import Settings
+from . import db as _db
+from . import rollups
+from .models import NewsArticle, article_search_fields
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+# 写入/删除后的回调（内存索引等），在事务提交之后调用
+_insert_listeners: List[Callable[[List[int], List[dict]], None]] = []
+_delete_listeners: List[Callable[[List[int], Optional[List[dict]]], None]] = []
+
+
+def on_articles_inserted(fn: Callable[[List[int], List[dict]], None]):
+    """Register ``fn(ids, rows)`` to run after news_articles rows are committed."""
+    if fn not in _insert_listeners:
+        _insert_listeners.append(fn)
+    return fn
+
+
+def on_articles_deleted(fn: Callable[[List[int], Optional[List[dict]]], None]):
+    """Register ``fn(ids, rows)`` to run after news_articles rows are deleted.
+
+    ``rows`` are the deleted rows (id, created_at, category, source_name, status) as read
+    before the DELETE (see rollups.remove_articles), or None when the caller did not have them.
+    """
+    if fn not in _delete_listeners:
+        _delete_listeners.append(fn)
+    return fn
+
+
+def notify_articles_inserted(ids: Sequence[int], rows: Sequence[dict]):
+    for fn in list(_insert_listeners):
+        try:
+            fn(list(ids), list(rows))
+        except Exception:
+            logger.exception("article insert listener %r failed", fn)
+
+
+def notify_articles_deleted(ids: Sequence[int], rows: Optional[Sequence[dict]] = None):
+    ids = [int(i) for i in ids]
+    if not ids:
+        return
+    rows = list(rows) if rows is not None else None
+    for fn in list(_delete_listeners):
+        try:
+            fn(ids, rows)
+        except Exception:
+            logger.exception("article delete listener %r failed", fn)
+
+
+class BulkInsertError(Exception):
+    """A chunk of a bulk insert failed; ``ids`` are the rows committed by earlier chunks.
+
+    The committed ids are the first ``len(ids)`` input rows, in order.
+    """
+
+    def __init__(self, ids: List[int], cause: Exception):
+        super().__init__(f"{cause} (committed {len(ids)} rows before the failure)")
+        self.ids = ids
+        self.cause = cause
+
+
+def _chunks(rows: Sequence[dict], size: int) -> Iterable[Sequence[dict]]:
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+
+def _normalize_article_row(row: dict, now: datetime) -> dict:
+    """Keep only mapped columns and fill the defaults the ORM would otherwise apply."""
+    cols = NewsArticle.__table__.c
+    out = {k: v for k, v in row.items() if k in cols and k != 'id'}
+    out.setdefault('created_at', now)
+    out.setdefault('updated_at', now)
+    out.setdefault('status', 'active')
+    out.setdefault('importance_score', 0.0)
+    if 'snippet' not in out:
+        out.update(article_search_fields(out.get('title'), out.get('content')))
+    return out
+
+
+def bulk_insert_articles(rows: Sequence[dict], chunk_size: Optional[int] = None) -> List[int]:
+    """Insert news_articles rows in chunks via Core executemany and return the new ids.
+
+    Each chunk is committed in its own transaction so a very large import does not hold
+    the SQLite write lock for the whole run; the analytics rollups are updated in the same
+    transaction. Ids are returned in the same order as ``rows``.
+    Insert listeners are notified after each committed chunk. If a chunk fails,
+    BulkInsertError reports the ids already committed by the earlier chunks.
+    """
+    if not rows:
+        return []
+    if _db.engine is None:
+        raise RuntimeError('DB not initialized')
+    chunk_size = max(1, int(chunk_size or Settings().bulk_insert_chunk_size or DEFAULT_CHUNK_SIZE))
+
+    table = NewsArticle.__table__
+    now = datetime.utcnow()
+    values = [_normalize_article_row(r, now) for r in rows]
+    # executemany needs a uniform key set across the batch
+    keys = set().union(*values)
+    values = [{k: v.get(k) for k in keys} for v in values]
+    ids: List[int] = []
+    returning = bool(getattr(_db.engine.dialect, 'insert_executemany_returning', False))
+
+    for chunk in _chunks(values, chunk_size):
+        chunk_ids: List[int] = []
+        try:
+            with _db.engine.begin() as conn:
+                if returning:
+                    stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+                    chunk_ids.extend(r[0] for r in conn.execute(stmt, list(chunk)))
+                else:
+                    # Drivers without executemany RETURNING: fall back to per-row primary keys
+                    for v in chunk:
+                        res = conn.execute(insert(table).values(**v))
+                        chunk_ids.append(int(res.inserted_primary_key[0]))
+                rollups.add_articles(conn, chunk, chunk_ids)
+        except Exception as e:
+            # 之前的分块已提交，调用方需要知道哪些行已写入
+            raise BulkInsertError(ids, e) from e
+        ids.extend(chunk_ids)
+        notify_articles_inserted(chunk_ids, chunk)
+    return ids
@@ -1,12 +1,73 @@
-from sqlalchemy import create_engine
+import logging
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, scoped_session
 from contextlib import contextmanager
-from sqlalchemy import text
 
 
+logger = logging.getLogger(__name__)
+
 engine = None
 SessionLocal = None
 
+# SQLite 连接配置档：每个新连接建立时执行的 PRAGMA（按顺序执行，busy_timeout 放最前以便切换 WAL 时也能等锁）
+# - default：SQLite 默认（回滚日志 + synchronous=FULL）。journal_mode 保存在数据库文件中，
+#   这里显式切回 DELETE，已是 WAL 的库改用该配置档时也会恢复为回滚日志
+# - balanced：WAL + synchronous=NORMAL，读写互不阻塞；断电最多丢失最后几个事务，不会损坏数据库
+# - durable：WAL + synchronous=FULL，每次提交都 fsync
+# - fast：WAL + synchronous=OFF，更大的缓存与 mmap，适合可重建的数据（批量导入、离线重处理）
+SQLITE_PROFILES = {
+    'default': {'busy_timeout': 30000, 'journal_mode': 'DELETE', 'synchronous': 'FULL'},
+    'balanced': {
+        'busy_timeout': 30000,
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -65536,         # 负数单位为 KiB，即 64 MiB
+        'temp_store': 'MEMORY',
+        'mmap_size': 268435456,       # 256 MiB
+    },
+    'durable': {
+        'busy_timeout': 30000,
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -16384,
+        'temp_store': 'MEMORY',
+    },
+    'fast': {
+        'busy_timeout': 30000,
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size': -262144,
+        'temp_store': 'MEMORY',
+        'mmap_size': 1073741824,
+    },
+}
+DEFAULT_SQLITE_PROFILE = 'balanced'
+
+
+def sqlite_pragmas(profile: str | None) -> dict:
+    """PRAGMAs of a named profile; unknown names fall back to the default profile."""
+    name = (profile or DEFAULT_SQLITE_PROFILE).strip().lower()
+    if name not in SQLITE_PROFILES:
+        logger.warning("unknown SQLite profile %r, using %r", profile, DEFAULT_SQLITE_PROFILE)
+        name = DEFAULT_SQLITE_PROFILE
+    return SQLITE_PROFILES[name]
+
+
+def _install_sqlite_pragmas(eng, pragmas: dict):
+    @event.listens_for(eng, 'connect')
+    def _on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        try:
+            for key, value in pragmas.items():
+                try:
+                    cur.execute(f"PRAGMA {key}={value}")
+                except Exception as e:
+                    # 个别 PRAGMA 不可用（如只读文件无法切换 WAL）时继续使用其余配置
+                    logger.warning("PRAGMA %s=%s failed: %s", key, value, e)
+        finally:
+            cur.close()
+
 
 class Base(DeclarativeBase):
     pass
@@ -32,6 +93,8 @@ def init_db(database_url: str, settings=None):
             "check_same_thread": False,  # 允许多线程
         } if "sqlite" in database_url else {}
     )
+    if engine.dialect.name == 'sqlite':
+        _install_sqlite_pragmas(engine, sqlite_pragmas(getattr(settings, 'sqlite_profile', None)))
     
     SessionLocal = scoped_session(
         sessionmaker(
@@ -70,28 +133,3 @@ def close_db():
         SessionLocal.remove()
     if engine:
         engine.dispose()
-
-
-def ensure_columns_for_enrich():
-    """确保数据库表有摘要和关键词列"""
-    try:
-        with engine.connect() as conn:
-            # 检查并添加summary列
-            try:
-                conn.execute(text("ALTER TABLE news_articles ADD COLUMN summary TEXT"))
-                print("Added summary column to news_articles")
-            except Exception:
-                pass  # 列已存在
-            
-            # 检查并添加keywords列
-            try:
-                conn.execute(text("ALTER TABLE news_articles ADD COLUMN keywords TEXT"))
-                print("Added keywords column to news_articles")
-            except Exception:
-                pass  # 列已存在
-                
-            conn.commit()
-    except Exception as e:
-        print(f"Error ensuring enrich columns: {e}")
-
-
@@ -0,0 +1,401 @@
+"""
+知识库列表筛选用的内存位图索引
+
+按分类、来源、状态、创建日（UTC）各维护一组文章 id 位图，写入/删除时通过
+data.bulk 的监听器增量维护，启动时从库中重建。筛选即位图求交（日期范围先求并），
+计数和取页都不需要扫描 news_articles。
+
+位图按 id 高 16 位分块（类似 Roaring）：稀疏块存为有序 uint16 数组，
+稠密块存为 Python int 位集，求交/求并逐块进行。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from array import array
+from bisect import bisect_left, insort
+from datetime import date, datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import select
+
+from . import db as _db
+from .bulk import on_articles_deleted, on_articles_inserted
+from .models import NewsArticle
+
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_BITS = 16
+_LOW_MASK = (1 << _CHUNK_BITS) - 1
+# 数组块超过该基数转为位集；位集低于一半时转回数组（留出回差避免来回转换）
+_ARRAY_MAX = 4096
+
+
+def _array_to_bits(values: Iterable[int]) -> int:
+    buf = bytearray(1 << (_CHUNK_BITS - 3))
+    for v in values:
+        buf[v >> 3] |= 1 << (v & 7)
+    return int.from_bytes(buf, 'little')
+
+
+def _bits_to_array(bits: int) -> array:
+    out = array('H')
+    while bits:
+        low = bits & -bits
+        out.append(low.bit_length() - 1)
+        bits ^= low
+    return out
+
+
+def _iter_bits_desc(bits: int) -> Iterator[int]:
+    while bits:
+        top = bits.bit_length() - 1
+        yield top
+        bits ^= 1 << top
+
+
+def _compact(container):
+    """Normalize a container: None if empty, array if sparse, int bitset if dense."""
+    if isinstance(container, int):
+        n = container.bit_count()
+        if n == 0:
+            return None
+        return _bits_to_array(container) if n <= _ARRAY_MAX // 2 else container
+    if not container:
+        return None
+    return _array_to_bits(container) if len(container) > _ARRAY_MAX else container
+
+
+def _and(a, b):
+    if isinstance(a, int) and isinstance(b, int):
+        return _compact(a & b)
+    if isinstance(a, int):
+        a, b = b, a
+    if isinstance(b, int):
+        return _compact(array('H', (v for v in a if (b >> v) & 1)))
+    if len(a) > len(b):
+        a, b = b, a
+    other = set(b)
+    return _compact(array('H', (v for v in a if v in other)))
+
+
+def _or(a, b):
+    if isinstance(a, int) or isinstance(b, int) or len(a) + len(b) > _ARRAY_MAX:
+        a = a if isinstance(a, int) else _array_to_bits(a)
+        b = b if isinstance(b, int) else _array_to_bits(b)
+        return _compact(a | b)
+    return array('H', sorted(set(a).union(b)))
+
+
+def _card(container) -> int:
+    return container.bit_count() if isinstance(container, int) else len(container)
+
+
+class Bitmap:
+    """Compressed set of non-negative integer ids."""
+
+    __slots__ = ('_chunks',)
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self._chunks: Dict[int, object] = {}
+        for i in ids:
+            self.add(i)
+
+    def add(self, value: int):
+        key, low = value >> _CHUNK_BITS, value & _LOW_MASK
+        c = self._chunks.get(key)
+        if c is None:
+            self._chunks[key] = array('H', (low,))
+        elif isinstance(c, int):
+            self._chunks[key] = c | (1 << low)
+        else:
+            # 新 id 基本递增，直接追加到末尾
+            if not c or c[-1] < low:
+                c.append(low)
+            else:
+                pos = bisect_left(c, low)
+                if pos < len(c) and c[pos] == low:
+                    return
+                insort(c, low)
+            if len(c) > _ARRAY_MAX:
+                self._chunks[key] = _array_to_bits(c)
+
+    def discard(self, value: int):
+        key, low = value >> _CHUNK_BITS, value & _LOW_MASK
+        c = self._chunks.get(key)
+        if c is None:
+            return
+        if isinstance(c, int):
+            c &= ~(1 << low)
+        else:
+            pos = bisect_left(c, low)
+            if pos < len(c) and c[pos] == low:
+                del c[pos]
+        c = _compact(c)
+        if c is None:
+            del self._chunks[key]
+        else:
+            self._chunks[key] = c
+
+    def __contains__(self, value: int) -> bool:
+        c = self._chunks.get(value >> _CHUNK_BITS)
+        if c is None:
+            return False
+        low = value & _LOW_MASK
+        if isinstance(c, int):
+            return bool((c >> low) & 1)
+        pos = bisect_left(c, low)
+        return pos < len(c) and c[pos] == low
+
+    def __len__(self) -> int:
+        return sum(_card(c) for c in self._chunks.values())
+
+    def __bool__(self) -> bool:
+        return bool(self._chunks)
+
+    def copy(self) -> 'Bitmap':
+        out = Bitmap()
+        out._chunks = {k: (c if isinstance(c, int) else array('H', c)) for k, c in self._chunks.items()}
+        return out
+
+    def __and__(self, other: 'Bitmap') -> 'Bitmap':
+        out = Bitmap()
+        small, big = (self, other) if len(self._chunks) <= len(other._chunks) else (other, self)
+        for key, c in small._chunks.items():
+            d = big._chunks.get(key)
+            if d is not None:
+                r = _and(c, d)
+                if r is not None:
+                    out._chunks[key] = r
+        return out
+
+    def __or__(self, other: 'Bitmap') -> 'Bitmap':
+        return union_all((self, other))
+
+    def iter_desc(self, below: Optional[int] = None) -> Iterator[int]:
+        """Ids in descending order, optionally only those < ``below``."""
+        for key in sorted(self._chunks, reverse=True):
+            base = key << _CHUNK_BITS
+            if below is not None and base >= below:
+                continue
+            c = self._chunks[key]
+            if isinstance(c, int):
+                if below is not None and below - base <= _LOW_MASK:
+                    c &= (1 << (below - base)) - 1
+                values = _iter_bits_desc(c)
+            else:
+                end = len(c) if below is None or below - base > _LOW_MASK else bisect_left(c, below - base)
+                values = (c[i] for i in range(end - 1, -1, -1))
+            for low in values:
+                yield base | low
+
+    def nbytes(self) -> int:
+        """Approximate payload size (containers only)."""
+        return sum((c.bit_length() + 7) // 8 if isinstance(c, int) else c.itemsize * len(c)
+                   for c in self._chunks.values())
+
+
+def union_all(bitmaps: Iterable[Bitmap]) -> Bitmap:
+    """Union of many bitmaps, merged chunk by chunk (no intermediate copies)."""
+    out = Bitmap()
+    chunks = out._chunks
+    for b in bitmaps:
+        for key, d in b._chunks.items():
+            c = chunks.get(key)
+            chunks[key] = (d if isinstance(d, int) else array('H', d)) if c is None else _or(c, d)
+    return out
+
+
+def _day_of(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).date()
+        except ValueError:
+            return None
+    return None
+
+
+class ArticleFilterIndex:
+    """Bitmaps of article ids per category, source, status and created day (UTC)."""
+
+    DIMENSIONS = ('category', 'source_name', 'status')
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._all = Bitmap()
+        self._by: Dict[str, Dict[object, Bitmap]] = {d: {} for d in self.DIMENSIONS}
+        self._by_day: Dict[date, Bitmap] = {}
+        self.loaded = False
+
+    def _reset(self):
+        self._all = Bitmap()
+        self._by = {d: {} for d in self.DIMENSIONS}
+        self._by_day = {}
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def add(self, article_id: int, category=None, source_name=None, status=None, created_at=None):
+        article_id = int(article_id)
+        values = {'category': category, 'source_name': source_name, 'status': status or 'active'}
+        with self._lock:
+            if article_id in self._all:
+                self._remove_one(article_id)
+            self._all.add(article_id)
+            for dim, value in values.items():
+                # 空值也建索引（key 为 None），便于筛选“未分类”
+                self._by[dim].setdefault(value or None, Bitmap()).add(article_id)
+            day = _day_of(created_at)
+            if day is not None:
+                self._by_day.setdefault(day, Bitmap()).add(article_id)
+
+    @staticmethod
+    def _discard_scan(groups: Dict[object, Bitmap], article_id: int):
+        empty = []
+        for key, bm in groups.items():
+            if article_id in bm:
+                bm.discard(article_id)
+                if not bm:
+                    empty.append(key)
+        for key in empty:
+            del groups[key]
+
+    @staticmethod
+    def _discard_at(groups: Dict[object, Bitmap], key, article_id: int):
+        """Discard from the bitmap under ``key``; scan the dimension if the id is not there."""
+        bm = groups.get(key)
+        if bm is None or article_id not in bm:
+            ArticleFilterIndex._discard_scan(groups, article_id)
+            return
+        bm.discard(article_id)
+        if not bm:
+            del groups[key]
+
+    def _remove_one(self, article_id: int, row: Optional[dict] = None):
+        """Remove an id; with its stored ``row`` only the bitmaps of its values are touched."""
+        self._all.discard(article_id)
+        if row is None:
+            for groups in (*self._by.values(), self._by_day):
+                self._discard_scan(groups, article_id)
+            return
+        for dim in self.DIMENSIONS:
+            value = row.get(dim) or ('active' if dim == 'status' else None)
+            self._discard_at(self._by[dim], value, article_id)
+        day = _day_of(row.get('created_at'))
+        if day is None:
+            self._discard_scan(self._by_day, article_id)
+        else:
+            self._discard_at(self._by_day, day, article_id)
+
+    def remove(self, article_ids: Iterable[int], rows: Optional[Iterable[dict]] = None):
+        """Remove ids; ``rows`` (id, category, source_name, status, created_at as stored)
+        avoid scanning every bitmap for each id."""
+        by_id = {int(r['id']): r for r in rows or () if r.get('id') is not None}
+        with self._lock:
+            for article_id in article_ids:
+                article_id = int(article_id)
+                if article_id in self._all:
+                    self._remove_one(article_id, by_id.get(article_id))
+
+    def match(self, category: Optional[str] = None, source_name: Optional[str] = None,
+              status: Optional[str] = None, date_from: Optional[date] = None,
+              date_to: Optional[date] = None) -> Bitmap:
+        """Ids matching every given filter (None = no filter); ``date_to`` is inclusive."""
+        with self._lock:
+            parts: List[Bitmap] = []
+            for dim, value in (('category', category), ('source_name', source_name), ('status', status)):
+                if value is not None:
+                    parts.append(self._by[dim].get(value or None) or Bitmap())
+            if date_from is not None or date_to is not None:
+                parts.append(union_all(
+                    bm for day, bm in self._by_day.items()
+                    if (date_from is None or day >= date_from) and (date_to is None or day <= date_to)
+                ))
+            if not parts:
+                return self._all.copy()
+            # 先交最小的位图
+            parts.sort(key=len)
+            result = parts[0].copy()
+            for bm in parts[1:]:
+                if not result:
+                    break
+                result = result & bm
+            return result
+
+    def facets(self, dim: str, within: Optional[Bitmap] = None) -> Dict[object, int]:
+        """Article count per value of ``dim`` (optionally within a filtered set)."""
+        with self._lock:
+            return {
+                key: len(bm if within is None else bm & within)
+                for key, bm in self._by[dim].items()
+            }
+
+    def rebuild(self, batch: int = 5000) -> int:
+        if _db.engine is None:
+            raise RuntimeError('DB not initialized')
+        t = NewsArticle.__table__
+        with self._lock:
+            self._reset()
+            last_id = 0
+            with _db.engine.connect() as conn:
+                while True:
+                    rows = conn.execute(
+                        select(t.c.id, t.c.category, t.c.source_name, t.c.status, t.c.created_at)
+                        .where(t.c.id > last_id).order_by(t.c.id).limit(batch)
+                    ).all()
+                    if not rows:
+                        break
+                    for r in rows:
+                        self.add(r.id, r.category, r.source_name, r.status, r.created_at)
+                    last_id = rows[-1].id
+            self.loaded = True
+            logger.info("filter index rebuilt: %d articles, %d days", len(self._all), len(self._by_day))
+            return len(self._all)
+
+    def ensure_loaded(self):
+        if self.loaded:
+            return
+        with self._lock:
+            if not self.loaded:
+                self.rebuild()
+
+    def stats(self) -> dict:
+        with self._lock:
+            bitmaps = [self._all, *self._by_day.values(), *(b for g in self._by.values() for b in g.values())]
+            return {
+                'articles': len(self._all),
+                'categories': len(self._by['category']),
+                'sources': len(self._by['source_name']),
+                'days': len(self._by_day),
+                'bytes': sum(b.nbytes() for b in bitmaps),
+                'loaded': self.loaded,
+            }
+
+
+article_filter_index = ArticleFilterIndex()
+
+
+def _on_inserted(ids: List[int], rows: List[dict]):
+    with article_filter_index._lock:
+        # 未加载时由首次 rebuild 从库中读入
+        if not article_filter_index.loaded:
+            return
+        for article_id, row in zip(ids, rows):
+            article_filter_index.add(article_id, row.get('category'), row.get('source_name'),
+                                     row.get('status'), row.get('created_at'))
+
+
+def _on_deleted(ids: List[int], rows: Optional[List[dict]]):
+    with article_filter_index._lock:
+        if article_filter_index.loaded:
+            article_filter_index.remove(ids, rows)
+
+
+on_articles_inserted(_on_inserted)
+on_articles_deleted(_on_deleted)
@@ -0,0 +1,31 @@
+"""
+知识库数据版本号（generation）
+
+文章写入/删除、采集日志写入等改变分析结果的操作，在同一事务内递增 kb_counters 中
+scope=generation 的计数（data.rollups.bump_generation）；core.response_cache 以它标记
+缓存的响应，版本变化即失效。版本号存于数据库，因此多个服务进程之间、以及离线脚本
+直接改库后，各进程的缓存同样失效。
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Optional
+
+from . import db as _db
+from . import rollups
+
+
+logger = logging.getLogger(__name__)
+
+
+def current() -> Optional[int]:
+    """Current generation read from the database; None when it cannot be read."""
+    if _db.engine is None:
+        return None
+    try:
+        with _db.engine.connect() as conn:
+            return rollups.read_counter(conn, rollups.GENERATION_SCOPE)
+    except Exception as e:
+        logger.warning("data generation unavailable: %s", e)
+        return None
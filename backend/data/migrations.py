@@ -0,0 +1,189 @@
+"""
+数据库结构版本管理
+
+迁移按版本号顺序执行，每个迁移在独立事务中运行并写入 schema_version 表；
+已执行的版本不会重复执行。启动时（DB_AUTO_MIGRATE=true）或通过
+``backend/scripts/migrate.py`` 执行，业务路径不再做任何 DDL 检查。
+
+新增迁移：在 MIGRATIONS 末尾追加 (版本号, 名称, 函数)，函数需幂等
+（旧库可能已由历史的 ensure_* 逻辑补齐过部分结构）。
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, insert, select
+from sqlalchemy.engine import Connection, Engine
+
+from . import db as _db
+
+
+logger = logging.getLogger(__name__)
+
+_meta = MetaData()
+schema_version = Table(
+    'schema_version', _meta,
+    Column('version', Integer, primary_key=True),
+    Column('name', String(100), nullable=False),
+    Column('applied_at', DateTime, nullable=False),
+)
+
+
+def _load_models():
+    # 注册全部 ORM 表到 Base.metadata
+    from . import models, user_management_models, model_config_models  # noqa: F401
+
+
+def _add_column(conn: Connection, table: str, column: str, ddl: str, index: Optional[str] = None):
+    cols = {c['name'] for c in inspect(conn).get_columns(table)}
+    if column not in cols:
+        conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+    if index:
+        conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {index} ON {table}({column})")
+
+
+def _create_tables(conn: Connection):
+    _load_models()
+    _db.Base.metadata.create_all(conn, checkfirst=True)
+
+
+def _dedup_columns(conn: Connection):
+    _add_column(conn, 'news_articles', 'url_hash', 'VARCHAR(128)', 'idx_news_url_hash')
+    _add_column(conn, 'news_articles', 'simhash', 'VARCHAR(32)', 'idx_news_simhash')
+
+
+def _enrich_columns(conn: Connection):
+    _add_column(conn, 'news_articles', 'summary', 'TEXT')
+    _add_column(conn, 'news_articles', 'keywords', 'TEXT')
+
+
+def _dedup_group_column(conn: Connection):
+    _add_column(conn, 'news_articles', 'dedup_group_id', 'INTEGER', 'ix_news_articles_dedup_group_id')
+
+
+def _feed_archive_table(conn: Connection):
+    from .models import FeedArchiveEntry
+    FeedArchiveEntry.__table__.create(conn, checkfirst=True)
+
+
+def _articles_created_id_index(conn: Connection):
+    conn.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_news_articles_created_id ON news_articles(created_at, id)"
+    )
+
+
+def _rollup_tables(conn: Connection):
+    from . import rollups
+    from .models import ArticleDailyRollup, IngestLogDailyRollup
+    ArticleDailyRollup.__table__.create(conn, checkfirst=True)
+    IngestLogDailyRollup.__table__.create(conn, checkfirst=True)
+    # 回填历史数据
+    rollups.rebuild_counts(conn)
+
+
+def _article_keywords_table(conn: Connection):
+    from .models import ArticleKeyword
+    from . import rollups
+    ArticleKeyword.__table__.create(conn, checkfirst=True)
+    # 从已存的 keywords 字段回填
+    rollups.rebuild_keywords(conn)
+
+
+def _kb_counters_table(conn: Connection):
+    from . import rollups
+    from .models import KbCounter
+    KbCounter.__table__.create(conn, checkfirst=True)
+    rollups.reconcile_counters(conn)
+
+
+def _article_search_fields(conn: Connection):
+    from sqlalchemy import bindparam, select, update
+    from .models import NewsArticle, article_search_fields
+    _add_column(conn, 'news_articles', 'snippet', 'VARCHAR(200)')
+    _add_column(conn, 'news_articles', 'has_zh', 'BOOLEAN DEFAULT 0')
+    t = NewsArticle.__table__
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(t.c.id, t.c.title, t.c.content).where(t.c.id > last_id).order_by(t.c.id).limit(1000)
+        ).all()
+        if not rows:
+            break
+        conn.execute(
+            update(t).where(t.c.id == bindparam('b_id'))
+            .values(snippet=bindparam('b_snippet'), has_zh=bindparam('b_has_zh')),
+            [{'b_id': r.id, **{f'b_{k}': v for k, v in article_search_fields(r.title, r.content).items()}}
+             for r in rows],
+        )
+        last_id = rows[-1].id
+
+
+def _simhash_version(conn: Connection):
+    # simhash 改用 FNV-1a/fmix64 后，旧（md5）指纹与新指纹不可比较：重新计算并标记版本
+    from crawler.near_dup import recompute_fingerprints
+    _add_column(conn, 'news_articles', 'simhash_version', 'INTEGER')
+    count = recompute_fingerprints(conn)
+    if count:
+        logger.info("recomputed %d simhash fingerprints", count)
+
+
+Migration = Tuple[int, str, Callable[[Connection], None]]
+
+MIGRATIONS: List[Migration] = [
+    (1, 'create_tables', _create_tables),
+    (2, 'news_articles_dedup_columns', _dedup_columns),
+    (3, 'news_articles_enrich_columns', _enrich_columns),
+    (4, 'news_articles_dedup_group_id', _dedup_group_column),
+    (5, 'feed_archive', _feed_archive_table),
+    (6, 'news_articles_created_id_index', _articles_created_id_index),
+    (7, 'analytics_daily_rollups', _rollup_tables),
+    (8, 'article_keywords', _article_keywords_table),
+    (9, 'kb_counters', _kb_counters_table),
+    (10, 'news_articles_search_fields', _article_search_fields),
+    (11, 'news_articles_simhash_version', _simhash_version),
+]
+
+
+def _engine(engine: Optional[Engine]) -> Engine:
+    engine = engine or _db.engine
+    if engine is None:
+        raise RuntimeError('DB not initialized')
+    return engine
+
+
+def applied_versions(engine: Optional[Engine] = None) -> List[int]:
+    engine = _engine(engine)
+    with engine.begin() as conn:
+        schema_version.create(conn, checkfirst=True)
+        return sorted(conn.execute(select(schema_version.c.version)).scalars())
+
+
+def current_version(engine: Optional[Engine] = None) -> int:
+    versions = applied_versions(engine)
+    return versions[-1] if versions else 0
+
+
+def pending_migrations(engine: Optional[Engine] = None) -> List[Migration]:
+    done = set(applied_versions(engine))
+    return [m for m in MIGRATIONS if m[0] not in done]
+
+
+def run_migrations(engine: Optional[Engine] = None, target: Optional[int] = None) -> List[int]:
+    """Apply pending migrations up to ``target`` (default: latest); returns the versions applied."""
+    engine = _engine(engine)
+    applied: List[int] = []
+    for version, name, fn in pending_migrations(engine):
+        if target is not None and version > target:
+            break
+        with engine.begin() as conn:
+            # 另一个进程可能刚执行过同一版本
+            if conn.execute(select(schema_version.c.version).where(schema_version.c.version == version)).first():
+                continue
+            fn(conn)
+            conn.execute(insert(schema_version).values(version=version, name=name, applied_at=datetime.utcnow()))
+        logger.info("applied migration %s %s", version, name)
+        applied.append(version)
+    return applied
@@ -1,6 +1,7 @@
-from sqlalchemy import Integer, String, Text, Boolean, Float, DateTime, ForeignKey, JSON
+from sqlalchemy import Integer, String, Text, Boolean, Float, Date, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from datetime import datetime
+from datetime import date, datetime
+import re
 from typing import Optional, List, TYPE_CHECKING
 from .db import Base
 
@@ -45,6 +46,8 @@ class User(Base):
 
 class NewsArticle(Base):
     __tablename__ = 'news_articles'
+    # 知识库列表按 (created_at, id) 游标分页
+    __table_args__ = (Index('ix_news_articles_created_id', 'created_at', 'id'),)
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(String(500), nullable=False)
     content: Mapped[str] = mapped_column(Text, nullable=False)
@@ -61,6 +64,28 @@ class NewsArticle(Base):
     # 新增字段
     summary: Mapped[str | None] = mapped_column(Text)
     keywords: Mapped[str | None] = mapped_column(Text)
+    # 去重字段（旧库由 data.migrations 补齐）
+    url_hash: Mapped[str | None] = mapped_column(String(128))
+    simhash: Mapped[str | None] = mapped_column(String(32))
+    # 指纹算法版本（crawler.ingest_utils.SIMHASH_VERSION）；版本不同的指纹不可比较
+    simhash_version: Mapped[int | None] = mapped_column(Integer)
+    # 近似重复归组：指向同一报道最早入库的文章 id；自身为组首时为空
+    dedup_group_id: Mapped[int | None] = mapped_column(Integer, index=True)
+    # 检索结果用的派生字段（写入正文时由 article_search_fields 生成），语义检索不再加载 content
+    snippet: Mapped[str | None] = mapped_column(String(200))
+    has_zh: Mapped[bool] = mapped_column(Boolean, default=False)
+
+
+SNIPPET_CHARS = 160
+_ZH_RE = re.compile(r"[\u4e00-\u9fff]")
+
+
+def article_search_fields(title: Optional[str], content: Optional[str]) -> dict:
+    """Derived columns stored alongside content: the result snippet and whether the text has Chinese."""
+    return {
+        'snippet': (content or '')[:SNIPPET_CHARS],
+        'has_zh': bool(_ZH_RE.search(title or '') or _ZH_RE.search(content or '')),
+    }
 
 
 class RssSource(Base):
@@ -98,6 +123,97 @@ class IngestLog(Base):
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
+class IngestLogStage(Base):
+    """单次采集各阶段耗时与字节数（ingest_logs 子表），用于延迟分位统计。"""
+    __tablename__ = 'ingest_log_stages'
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    log_id: Mapped[int] = mapped_column(Integer, ForeignKey('ingest_logs.id', ondelete='CASCADE'), index=True)
+    source_id: Mapped[int | None] = mapped_column(Integer, index=True)
+    stage: Mapped[str] = mapped_column(String(30))  # request | download | parse | extract | dedup | enrich | persist | total
+    duration_ms: Mapped[float] = mapped_column(Float, default=0.0)
+    bytes: Mapped[int] = mapped_column(Integer, default=0)
+    items: Mapped[int] = mapped_column(Integer, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class IngestJob(Base):
+    """持久化采集任务队列：失败的源按指数退避重试，进程重启后继续执行。"""
+    __tablename__ = 'ingest_jobs'
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    source_id: Mapped[int] = mapped_column(Integer, index=True)
+    status: Mapped[str] = mapped_column(String(20), default='pending', index=True)  # pending | running | failed
+    attempt: Mapped[int] = mapped_column(Integer, default=0)  # 已执行失败的次数
+    next_run_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+    lease_owner: Mapped[str | None] = mapped_column(String(200))
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime)
+    last_error: Mapped[str | None] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+
+class FeedArchiveEntry(Base):
+    """原始 feed 归档索引：正文按 sha256 压缩存放在归档目录，按源与抓取时间检索。"""
+    __tablename__ = 'feed_archive'
+    __table_args__ = (Index('ix_feed_archive_source_fetched', 'source_id', 'fetched_at'),)
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    source_id: Mapped[int] = mapped_column(Integer)
+    log_id: Mapped[int | None] = mapped_column(Integer, index=True)  # 对应的 ingest_logs.id
+    url: Mapped[str] = mapped_column(String(500))
+    sha256: Mapped[str] = mapped_column(String(64), index=True)
+    size: Mapped[int] = mapped_column(Integer, default=0)  # 原始字节数
+    stored_size: Mapped[int] = mapped_column(Integer, default=0)  # 压缩后字节数（同内容重复抓取时为 0）
+    truncated: Mapped[bool] = mapped_column(Boolean, default=False)  # 超过 FEED_MAX_BYTES 或下载中断
+    fetched_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ArticleDailyRollup(Base):
+    """news_articles 按 日 × 小时 × 来源 × 分类 的入库量汇总（data.rollups 随写入/删除增量维护）。
+    来源/分类为空时存空串，以便作为主键。"""
+    __tablename__ = 'article_daily_rollup'
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    hour: Mapped[int] = mapped_column(Integer, primary_key=True)  # 0-23（UTC）
+    source_name: Mapped[str] = mapped_column(String(100), primary_key=True, default='')
+    category: Mapped[str] = mapped_column(String(50), primary_key=True, default='')
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class IngestLogDailyRollup(Base):
+    """ingest_logs 按 日 × 状态 × 错误信息 的次数汇总；成功记录的 error 为空串。"""
+    __tablename__ = 'ingest_log_daily_rollup'
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    status: Mapped[str] = mapped_column(String(20), primary_key=True)
+    error: Mapped[str] = mapped_column(String(255), primary_key=True, default='')
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class KbCounter(Base):
+    """知识库计数器：文章总数（scope=total）、按 UTC 日（scope=day，key=YYYY-MM-DD）、按来源（scope=source）。
+    与文章写入/删除同一事务更新，定期由 data.rollups.reconcile_counters 校正。"""
+    __tablename__ = 'kb_counters'
+    scope: Mapped[str] = mapped_column(String(20), primary_key=True)
+    key: Mapped[str] = mapped_column(String(100), primary_key=True, default='')
+    count: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class ArticleKeyword(Base):
+    """文章关键词（news_articles.keywords 拆分后的规范化表），按入库日做窗口内高频词统计。"""
+    __tablename__ = 'article_keywords'
+    __table_args__ = (Index('ix_article_keywords_day_keyword', 'day', 'keyword'),)
+    article_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    keyword: Mapped[str] = mapped_column(String(100), primary_key=True)
+    day: Mapped[date] = mapped_column(Date)  # 文章 created_at 的 UTC 日期
+
+
+class RobotsCacheEntry(Base):
+    __tablename__ = 'robots_cache'
+    domain: Mapped[str] = mapped_column(String(255), primary_key=True)
+    mode: Mapped[str] = mapped_column(String(20), default='parsed')  # parsed | allow_all | disallow_all | failed
+    body: Mapped[str | None] = mapped_column(Text)
+    error_message: Mapped[str | None] = mapped_column(Text)
+    fetched_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime | None] = mapped_column(DateTime)
+
+
 class EmailConfig(Base):
     __tablename__ = 'email_configs'
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
@@ -0,0 +1,335 @@
+"""
+分析用的按日汇总表
+
+article_daily_rollup（日 × 小时 × 来源 × 分类）、ingest_log_daily_rollup（日 × 状态 × 错误）
+、article_keywords（关键词 × 文章 × 日）与 kb_counters（总数/按日/按来源）在写入/删除的
+同一事务内增量更新（并递增数据版本号，见 data.generation），/api/analytics/* 与仪表盘只读这些表；
+计数器由 reconcile_counters 定期校正。
+历史数据由迁移或 ``backend/scripts/rebuild_rollups.py`` 回填。
+
+各函数的 ``conn`` 可以是 Connection 或 Session（调用方负责提交）。
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from datetime import date, datetime
+from typing import Iterable, Optional, Sequence, Tuple
+
+from sqlalchemy import Date, cast, delete, extract, func, insert, select, update
+
+from .models import ArticleDailyRollup, ArticleKeyword, IngestLogDailyRollup, IngestLog, KbCounter, NewsArticle
+
+
+logger = logging.getLogger(__name__)
+
+_ERROR_MAX = 255
+_KEYWORD_MAX = 100
+_ID_CHUNK = 500
+
+
+def _dialect_name(conn) -> str:
+    dialect = getattr(conn, 'dialect', None) or conn.get_bind().dialect
+    return dialect.name
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    return None
+
+
+def _day_expr(conn, column):
+    """SQL expression for the (UTC) calendar day of a DateTime column, per dialect."""
+    # SQLite 的 CAST(... AS DATE) 按数值亲和性转换（得到年份），需用 date()
+    if _dialect_name(conn) == 'sqlite':
+        return func.date(column)
+    return cast(column, Date)
+
+
+def _as_date(value) -> date:
+    """Day values come back as ``date`` or as 'YYYY-MM-DD' strings (SQLite)."""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def article_key(created_at, source_name, category) -> Optional[Tuple[date, int, str, str]]:
+    dt = _as_datetime(created_at)
+    if dt is None:
+        return None
+    return dt.date(), dt.hour, source_name or '', category or ''
+
+
+def error_key(created_at, status, error) -> Optional[Tuple[date, str, str]]:
+    dt = _as_datetime(created_at)
+    if dt is None:
+        return None
+    return dt.date(), status or 'success', (error or '')[:_ERROR_MAX]
+
+
+def _apply(conn, model, key_cols: Sequence[str], deltas: Counter):
+    """Add ``deltas`` ({key tuple: n}) to the rollup counts; rows that reach 0 are removed."""
+    deltas = {k: n for k, n in deltas.items() if n}
+    if not deltas:
+        return
+    table = model.__table__
+    rows = [{**dict(zip(key_cols, k)), 'count': n} for k, n in deltas.items()]
+    dialect = _dialect_name(conn)
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        stmt = upsert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_cols),
+            set_={'count': table.c['count'] + stmt.excluded['count']},
+        )
+        conn.execute(stmt, rows)
+    else:
+        for row in rows:
+            cond = [table.c[c] == row[c] for c in key_cols]
+            res = conn.execute(update(table).where(*cond).values({'count': table.c['count'] + row['count']}))
+            if not res.rowcount:
+                conn.execute(insert(table).values(**row))
+    if any(n < 0 for n in deltas.values()):
+        conn.execute(delete(table).where(table.c['count'] <= 0))
+
+
+_ARTICLE_KEYS = ('day', 'hour', 'source_name', 'category')
+_ERROR_KEYS = ('day', 'status', 'error')
+_COUNTER_KEYS = ('scope', 'key')
+# kb_counters 中的数据版本号（data.generation）与离线改库版本号（core.index_sync），
+# 不是文章计数，校正时跳过
+GENERATION_SCOPE = 'generation'
+INDEX_EPOCH_SCOPE = 'index_epoch'
+
+
+def bump_generation(conn):
+    """Advance the KB data generation in the caller's transaction (see data.generation)."""
+    _apply(conn, KbCounter, _COUNTER_KEYS, Counter({(GENERATION_SCOPE, ''): 1}))
+
+
+def bump_index_epoch(conn):
+    """Tell running servers to rebuild their in-memory indexes (see core.index_sync)."""
+    _apply(conn, KbCounter, _COUNTER_KEYS, Counter({(INDEX_EPOCH_SCOPE, ''): 1}))
+
+
+def _counter_deltas(article_deltas: Counter) -> Counter:
+    """kb_counters deltas derived from article rollup deltas (same sign)."""
+    out: Counter = Counter()
+    for (day, _, source, _), n in article_deltas.items():
+        out[('total', '')] += n
+        out[('day', day.isoformat())] += n
+        out[('source', source)] += n
+    return out
+
+
+def read_counter(conn, scope: str, key: str = '') -> int:
+    t = KbCounter.__table__
+    value = conn.execute(select(t.c['count']).where(t.c.scope == scope, t.c.key == key)).scalar()
+    return int(value or 0)
+
+
+def read_counters(conn, scope: str, keys: Optional[Sequence[str]] = None) -> dict:
+    """{key: count} for a scope (optionally only ``keys``)."""
+    t = KbCounter.__table__
+    q = select(t.c.key, t.c['count']).where(t.c.scope == scope)
+    if keys is not None:
+        q = q.where(t.c.key.in_(list(keys)))
+    return {k: int(n) for k, n in conn.execute(q)}
+
+
+def split_keywords(value: Optional[str]) -> list:
+    """Comma-joined keywords -> unique, non-empty keywords in their original order."""
+    out = []
+    for k in (value or '').split(','):
+        k = k.strip()[:_KEYWORD_MAX]
+        if k and k not in out:
+            out.append(k)
+    return out
+
+
+def _keyword_rows(article_id: int, created_at, keywords) -> list:
+    dt = _as_datetime(created_at)
+    if dt is None:
+        return []
+    return [{'article_id': article_id, 'keyword': k, 'day': dt.date()} for k in split_keywords(keywords)]
+
+
+def add_articles(conn, rows: Iterable[dict], ids: Optional[Sequence[int]] = None):
+    """Count newly inserted news_articles rows (dicts with created_at/source_name/category).
+
+    With ``ids`` (same order as ``rows``) the rows' keywords are also written to article_keywords.
+    """
+    rows = list(rows)
+    deltas: Counter = Counter()
+    for r in rows:
+        key = article_key(r.get('created_at'), r.get('source_name'), r.get('category'))
+        if key is not None:
+            deltas[key] += 1
+    _apply(conn, ArticleDailyRollup, _ARTICLE_KEYS, deltas)
+    _apply(conn, KbCounter, _COUNTER_KEYS, _counter_deltas(deltas))
+    if ids is not None:
+        kw_rows = [kw for i, r in zip(ids, rows) for kw in _keyword_rows(i, r.get('created_at'), r.get('keywords'))]
+        if kw_rows:
+            conn.execute(insert(ArticleKeyword.__table__), kw_rows)
+    bump_generation(conn)
+
+
+def set_article_keywords(conn, items: Iterable[Tuple[int, datetime, Optional[str]]]):
+    """Replace the stored keywords of existing articles, given as (id, created_at, keywords)."""
+    items = list(items)
+    t = ArticleKeyword.__table__
+    for i in range(0, len(items), _ID_CHUNK):
+        chunk = items[i:i + _ID_CHUNK]
+        conn.execute(delete(t).where(t.c.article_id.in_([a for a, _, _ in chunk])))
+        kw_rows = [kw for a, created_at, keywords in chunk for kw in _keyword_rows(a, created_at, keywords)]
+        if kw_rows:
+            conn.execute(insert(t), kw_rows)
+    bump_generation(conn)
+
+
+def remove_articles(conn, ids: Iterable[int]) -> list:
+    """Uncount news_articles rows that are about to be deleted (call before the DELETE).
+
+    Returns the rows found (dicts with id, created_at, category, source_name, status) for
+    ``notify_articles_deleted``.
+    """
+    ids = [int(i) for i in ids if isinstance(i, int) or str(i).isdigit()]
+    t = NewsArticle.__table__
+    deltas: Counter = Counter()
+    found = []
+    for i in range(0, len(ids), _ID_CHUNK):
+        rows = conn.execute(
+            select(t.c.id, t.c.created_at, t.c.source_name, t.c.category, t.c.status)
+            .where(t.c.id.in_(ids[i:i + _ID_CHUNK]))
+        ).all()
+        found.extend(dict(r._mapping) for r in rows)
+        for r in rows:
+            key = article_key(r.created_at, r.source_name, r.category)
+            if key is not None:
+                deltas[key] -= 1
+        kw = ArticleKeyword.__table__
+        conn.execute(delete(kw).where(kw.c.article_id.in_(ids[i:i + _ID_CHUNK])))
+    _apply(conn, ArticleDailyRollup, _ARTICLE_KEYS, deltas)
+    _apply(conn, KbCounter, _COUNTER_KEYS, _counter_deltas(deltas))
+    bump_generation(conn)
+    return found
+
+
+def add_ingest_logs(conn, logs: Iterable[Tuple[datetime, str, Optional[str]]]):
+    """Count ingest_logs rows given as (created_at, status, error_message)."""
+    deltas: Counter = Counter()
+    for created_at, status, error in logs:
+        key = error_key(created_at, status, error)
+        if key is not None:
+            deltas[key] += 1
+    _apply(conn, IngestLogDailyRollup, _ERROR_KEYS, deltas)
+    bump_generation(conn)
+
+
+def rebuild_counts(conn) -> dict:
+    """Recompute both count rollups from news_articles / ingest_logs (one GROUP BY pass each)."""
+    a, l = NewsArticle.__table__, IngestLog.__table__
+    conn.execute(delete(ArticleDailyRollup.__table__))
+    conn.execute(delete(IngestLogDailyRollup.__table__))
+
+    article_deltas: Counter = Counter()
+    day, hour = _day_expr(conn, a.c.created_at), extract('hour', a.c.created_at)
+    q = (
+        select(day, hour, a.c.source_name, a.c.category, func.count())
+        .where(a.c.created_at.isnot(None))
+        .group_by(day, hour, a.c.source_name, a.c.category)
+    )
+    for d, h, src, cat, n in conn.execute(q):
+        # 空串与 NULL 在汇总表中合并
+        article_deltas[(_as_date(d), int(h), src or '', cat or '')] += int(n)
+    _apply(conn, ArticleDailyRollup, _ARTICLE_KEYS, article_deltas)
+
+    error_deltas: Counter = Counter()
+    day = _day_expr(conn, l.c.created_at)
+    q = (
+        select(day, l.c.status, l.c.error_message, func.count())
+        .where(l.c.created_at.isnot(None))
+        .group_by(day, l.c.status, l.c.error_message)
+    )
+    for d, status, error, n in conn.execute(q):
+        key = error_key(datetime.combine(_as_date(d), datetime.min.time()), status, error)
+        error_deltas[key] += int(n)
+    _apply(conn, IngestLogDailyRollup, _ERROR_KEYS, error_deltas)
+    return {'article_rows': len(article_deltas), 'ingest_log_rows': len(error_deltas)}
+
+
+def rebuild_keywords(conn) -> dict:
+    """Refill article_keywords from the stored news_articles.keywords strings."""
+    a = NewsArticle.__table__
+    conn.execute(delete(ArticleKeyword.__table__))
+    keyword_rows = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            select(a.c.id, a.c.created_at, a.c.keywords)
+            .where(a.c.id > last_id, a.c.keywords.isnot(None))
+            .order_by(a.c.id).limit(_ID_CHUNK * 10)
+        ).all()
+        if not rows:
+            break
+        kw_rows = [kw for r in rows for kw in _keyword_rows(r.id, r.created_at, r.keywords)]
+        if kw_rows:
+            conn.execute(insert(ArticleKeyword.__table__), kw_rows)
+        keyword_rows += len(kw_rows)
+        last_id = rows[-1].id
+    return {'keyword_rows': keyword_rows}
+
+
+def reconcile_counters(conn) -> dict:
+    """Recount kb_counters from news_articles and correct any drift; returns the corrected keys."""
+    a, t = NewsArticle.__table__, KbCounter.__table__
+    actual: Counter = Counter()
+    day = _day_expr(conn, a.c.created_at)
+    day_q = select(day, func.count()).where(a.c.created_at.isnot(None)).group_by(day)
+    for d, n in conn.execute(day_q):
+        actual[('day', _as_date(d).isoformat())] += int(n)
+        actual[('total', '')] += int(n)
+    src_q = (
+        select(a.c.source_name, func.count())
+        .where(a.c.created_at.isnot(None)).group_by(a.c.source_name)
+    )
+    for s, n in conn.execute(src_q):
+        actual[('source', s or '')] += int(n)
+    stored = Counter({(s, k): int(n) for s, k, n in conn.execute(
+        select(t.c.scope, t.c.key, t.c['count']).where(t.c.scope.notin_([GENERATION_SCOPE, INDEX_EPOCH_SCOPE]))
+    )})
+    drift = Counter({k: actual[k] - stored[k] for k in set(actual) | set(stored) if actual[k] != stored[k]})
+    _apply(conn, KbCounter, _COUNTER_KEYS, drift)
+    return {f'{s}:{k}' if k else s: n for (s, k), n in drift.items()}
+
+
+def reconcile_counters_job():
+    """Scheduler entry point: reconcile in its own transaction and log any drift."""
+    from . import db as _db
+    with _db.engine.begin() as conn:
+        drift = reconcile_counters(conn)
+        if drift:
+            bump_generation(conn)
+    if drift:
+        logger.warning("kb_counters drift corrected: %s", drift)
+    return drift
+
+
+def rebuild(conn) -> dict:
+    """Recompute every analytics table."""
+    out = {**rebuild_counts(conn), **rebuild_keywords(conn),
+           'counter_fixes': len(reconcile_counters(conn))}
+    bump_generation(conn)
+    return out
@@ -1,49 +1,190 @@
+import base64
+import json
 from flask import Blueprint, request
 from datetime import timezone
 from data.db import get_session
-from data.models import NewsArticle, IngestLog
+from data.models import NewsArticle, IngestLog, article_search_fields
+from data.bulk import BulkInsertError, bulk_insert_articles, notify_articles_deleted, notify_articles_inserted
+from data.filter_index import article_filter_index
+from data import rollups
+from crawler.near_dup import fingerprint_fields, release_group_roots
+from crawler.trending import WINDOWS as _TRENDING_WINDOWS, trending_detector
+from core.response_cache import cached_response
+from data.models import ArticleDailyRollup, ArticleKeyword, IngestLogDailyRollup
 from ai.vectorstore import build_index_from_recent_articles, search_index
 from ai.qa import build_retrieval_qa
-from sqlalchemy import func
+from sqlalchemy import false, func, or_, select, tuple_
 from ai.enrich import extract_keywords
 from flask import current_app
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from services import web_search_service, ai_summary_service, simple_web_search_service
 from config import Settings
 
 kb_bp = Blueprint('kb', __name__)
 
 
+# 列表默认返回的列；content 仅在 include_content=1 时返回
+_LIST_COLUMNS = ('id', 'title', 'source_name', 'source_url', 'category', 'created_at', 'summary')
+
+
+def _to_iso_utc(dt):
+    if not dt:
+        return None
+    # If naive, assume UTC; else convert to UTC
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    else:
+        dt = dt.astimezone(timezone.utc)
+    # Ensure trailing 'Z'
+    iso = dt.isoformat()
+    if not iso.endswith('Z'):
+        iso = iso.replace('+00:00', 'Z')
+    return iso
+
+
+def _encode_cursor(created_at, article_id) -> str:
+    raw = json.dumps([created_at.isoformat(), article_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor: str):
+    """-> (created_at, id) of the last row of the previous page; ValueError if malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, article_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(article_id)
+    except Exception as e:
+        raise ValueError(f'invalid cursor: {e}')
+
+
+def _parse_day(value):
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+def _list_filters(args) -> dict:
+    """category / source_name / status / date_from / date_to（YYYY-MM-DD，UTC，含首尾）；date 为单日。
+    未传或为空的条件为 None；日期格式错误抛 ValueError。"""
+    day = _parse_day(args.get('date'))
+    return {
+        'category': args.get('category') or None,
+        'source_name': args.get('source_name') or args.get('source') or None,
+        'status': args.get('status') or None,
+        'date_from': _parse_day(args.get('date_from')) or day,
+        'date_to': _parse_day(args.get('date_to')) or day,
+    }
+
+
+def _filter_ids(filters: dict):
+    """位图索引求交得到的 id 集合；索引不可用时返回 None（回退到 SQL 条件）"""
+    try:
+        article_filter_index.ensure_loaded()
+        return article_filter_index.match(**filters)
+    except Exception as e:
+        current_app.logger.warning('filter index unavailable, filtering in SQL: %s', e)
+        return None
+
+
+def _sql_filters(table, filters: dict) -> list:
+    conds = []
+    for col in ('category', 'source_name', 'status'):
+        if filters[col] is not None:
+            conds.append(table.c[col] == filters[col])
+    if filters['date_from']:
+        conds.append(table.c.created_at >= datetime.combine(filters['date_from'], datetime.min.time()))
+    if filters['date_to']:
+        conds.append(table.c.created_at < datetime.combine(filters['date_to'], datetime.min.time()) + timedelta(days=1))
+    return conds
+
+
 @kb_bp.get('/kb/items')
 def kb_items():
+    """按 (created_at, id) 倒序的游标分页列表。
+    参数: limit（默认 KB_PAGE_SIZE，上限 KB_PAGE_SIZE_MAX）、cursor（上一页返回的 next_cursor）、
+          include_content=1 时返回正文；
+          筛选 category / source_name / status / date（单日）/ date_from / date_to（UTC 日期，含首尾）
+    返回: { code, data: [...], next_cursor, has_more }；带筛选时另有 total（命中总数）
+    带筛选时由内存位图索引求交取 id，按 id 倒序（即入库顺序）分页，不扫描 news_articles。
+    """
+    settings = Settings()
+    limit = request.args.get('limit', default=settings.kb_page_size, type=int) or settings.kb_page_size
+    limit = max(1, min(limit, settings.kb_page_size_max))
+    include_content = request.args.get('include_content', '').lower() in ('1', 'true', 'yes')
+    cursor = request.args.get('cursor') or None
+    try:
+        filters = _list_filters(request.args)
+        created_at, last_id = _decode_cursor(cursor) if cursor else (None, None)
+    except ValueError as e:
+        return {'code': 400, 'msg': str(e)}, 400
+
+    table = NewsArticle.__table__
+    names = _LIST_COLUMNS + (('content',) if include_content else ())
+    q = select(*(table.c[n] for n in names))
+    filtered = any(v is not None for v in filters.values())
+    matched = _filter_ids(filters) if filtered else None
+    total = None
+
     db = get_session()
-    rows = db.query(NewsArticle).order_by(NewsArticle.created_at.desc()).all()
-    def to_iso_utc(dt):
-        if not dt:
-            return None
-        # If naive, assume UTC; else convert to UTC
-        if dt.tzinfo is None:
-            dt = dt.replace(tzinfo=timezone.utc)
+    if matched is not None:
+        total = len(matched)
+        page_ids = []
+        for article_id in matched.iter_desc(below=last_id):
+            page_ids.append(article_id)
+            if len(page_ids) > limit:
+                break
+        has_more = len(page_ids) > limit
+        page_ids = page_ids[:limit]
+        rows = db.execute(q.where(table.c.id.in_(page_ids)).order_by(table.c.id.desc())).all() if page_ids else []
+    else:
+        if filtered:
+            q = q.where(*_sql_filters(table, filters))
+            total = db.execute(select(func.count()).select_from(table).where(*_sql_filters(table, filters))).scalar() or 0
+            if cursor:
+                q = q.where(table.c.id < last_id)
+            q = q.order_by(table.c.id.desc())
         else:
-            dt = dt.astimezone(timezone.utc)
-        # Ensure trailing 'Z'
-        iso = dt.isoformat()
-        if not iso.endswith('Z'):
-            iso = iso.replace('+00:00', 'Z')
-        return iso
+            if cursor:
+                # 行值比较可直接走 (created_at, id) 复合索引
+                q = q.where(tuple_(table.c.created_at, table.c.id) < tuple_(created_at, last_id))
+            q = q.order_by(table.c.created_at.desc(), table.c.id.desc())
+        rows = db.execute(q.limit(limit + 1)).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+    data = []
+    for r in rows:
+        item = {n: getattr(r, n) for n in names}
+        item['created_at'] = _to_iso_utc(r.created_at)
+        data.append(item)
+    next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id) if has_more and rows else None
+    resp = {'code': 0, 'data': data, 'next_cursor': next_cursor, 'has_more': has_more and bool(rows)}
+    if total is not None:
+        resp['total'] = int(total)
+    return resp
 
-    return {'code': 0, 'data': [
-        {
-            'id': a.id,
-            'title': a.title,
-            'content': a.content,
-            'source_name': a.source_name,
-            'source_url': a.source_url,
-            'category': a.category,
-            'created_at': to_iso_utc(a.created_at),
-            'summary': getattr(a, 'summary', None),
-        } for a in rows
-    ]}
+
+@kb_bp.get('/kb/items/facets')
+@cached_response()
+def kb_items_facets():
+    """分类/来源/状态的条目数（来自位图索引），供列表筛选下拉使用。
+    可带与 /kb/items 相同的筛选参数，计数限定在命中集合内。
+    返回: { code, data: { category: [{value, count}], source_name: [...], status: [...] }, total }
+    """
+    try:
+        filters = _list_filters(request.args)
+        article_filter_index.ensure_loaded()
+    except ValueError as e:
+        return {'code': 400, 'msg': str(e)}, 400
+    except Exception as e:
+        return {'code': 500, 'msg': f'filter index unavailable: {e}'}, 500
+    within = article_filter_index.match(**filters) if any(v is not None for v in filters.values()) else None
+    data = {}
+    for dim in article_filter_index.DIMENSIONS:
+        counts = article_filter_index.facets(dim, within)
+        data[dim] = sorted(
+            ({'value': k, 'count': c} for k, c in counts.items() if c),
+            key=lambda x: (-x['count'], x['value'] or ''),
+        )
+    total = len(within) if within is not None else len(article_filter_index)
+    return {'code': 0, 'data': data, 'total': total}
 
 
 @kb_bp.post('/kb/items')
@@ -60,6 +201,11 @@ def kb_item_create():
         source_name=data.get('source_name'),
         source_url=data.get('source_url'),
         category=data.get('category'),
+        # 关键词在写入时提取，分析接口不再临时计算
+        keywords=data.get('keywords') or ','.join(extract_keywords(f"{title} {content}", top_k=8)),
+        **article_search_fields(title, content),
+        # 与采集相同的 simhash，供后续采集做近似重复匹配
+        **fingerprint_fields([(title, content)])[0],
     )
     # 可选字段
     try:
@@ -68,7 +214,12 @@ def kb_item_create():
     except Exception:
         pass
     db.add(a)
+    db.flush()
+    row = {'category': a.category, 'source_name': a.source_name, 'status': a.status, 'created_at': a.created_at,
+           'keywords': a.keywords, 'simhash': a.simhash, 'simhash_version': a.simhash_version}
+    rollups.add_articles(db, [row], [a.id])
     db.commit()
+    notify_articles_inserted([a.id], [row])
     return {'code': 0, 'data': {'id': a.id}}
 
 
@@ -76,11 +227,12 @@ def kb_item_create():
 def kb_items_import():
     """批量导入知识库条目。
     请求体 JSON: { items: [ {title, content, source_name?, source_url?, category?, published_at?} ] }
-    返回: { code, data: { inserted, skipped, errors: [ {rowIndex, message} ] } }
+    返回: { code, data: { inserted, skipped, errors: [ {rowIndex, message} ], ids } }
     规则:
       - 必填: title, content
       - 去重: 若 source_url 存在且与现有记录重复则跳过
       - 时间: published_at 若存在，解析为 UTC; created_at 由数据库默认/当前时间提供
+      - 写入: 通过 bulk_insert_articles 批量插入，返回新记录 ids；simhash 与采集一致，参与近似重复检测
     """
     payload = request.get_json(silent=True) or {}
     items = payload.get('items') or []
@@ -110,6 +262,8 @@ def kb_items_import():
         except Exception:
             return None
 
+    rows: list[dict] = []
+    seen_urls: set[str] = set()
     for idx, it in enumerate(items):
         title = (it.get('title') or '').strip()
         content = (it.get('content') or '').strip()
@@ -120,36 +274,59 @@ def kb_items_import():
 
         source_url = (it.get('source_url') or None) or None
         if source_url:
-            existed = db.query(NewsArticle).filter(NewsArticle.source_url == source_url).first()
+            if source_url in seen_urls:
+                skipped += 1
+                continue
+            existed = db.query(NewsArticle.id).filter(NewsArticle.source_url == source_url).first()
             if existed:
                 skipped += 1
                 continue
-
-        try:
-            a = NewsArticle(
-                title=title,
-                content=content,
-                source_name=it.get('source_name'),
-                source_url=source_url,
-                category=it.get('category'),
-                published_at=parse_dt(it.get('published_at')),
-            )
-            db.add(a)
-            inserted += 1
-        except Exception as e:
-            errors.append({'rowIndex': idx, 'message': f'插入失败: {str(e)}'})
-            skipped += 1
-
+            seen_urls.add(source_url)
+
+        rows.append({
+            'title': title,
+            'content': content,
+            'source_name': it.get('source_name'),
+            'source_url': source_url,
+            'category': it.get('category'),
+            'published_at': parse_dt(it.get('published_at')),
+            'keywords': it.get('keywords') or ','.join(extract_keywords(f"{title} {content}", top_k=8)),
+        })
+
+    for row, fields in zip(rows, fingerprint_fields([(r['title'], r['content']) for r in rows])):
+        row.update(fields)
+
+    # 批量写入（Core executemany，按 bulk_insert_chunk_size 分块提交）
     try:
-        db.commit()
-    except Exception as e:
-        try:
-            db.rollback()
-        except Exception:
-            pass
-        return {'code': 500, 'msg': f'db commit failed: {e}'}, 500
+        ids = bulk_insert_articles(rows)
+    except BulkInsertError as e:
+        # 失败前的分块已提交：返回已写入的 ids，客户端重试时这些行会按 source_url 跳过
+        return {'code': 500, 'msg': f'db commit failed: {e.cause}',
+                'data': {'inserted': len(e.ids), 'skipped': skipped, 'errors': errors, 'ids': e.ids}}, 500
+    inserted = len(ids)
+
+    return {'code': 0, 'data': {'inserted': inserted, 'skipped': skipped, 'errors': errors, 'ids': ids}}
+
+
+def _search_projection(q_lower: str, q_zh: set):
+    """检索候选只取 id/标题/链接/存储的摘要片段/has_zh；正文相关的特征在 SQL 中求值，不传输 content"""
+    content = NewsArticle.content
+    has_query = func.lower(content).contains(q_lower, autoescape=True) if q_lower else false()
+    zh_overlap = or_(*(content.contains(ch, autoescape=True) for ch in sorted(q_zh))) if q_zh else false()
+    return select(
+        NewsArticle.id, NewsArticle.title, NewsArticle.source_url, NewsArticle.snippet, NewsArticle.has_zh,
+        has_query.label('content_has_query'), zh_overlap.label('content_has_zh_overlap'),
+    )
 
-    return {'code': 0, 'data': {'inserted': inserted, 'skipped': skipped, 'errors': errors}}
+
+def _search_hit(row, score: float) -> dict:
+    return {
+        'id': row.id,
+        'title': row.title,
+        'snippet': row.snippet or '',
+        'source_url': row.source_url,
+        'score': score,
+    }
 
 
 @kb_bp.post('/search/semantic')
@@ -162,94 +339,66 @@ def search_semantic():
         min_score = float(data.get('min_score') or 0.8)
     except Exception:
         min_score = 0.8
+    import re
+    is_zh = bool(re.search(r"[\u4e00-\u9fff]", query or ""))
+    is_zh_only = is_zh and not re.search(r"[A-Za-z]", query or "")
+    q_lower = query.lower()
+    q_zh = set(re.findall(r"[\u4e00-\u9fff]", query))
+    db = get_session()
     index, id_map = build_index_from_recent_articles(limit_articles=200)
     if not index:
         # fallback to LIKE if embeddings missing
-        db = get_session()
         q = f"%{query}%"
-        rows = db.query(NewsArticle).filter((NewsArticle.title.like(q)) | (NewsArticle.content.like(q))).limit(top_k).all()
-        data_like = [
-            {
-                'id': a.id,
-                'title': a.title,
-                'snippet': (a.content or '')[:160],
-                'source_url': a.source_url,
-                'score': 0.5,
-            } for a in rows
-        ]
+        rows = db.execute(
+            _search_projection(q_lower, q_zh)
+            .where((NewsArticle.title.like(q)) | (NewsArticle.content.like(q))).limit(top_k)
+        ).all()
+        data_like = [_search_hit(a, 0.5) for a in rows]
         data_like = [r for r in data_like if r['score'] >= min_score]
         return {'code': 0, 'data': data_like[:top_k]}
     results = search_index(index, id_map, query, top_k=max(50, top_k * 5))
-    db = get_session()
     id_to_score = {i: s for i, s in results}
-    arts = db.query(NewsArticle).filter(NewsArticle.id.in_(id_to_score.keys())).all()
+    # 只取投影列（不含 content）；依赖正文的匹配特征由数据库计算后只返回布尔值
+    arts = db.execute(_search_projection(q_lower, q_zh).where(NewsArticle.id.in_(id_to_score.keys()))).all()
     arts.sort(key=lambda a: id_to_score.get(a.id, 0), reverse=True)
     # Simple language-aware rerank: if query seems Chinese, prefer Chinese content
-    import re
-    is_zh = bool(re.search(r"[\u4e00-\u9fff]", query or ""))
-    is_zh_only = is_zh and not re.search(r"[A-Za-z]", query or "")
-    def zh_pref_score(article: NewsArticle, score: float) -> float:
+    def zh_pref_score(article, score: float) -> float:
         if not is_zh:
             return score
-        text = (article.title or "") + (article.content or "")
-        return score + (0.05 if re.search(r"[\u4e00-\u9fff]", text) else -0.05)
+        return score + (0.05 if article.has_zh else -0.05)
     # 语义分数基础上：
     # 1) 标题/内容包含关键词 → 强力加权
     # 2) 标题过短（≤2）且不包含关键词 → 降权，避免“是/的/了”等噪声
     # 3) 标题/内容与查询的中文字符交集为0 → 降权
-    q_lower = query.lower()
-    def boosted_score(article: NewsArticle) -> float:
+    def boosted_score(article) -> float:
         base = id_to_score.get(article.id, 0.0)
         base = zh_pref_score(article, base)
         title = (article.title or '')
-        content = (article.content or '')
         t_lower = title.lower()
-        c_lower = content.lower()
         boost = 0.0
-        if q_lower and (q_lower in t_lower or q_lower in c_lower):
+        if q_lower and (q_lower in t_lower or article.content_has_query):
             boost += 0.3
         if len(title.strip()) <= 2 and q_lower not in t_lower:
             boost -= 0.3
         # 中文字符交集
-        try:
-            q_zh = set(re.findall(r"[\u4e00-\u9fff]", query))
-            a_zh = set(re.findall(r"[\u4e00-\u9fff]", title + content))
-            if q_zh and not (q_zh & a_zh):
-                boost -= 0.2
-        except Exception:
-            pass
+        if q_zh and not (q_zh & set(title)) and not article.content_has_zh_overlap:
+            boost -= 0.2
         return base + boost
     arts.sort(key=lambda a: boosted_score(a), reverse=True)
     # If query is Chinese-only, strictly filter to results containing Chinese.
     if is_zh_only:
-        arts = [a for a in arts if re.search(r"[\u4e00-\u9fff]", (a.title or "") + (a.content or ""))]
-    data_out = [
-        {
-            'id': a.id,
-            'title': a.title,
-            'snippet': (a.content or '')[:160],
-            'source_url': a.source_url,
-            'score': round(boosted_score(a), 4),
-        } for a in arts
-    ]
+        arts = [a for a in arts if a.has_zh]
+    data_out = [_search_hit(a, round(boosted_score(a), 4)) for a in arts]
     # 过滤掉低于阈值的结果
     data_out = [r for r in data_out if r['score'] >= min_score]
     # secondary fallback: if语义检索为空，则执行LIKE
     if not data_out:
         q = f"%{query}%"
-        base_q = db.query(NewsArticle).filter((NewsArticle.title.like(q)) | (NewsArticle.content.like(q)))
+        base_q = _search_projection(q_lower, q_zh).where((NewsArticle.title.like(q)) | (NewsArticle.content.like(q)))
         if is_zh_only:
-            base_q = base_q.filter((NewsArticle.title.op('REGEXP')(r"[\u4e00-\u9fff]")) | (NewsArticle.content.op('REGEXP')(r"[\u4e00-\u9fff]")))
-        rows = base_q.limit(top_k).all()
-        data_out = [
-            {
-                'id': a.id,
-                'title': a.title,
-                'snippet': (a.content or '')[:160],
-                'source_url': a.source_url,
-                'score': 0.4,
-            } for a in rows
-        ]
+            base_q = base_q.where(NewsArticle.has_zh.is_(True))
+        rows = db.execute(base_q.limit(top_k)).all()
+        data_out = [_search_hit(a, 0.4) for a in rows]
     # 对所有结果统一应用阈值过滤
     data_out = [r for r in data_out if r['score'] >= min_score]
     
@@ -289,81 +438,133 @@ def search_semantic():
     return {'code': 0, 'data': data_out[:top_k]}
 
 
+def _utc_today() -> str:
+    # 按天统计的结果随 UTC 日期变化，缓存键带上日期
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+def _trending_bucket() -> int:
+    return int(datetime.now(timezone.utc).timestamp() // (trending_detector.bucket_minutes * 60))
+
+
+_KEYWORD_WINDOWS = {'day': 1, 'week': 7, 'month': 30}
+
+
 @kb_bp.get('/analytics/keywords_top')
+@cached_response(vary=_utc_today)
 def analytics_keywords_top():
+    """窗口内高频关键词（article_keywords 上按 (day, keyword) 索引聚合）。
+    参数: limit（默认 10）；窗口三选一：window=day|week|month|all、days=N、date_from/date_to（YYYY-MM-DD，含首尾）；
+          默认 all
+    """
     limit = request.args.get('limit', default=10, type=int)
+    window = request.args.get('window', default='all')
+    days = request.args.get('days', type=int)
+    try:
+        date_from = _parse_day(request.args.get('date_from'))
+        date_to = _parse_day(request.args.get('date_to'))
+    except ValueError as e:
+        return {'code': 400, 'msg': str(e)}, 400
+    if days is None and window in _KEYWORD_WINDOWS:
+        days = _KEYWORD_WINDOWS[window]
+    elif days is None and window != 'all':
+        return {'code': 400, 'msg': 'window must be day|week|month|all'}, 400
+    if days:
+        # 含今天在内的最近 days 天
+        date_from = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
     db = get_session()
-    counter: dict[str, int] = {}
-    # 取最近200篇，优先使用已存keywords，否则临时提取
-    rows = db.query(NewsArticle).order_by(NewsArticle.id.desc()).limit(200).all()
-    for a in rows:
-        kw_str = getattr(a, 'keywords', None)
-        kws = []
-        if kw_str:
-            kws = [k.strip() for k in (kw_str or '').split(',') if k.strip()]
-        else:
-            text = f"{a.title or ''} {a.content or ''}"
-            kws = extract_keywords(text, top_k=8)
-        for kw in kws:
-            counter[kw] = counter.get(kw, 0) + 1
-    top = sorted(counter.items(), key=lambda x: x[1], reverse=True)[:limit]
-    return {'code': 0, 'data': [{'keyword': k, 'count': c} for k, c in top]}
+    K = ArticleKeyword
+    n = func.count()
+    q = db.query(K.keyword, n)
+    if date_from:
+        q = q.filter(K.day >= date_from)
+    if date_to:
+        q = q.filter(K.day <= date_to)
+    top = q.group_by(K.keyword).order_by(n.desc(), K.keyword).limit(limit).all()
+    return {'code': 0, 'data': [{'keyword': k, 'count': int(c)} for k, c in top]}
+
+
+@kb_bp.get('/analytics/trending')
+@cached_response(vary=_trending_bucket)
+def analytics_trending():
+    """近一小时/一天内相对基线异常升高的关键词（内存中的分桶 count-min sketch + Space-Saving，随入库更新）。
+    参数: window=hour|day（默认 hour）、limit（默认 10）、min_count（默认 TRENDING_MIN_COUNT）
+    返回: { code, data: [ {keyword, count, expected, lift} ], window, baseline_hours }
+    """
+    window = request.args.get('window', default='hour')
+    if window not in _TRENDING_WINDOWS:
+        return {'code': 400, 'msg': 'window must be hour|day'}, 400
+    limit = max(1, min(request.args.get('limit', default=10, type=int), 100))
+    min_count = request.args.get('min_count', type=int)
+    try:
+        trending_detector.ensure_loaded()
+    except Exception as e:
+        return {'code': 500, 'msg': f'trending detector unavailable: {e}'}, 500
+    data = trending_detector.query(window, limit, min_count=min_count)
+    baseline_hours = trending_detector.baseline_buckets * trending_detector.bucket_minutes / 60
+    return {'code': 0, 'data': data, 'window': window, 'baseline_hours': baseline_hours}
 
 
+def _since(days: int):
+    """近 days 天（含今天往前第 days 天）的起始 UTC 日期"""
+    return datetime.now(timezone.utc).date() - timedelta(days=days)
+
+
+# 以下分析接口只读按日汇总表（data.rollups），不扫描 news_articles / ingest_logs
 @kb_bp.get('/analytics/trend')
+@cached_response(vary=_utc_today)
 def analytics_trend():
     days = request.args.get('days', default=14, type=int)
     db = get_session()
-    # group by date(created_at)
+    R = ArticleDailyRollup
     q = (
-        db.query(func.date(NewsArticle.created_at).label('d'), func.count(NewsArticle.id))
-        .group_by(func.date(NewsArticle.created_at))
-        .order_by(func.date(NewsArticle.created_at).desc())
+        db.query(R.day, func.sum(R.count))
+        .group_by(R.day)
+        .order_by(R.day.desc())
         .limit(days)
         .all()
     )
     # reverse to ascending by date
-    data = [{'date': str(d), 'count': int(c)} for d, c in reversed(q)]
+    data = [{'date': d.isoformat(), 'count': int(c)} for d, c in reversed(q)]
     return {'code': 0, 'data': data}
 
 
 @kb_bp.get('/analytics/sources_trend')
+@cached_response(vary=_utc_today)
 def analytics_sources_trend():
     days = request.args.get('days', default=14, type=int)
     topk = request.args.get('topk', default=5, type=int)
     db = get_session()
+    R = ArticleDailyRollup
+    since = _since(days)
     # 选出近days天内的来源TopK
     q_top = (
-        db.query(NewsArticle.source_name, func.count(NewsArticle.id).label('c'))
-        .filter(func.date(NewsArticle.created_at) >= func.date(func.datetime('now', f'-{days} day')))
-        .group_by(NewsArticle.source_name)
-        .order_by(func.count(NewsArticle.id).desc())
+        db.query(R.source_name, func.sum(R.count).label('c'))
+        .filter(R.day >= since)
+        .group_by(R.source_name)
+        .order_by(func.sum(R.count).desc())
         .limit(topk)
         .all()
     )
-    top_sources = [(s or '-') for s, _ in q_top]
+    top_raw = [s for s, _ in q_top]
+    top_sources = [(s or '-') for s in top_raw]
     # 按天 × 来源 聚合
     q = (
-        db.query(
-            func.date(NewsArticle.created_at).label('d'),
-            NewsArticle.source_name.label('s'),
-            func.count(NewsArticle.id).label('c'),
-        )
-        .filter(func.date(NewsArticle.created_at) >= func.date(func.datetime('now', f'-{days} day')))
-        .filter(NewsArticle.source_name.in_(top_sources))
-        .group_by(func.date(NewsArticle.created_at), NewsArticle.source_name)
+        db.query(R.day, R.source_name, func.sum(R.count))
+        .filter(R.day >= since)
+        .filter(R.source_name.in_(top_raw))
+        .group_by(R.day, R.source_name)
         .all()
     )
     # 生成连续日期
-    from datetime import datetime, timedelta, timezone as _tz
-    today = datetime.now(_tz.utc).date()
+    today = datetime.now(timezone.utc).date()
     day_list = [str(today - timedelta(days=i)) for i in range(days-1, -1, -1)]
     # 填充矩阵 {source: {date: count}}
     matrix: dict[str, dict[str, int]] = {s: {d: 0 for d in day_list} for s in top_sources}
     for d, s, c in q:
         s1 = s or '-'
         matrix.setdefault(s1, {d2:0 for d2 in day_list})
-        matrix[s1][str(d)] = int(c)
+        matrix[s1][d.isoformat()] = int(c)
     series = [
         { 'name': s, 'data': [matrix.get(s, {}).get(d, 0) for d in day_list] }
         for s in top_sources
@@ -372,19 +573,18 @@ def analytics_sources_trend():
 
 
 @kb_bp.get('/analytics/failures_top')
+@cached_response(vary=_utc_today)
 def analytics_failures_top():
     days = request.args.get('days', default=14, type=int)
     db = get_session()
+    E = IngestLogDailyRollup
     # 近days天失败原因Top
     q = (
-        db.query(
-            func.coalesce(IngestLog.error_message, 'unknown').label('err'),
-            func.count(IngestLog.id).label('c')
-        )
-        .filter(IngestLog.status == 'failed')
-        .filter(func.date(IngestLog.created_at) >= func.date(func.datetime('now', f'-{days} day')))
-        .group_by(func.coalesce(IngestLog.error_message, 'unknown'))
-        .order_by(func.count(IngestLog.id).desc())
+        db.query(E.error, func.sum(E.count).label('c'))
+        .filter(E.status == 'failed')
+        .filter(E.day >= _since(days))
+        .group_by(E.error)
+        .order_by(func.sum(E.count).desc())
         .limit(10)
         .all()
     )
@@ -393,26 +593,22 @@ def analytics_failures_top():
 
 
 @kb_bp.get('/analytics/hour_week_heat')
+@cached_response(vary=_utc_today)
 def analytics_hour_week_heat():
     days = request.args.get('days', default=14, type=int)
     db = get_session()
-    # SQLite: %w 0-6 (周日=0), %H 00-23
+    R = ArticleDailyRollup
     q = (
-        db.query(
-            func.strftime('%w', NewsArticle.created_at).label('w'),
-            func.strftime('%H', NewsArticle.created_at).label('h'),
-            func.count(NewsArticle.id).label('c'),
-        )
-        .filter(func.date(NewsArticle.created_at) >= func.date(func.datetime('now', f'-{days} day')))
-        .group_by(func.strftime('%w', NewsArticle.created_at), func.strftime('%H', NewsArticle.created_at))
+        db.query(R.day, R.hour, func.sum(R.count))
+        .filter(R.day >= _since(days))
+        .group_by(R.day, R.hour)
         .all()
     )
     # 构建 7x24 矩阵，周一=1放前，可根据需要调整
     heat = [[0 for _ in range(24)] for _ in range(7)]
-    for w, h, c in q:
-        wi = int(w)  # 0..6，0是周日
-        hi = int(h)
-        heat[wi][hi] = int(c)
+    for d, h, c in q:
+        wi = (d.weekday() + 1) % 7  # 0..6，0是周日
+        heat[wi][int(h)] += int(c)
     return {'code': 0, 'data': { 'matrix': heat, 'weekday0_is_sun': True }}
 
 
@@ -468,22 +664,18 @@ def scheduler_status():
 
 
 @kb_bp.get('/dashboard/summary')
+@cached_response(vary=_utc_today)
 def dashboard_summary():
     db = get_session()
-    total_articles = db.query(func.count(NewsArticle.id)).scalar() or 0
+    # 总数、按日与按来源计数读 kb_counters（主键查找）
+    total_articles = rollups.read_counter(db, 'total')
+    R = ArticleDailyRollup
     # 最近7天入库量（补齐缺失日期）
-    q7 = (
-        db.query(func.date(NewsArticle.created_at).label('d'), func.count(NewsArticle.id))
-        .group_by(func.date(NewsArticle.created_at))
-        .order_by(func.date(NewsArticle.created_at).desc())
-        .limit(14)
-        .all()
-    )
-    q7_map = {str(d): int(c) for d, c in q7}
     from datetime import datetime, timedelta, timezone as _tz
     today_utc = datetime.now(_tz.utc).date()
     days = [today_utc - timedelta(days=i) for i in range(6, -1, -1)]
-    last7 = [{'date': d.isoformat(), 'count': int(q7_map.get(d.isoformat(), 0))} for d in days]
+    q7_map = rollups.read_counters(db, 'day', [d.isoformat() for d in days])
+    last7 = [{'date': d.isoformat(), 'count': q7_map.get(d.isoformat(), 0)} for d in days]
     # 取最新8篇（latest_out 在定义 to_iso_utc 之后再构建）
     latest = db.query(NewsArticle).order_by(NewsArticle.id.desc()).limit(8).all()
     # 计算“知识库更新时间”：手动入库(articles.created_at 最大) 与 自动采集日志(ingest_logs.created_at 最大) 取较新者
@@ -514,22 +706,14 @@ def dashboard_summary():
     today_utc = datetime.now(timezone.utc).date()
     yesterday_utc = today_utc - timedelta(days=1)
 
-    def _count_on(d):
-        return (
-            db.query(func.count(NewsArticle.id))
-            .filter(func.date(NewsArticle.created_at) == str(d))
-            .scalar()
-            or 0
-        )
-
-    today_count = int(_count_on(today_utc))
-    yesterday_count = int(_count_on(yesterday_utc))
+    today_count = q7_map.get(today_utc.isoformat(), 0)
+    yesterday_count = q7_map.get(yesterday_utc.isoformat(), 0)
 
     # Top3 分类
     cat_rows = (
-        db.query(NewsArticle.category, func.count(NewsArticle.id))
-        .group_by(NewsArticle.category)
-        .order_by(func.count(NewsArticle.id).desc())
+        db.query(R.category, func.sum(R.count))
+        .group_by(R.category)
+        .order_by(func.sum(R.count).desc())
         .limit(3)
         .all()
     )
@@ -538,13 +722,7 @@ def dashboard_summary():
     ]
 
     # Top3 来源
-    src_rows = (
-        db.query(NewsArticle.source_name, func.count(NewsArticle.id))
-        .group_by(NewsArticle.source_name)
-        .order_by(func.count(NewsArticle.id).desc())
-        .limit(3)
-        .all()
-    )
+    src_rows = sorted(rollups.read_counters(db, 'source').items(), key=lambda x: -x[1])[:3]
     top_sources = [
         {"name": (s or "-"), "count": int(n)} for s, n in src_rows if (s or "").strip() or n
     ]
@@ -560,8 +738,7 @@ def dashboard_summary():
         } for a in latest
     ]
 
-    from flask import make_response
-    resp = make_response({'code': 0, 'data': {
+    return {'code': 0, 'data': {
         'total_articles': total_articles,
         'last7': last7,
         'latest': latest_out,
@@ -570,10 +747,7 @@ def dashboard_summary():
         'yesterday_count': yesterday_count,
         'top_categories': top_categories,
         'top_sources': top_sources,
-    }})
-    # 禁止缓存，确保删除后立刻反映
-    resp.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    return resp
+    }}
 
 
 @kb_bp.post('/search/qa')
@@ -671,10 +845,13 @@ def kb_item_delete(item_id: int):
     a = db.query(NewsArticle).get(item_id)
     if not a:
         return {'code': 404, 'msg': 'Not Found'}, 404
+    removed = rollups.remove_articles(db, [item_id])
+    release_group_roots(db, [item_id])
     db.delete(a)
     db.commit()
-    # 删除后返回最新总数，避免前端再次请求
-    total_articles = db.query(func.count(NewsArticle.id)).scalar() or 0
+    notify_articles_deleted([item_id], removed)
+    # 删除后返回最新总数（计数器与删除同事务更新），避免前端再次请求
+    total_articles = rollups.read_counter(db, 'total')
     return {'code': 0, 'data': {'id': item_id, 'total': int(total_articles)}}
 
 
@@ -686,9 +863,13 @@ def kb_items_batch_delete():
         return {'code': 400, 'msg': 'ids is required (non-empty list)'}, 400
     db = get_session()
     # 仅删除存在的记录
+    removed = rollups.remove_articles(db, ids)
+    # 被删文章是近似重复组的组首时，组内最早的文章成为新组首
+    release_group_roots(db, ids)
     q = db.query(NewsArticle).filter(NewsArticle.id.in_(ids))
     deleted = q.delete(synchronize_session=False)
     db.commit()
-    total_articles = db.query(func.count(NewsArticle.id)).scalar() or 0
+    notify_articles_deleted([r['id'] for r in removed], removed)
+    total_articles = rollups.read_counter(db, 'total')
     return {'code': 0, 'data': {'deleted': int(deleted), 'total': int(total_articles)}}
 
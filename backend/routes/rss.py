@@ -1,12 +1,15 @@
 from flask import Blueprint, request
-import logging, traceback
+import logging, math, traceback
 from data.db import get_session
-from data.models import RssSource, NewsArticle, IngestLog
-from crawler.ingest_utils import ensure_columns_for_enrich
-from ai.enrich import summarize_text, extract_keywords
+from data.models import RssSource, NewsArticle, IngestLog, IngestLogStage
+from data import rollups
 from ai.embeddings import EmbeddingService, chunk_text
 from config import Settings
 from crawler.ingest import ingest_rss_source
+from crawler import job_queue, ingest_runs
+from crawler.circuit_breaker import circuit_breaker
+from crawler.trending import trending_detector
+from crawler.enrich_pool import get_enrich_pool
 
 rss_bp = Blueprint('rss', __name__)
 
@@ -109,16 +112,8 @@ def trigger_ingest():
         return {'code': 500, 'msg': str(e)}, 500
 
 
-@rss_bp.post('/rss/ingest_all')
-def ingest_all():
-    db = get_session()
-    try:
-        ids = [r.id for r in db.query(RssSource).filter(RssSource.is_active == True).all()]
-    finally:
-        try:
-            db.close()
-        except Exception:
-            pass
+def _run_ingest_all(ids: list, progress=None) -> dict:
+    """批量采集所有给定源并汇总结果（同步接口与后台任务共用）"""
     results = []
     total_created = 0
     total_skipped = 0
@@ -129,9 +124,15 @@ def ingest_all():
         "message": "批量采集完成"
     }
     
+    # 先入队再领取执行：失败的源留在任务队列中按退避时间自动重试；
+    # 手动采集时等待退避的重试任务立即执行
+    job_queue.enqueue(ids, force=True)
+    run = job_queue.run_jobs(source_ids=ids, observer=progress)
+    by_id = {r["id"]: r for r in run["results"]}
     for sid in ids:
-        result = ingest_rss_source(sid)
-        results.append({"id": sid, **result})
+        # 未领取到的源正由其他采集任务执行
+        result = by_id.get(sid) or {"id": sid, "code": 409, "msg": "Ingest already in progress"}
+        results.append(result)
         
         # 汇总统计信息
         if result.get("code") == 0:
@@ -163,27 +164,68 @@ def ingest_all():
             email_summary["message"] = f"批量采集完成，共新增 {total_created} 篇文章，但邮件模块未启用"
     
     return {
-        "code": 0, 
-        "data": {
-            "results": results,
-            "summary": {
-                "total_created": total_created,
-                "total_skipped": total_skipped,
-                "email": email_summary
-            }
-        }
+        "results": results,
+        "summary": {
+            "total_created": total_created,
+            "total_skipped": total_skipped,
+            "email": email_summary
+        },
+        "stages": run["stages"],
+        "elapsed_sec": run["elapsed_sec"],
     }
 
 
+@rss_bp.post('/rss/ingest_all')
+def ingest_all():
+    """后台批量采集：立即返回 job_id，通过 /rss/ingest_all/status 轮询进度；?sync=1 保持同步执行"""
+    db = get_session()
+    try:
+        ids = [r.id for r in db.query(RssSource).filter(RssSource.is_active == True).all()]
+    finally:
+        try:
+            db.close()
+        except Exception:
+            pass
+    if request.args.get('sync', default=0, type=int):
+        return {"code": 0, "data": _run_ingest_all(ids)}
+    # 已有批量采集在执行时直接返回该任务
+    run = ingest_runs.start_run(len(ids), lambda progress: _run_ingest_all(ids, progress))
+    return {"code": 0, "data": run.to_dict()}, 202
+
+
+@rss_bp.get('/rss/ingest_all/status')
+def ingest_all_status():
+    run = ingest_runs.get_run(request.args.get('job_id'))
+    if not run:
+        return {'code': 404, 'msg': 'Job not found'}, 404
+    return {"code": 0, "data": run.to_dict()}
+
+
+@rss_bp.post('/rss/ingest_all/cancel')
+def ingest_all_cancel():
+    job_id = request.args.get('job_id')
+    run = ingest_runs.get_run(job_id) if job_id else ingest_runs.active_run()
+    if not run:
+        return {'code': 404, 'msg': 'Job not found'}, 404
+    run.cancel()
+    return {"code": 0, "data": run.to_dict()}
+
+
 # helper for background scheduler to call
 def ingest_all_sources():
     db = get_session()
-    ids = [r.id for r in db.query(RssSource).filter(RssSource.is_active == True).all()]
-    for sid in ids:
+    try:
+        ids = [r.id for r in db.query(RssSource).filter(RssSource.is_active == True).all()]
+    finally:
         try:
-            ingest_rss_source(sid)
+            db.close()
         except Exception:
             pass
+    try:
+        job_queue.enqueue(ids)
+        job_queue.run_jobs()
+    except Exception:
+        logging.getLogger(__name__).error("Scheduled ingest failed:\n%s", traceback.format_exc())
 
 
 @rss_bp.get('/rss/status')
@@ -193,8 +235,15 @@ def rss_status():
         rows = db.query(IngestLog).order_by(IngestLog.created_at.desc()).limit(100).all()
     except Exception:
         # If table not ready yet, respond gracefully
-        return {"code": 0, "data": []}
-    return {"code": 0, "data": [
+        return {"code": 0, "data": [], "circuit_breakers": circuit_breaker.snapshot()}
+    timings: dict = {}
+    try:
+        stage_rows = db.query(IngestLogStage).filter(IngestLogStage.log_id.in_([r.id for r in rows])).all()
+        for t in stage_rows:
+            timings.setdefault(t.log_id, {})[t.stage] = {"ms": t.duration_ms, "bytes": t.bytes, "items": t.items}
+    except Exception:
+        pass
+    return {"code": 0, "circuit_breakers": circuit_breaker.snapshot(), "data": [
         {
             "id": r.id,
             "source_id": r.source_id,
@@ -204,6 +253,97 @@ def rss_status():
             "skipped": r.skipped,
             "error_message": r.error_message,
             "created_at": r.created_at.isoformat() if r.created_at else None,
+            "timings": timings.get(r.id, {}),
+        } for r in rows
+    ]}
+
+
+# 阶段展示顺序；其他阶段名排在后面
+_STAGE_ORDER = ["request", "download", "archive", "parse", "extract", "dedup", "enrich", "persist", "total"]
+
+
+def _percentile(sorted_vals: list, q: float) -> float:
+    """nearest-rank percentile of an ascending list"""
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(q / 100.0 * len(sorted_vals)) - 1))
+    return round(sorted_vals[k], 3)
+
+
+def _stage_summary(samples: dict) -> list:
+    out = []
+    order = {name: i for i, name in enumerate(_STAGE_ORDER)}
+    for stage in sorted(samples, key=lambda n: (order.get(n, len(order)), n)):
+        durations = sorted(d for d, _ in samples[stage])
+        total_bytes = sum(b for _, b in samples[stage])
+        out.append({
+            "stage": stage,
+            "count": len(durations),
+            "p50_ms": _percentile(durations, 50),
+            "p95_ms": _percentile(durations, 95),
+            "p99_ms": _percentile(durations, 99),
+            "max_ms": round(durations[-1], 3),
+            "total_bytes": total_bytes,
+        })
+    return out
+
+
+@rss_bp.get('/rss/latency')
+def rss_latency():
+    """采集各阶段耗时分位数（p50/p95/p99），整体与按源统计"""
+    from datetime import datetime, timedelta
+    hours = max(1, min(request.args.get('hours', default=24, type=int), 24 * 90))
+    source_id = request.args.get('source_id', type=int)
+    since = datetime.utcnow() - timedelta(hours=hours)
+    db = get_session()
+    try:
+        q = db.query(IngestLogStage.source_id, IngestLogStage.stage, IngestLogStage.duration_ms, IngestLogStage.bytes) \
+            .filter(IngestLogStage.created_at >= since)
+        if source_id:
+            q = q.filter(IngestLogStage.source_id == source_id)
+        rows = q.all()
+    except Exception:
+        rows = []
+    overall: dict = {}
+    per_source: dict = {}
+    for sid, stage, ms, nbytes in rows:
+        sample = (ms or 0.0, nbytes or 0)
+        overall.setdefault(stage, []).append(sample)
+        per_source.setdefault(sid, {}).setdefault(stage, []).append(sample)
+    names = {}
+    if per_source:
+        names = {r.id: r.name for r in db.query(RssSource.id, RssSource.name).filter(RssSource.id.in_([s for s in per_source if s is not None])).all()}
+    return {"code": 0, "data": {
+        "window_hours": hours,
+        "since": since.isoformat(),
+        "stages": _stage_summary(overall),
+        "sources": [
+            {"source_id": sid, "source_name": names.get(sid), "stages": _stage_summary(samples)}
+            for sid, samples in sorted(per_source.items(), key=lambda kv: (kv[0] is None, kv[0] or 0))
+        ],
+    }}
+
+
+@rss_bp.get('/rss/jobs')
+def rss_jobs():
+    """采集任务队列：待重试/执行中/已放弃的任务"""
+    def iso(dt):
+        return dt.isoformat() if dt else None
+    try:
+        rows = job_queue.list_jobs()
+    except Exception:
+        return {"code": 0, "data": []}
+    return {"code": 0, "data": [
+        {
+            "id": r["id"],
+            "source_id": r["source_id"],
+            "status": r["status"],
+            "attempt": r["attempt"],
+            "next_run_at": iso(r["next_run_at"]),
+            "lease_owner": r["lease_owner"],
+            "lease_expires_at": iso(r["lease_expires_at"]),
+            "last_error": r["last_error"],
+            "created_at": iso(r["created_at"]),
         } for r in rows
     ]}
 
@@ -211,18 +351,20 @@ def rss_status():
 @rss_bp.post('/rss/re_enrich')
 def re_enrich():
     db = get_session()
-    ensure_columns_for_enrich()
     # re-enrich latest N articles
     limit = request.args.get('limit', default=50, type=int)
     rows = db.query(NewsArticle).order_by(NewsArticle.id.desc()).limit(limit).all()
     updated = 0
-    for a in rows:
-        summary = summarize_text(a.content or '', max_chars=200)
-        keywords = ",".join(extract_keywords((a.title or '') + ' ' + (a.content or ''), top_k=8))
+    # 文本加工交给进程池，不阻塞本进程其它请求
+    enriched = get_enrich_pool().run([(a.title or '', a.content or '') for a in rows])
+    for a, (_, summary, keywords) in zip(rows, enriched):
         a.summary = summary
         a.keywords = keywords
         updated += 1
+    rollups.set_article_keywords(db, [(a.id, a.created_at, a.keywords) for a in rows])
     db.commit()
+    # 关键词已改写：热词检测器下次查询时从库中重建
+    trending_detector.invalidate()
     return {"code": 0, "data": {"updated": updated}}
 
 
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark simhash implementations on analysed articles.
+
+  md5 loop      md5 hexdigest per token occurrence, 64-step Python loop (original)
+  numpy         FNV-1a/fmix64 hashes + (tokens, 64) bit matrix, one call per article
+  numpy batch   simhash_many(): one hashing/unpacking pass per batch of articles (ingest path)
+
+Usage:
+  uv run python backend/scripts/bench_simhash.py
+  uv run python backend/scripts/bench_simhash.py --db ../hua_news.db --limit 2000 --batch 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+if str(BACKEND) not in sys.path:
+    sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from ai.analysis import analyze  # noqa: E402
+from crawler.ingest_utils import simhash, simhash_many, hamming_distance  # noqa: E402
+from bench_text_analysis import synthetic_corpus, db_corpus  # noqa: E402
+
+
+def md5_loop_simhash(tokens, bits: int = 64) -> int:
+    if not tokens:
+        return 0
+    v = [0] * bits
+    for token in tokens:
+        h = int(hashlib.md5(token.encode("utf-8")).hexdigest(), 16)
+        for i in range(bits):
+            v[i] += 1 if (h >> i) & 1 else -1
+    fingerprint = 0
+    for i in range(bits):
+        if v[i] >= 0:
+            fingerprint |= (1 << i)
+    return fingerprint
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", help="SQLite file to sample news_articles from (default: synthetic corpus)")
+    ap.add_argument("--limit", type=int, default=1000, help="articles to benchmark")
+    ap.add_argument("--batch", type=int, default=50, help="articles per simhash_many call (PIPELINE_BATCH_SIZE)")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per variant, best is reported")
+    args = ap.parse_args()
+
+    docs = db_corpus(args.db, args.limit) if args.db else synthetic_corpus(args.limit)
+    if not docs:
+        print("no articles found")
+        return
+    analyses = [analyze(t, c) for t, c in docs]
+    counts = [a.counts for a in analyses]
+    n_tokens = sum(len(a.tokens) for a in analyses)
+    n_unique = sum(len(c) for c in counts)
+    print(f"corpus: {len(docs)} articles, {n_tokens / len(docs):.0f} tokens ({n_unique / len(docs):.0f} distinct)/article")
+
+    def run_batches():
+        for i in range(0, len(counts), args.batch):
+            simhash_many(counts[i:i + args.batch])
+
+    results = [
+        ("md5 loop", timed(lambda: [md5_loop_simhash(a.tokens) for a in analyses], args.repeat)),
+        ("numpy", timed(lambda: [simhash("", counts=c) for c in counts], args.repeat)),
+        (f"numpy batch={args.batch}", timed(run_batches, args.repeat)),
+    ]
+    base = results[0][1]
+    for name, sec in results:
+        print(f"{name:<18} {sec:8.3f}s  {sec / len(docs) * 1e6:9.1f} us/article  {base / sec:6.1f}x")
+
+    # weighting by counts must equal hashing every occurrence; batch must equal per-article
+    per_doc = [simhash("", counts=c) for c in counts]
+    same_batch = per_doc == simhash_many(counts)
+    from crawler.ingest_utils import simhash_tokens
+    same_weighted = all(simhash_tokens(a.tokens) == fp for a, fp in zip(analyses[:200], per_doc))
+    print(f"batch == per-article: {same_batch}, weighted == per-occurrence: {same_weighted}")
+    if len(docs) > 1:
+        print(f"hamming(doc0, doc0 + extra sentence) = "
+              f"{hamming_distance(per_doc[0], simhash(docs[0][0] + ' ' + docs[0][1] + ' 补充一句。'))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark mixed read/write throughput of the SQLite connection profiles (data.db.SQLITE_PROFILES).
+
+Each profile gets a fresh database file seeded with --seed articles. Writer threads then insert
+small batches through bulk_insert_articles (as the ingest pipeline does) while reader threads
+page the KB list and read the dashboard counters, for --seconds. Reported per profile:
+committed writes/s, reads/s, read p95 latency and "database is locked" errors.
+
+Usage:
+  uv run python backend/scripts/bench_sqlite_profiles.py
+  uv run python backend/scripts/bench_sqlite_profiles.py --profiles default balanced --writers 4 --readers 8 --seconds 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+if str(BACKEND) not in sys.path:
+    sys.path.insert(0, str(BACKEND))
+
+from sqlalchemy import select  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from config import Settings  # noqa: E402
+from data import db as _db, rollups  # noqa: E402
+from data.bulk import bulk_insert_articles  # noqa: E402
+from data.migrations import run_migrations  # noqa: E402
+from data.models import NewsArticle  # noqa: E402
+
+SOURCES = ["BBC News", "Reuters", "新华网", "人民网", "TechCrunch"]
+CATEGORIES = ["world", "tech", "finance", "sports", None]
+
+
+def make_rows(n: int, rnd: random.Random) -> list:
+    now = datetime.utcnow()
+    return [
+        {
+            "title": f"bench article {rnd.getrandbits(48):x}",
+            "content": "正文内容 lorem ipsum " * rnd.randint(20, 200),
+            "source_name": rnd.choice(SOURCES),
+            "category": rnd.choice(CATEGORIES),
+            "created_at": now - timedelta(minutes=rnd.randint(0, 60 * 24 * 30)),
+            "keywords": ",".join(rnd.sample(["AI", "经济", "选举", "气候", "芯片", "体育"], 3)),
+        }
+        for _ in range(n)
+    ]
+
+
+def run_profile(profile: str, args) -> dict:
+    tmp = tempfile.mkdtemp(prefix=f"bench_sqlite_{profile}_")
+    settings = Settings(database_url=f"sqlite:///{tmp}/bench.db", sqlite_profile=profile)
+    _db.init_db(settings.database_url, settings)
+    run_migrations()
+    rnd = random.Random(0)
+    bulk_insert_articles(make_rows(args.seed, rnd), chunk_size=500)
+
+    stop = threading.Event()
+    lock = threading.Lock()
+    stats = {"writes": 0, "reads": 0, "locked": 0, "latencies": []}
+    t = NewsArticle.__table__
+
+    def writer(i: int):
+        wr = random.Random(1000 + i)
+        while not stop.is_set():
+            try:
+                bulk_insert_articles(make_rows(args.batch, wr), chunk_size=args.batch)
+                with lock:
+                    stats["writes"] += args.batch
+            except OperationalError:
+                with lock:
+                    stats["locked"] += 1
+
+    def reader(i: int):
+        rr = random.Random(2000 + i)
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                with _db.engine.connect() as conn:
+                    if rr.random() < 0.5:
+                        # 知识库列表首页（按 created_at, id 游标分页）
+                        conn.execute(
+                            select(t.c.id, t.c.title, t.c.source_name, t.c.created_at)
+                            .order_by(t.c.created_at.desc(), t.c.id.desc()).limit(20)
+                        ).all()
+                    else:
+                        rollups.read_counter(conn, "total")
+                        rollups.read_counters(conn, "source")
+                elapsed = time.perf_counter() - started
+                with lock:
+                    stats["reads"] += 1
+                    stats["latencies"].append(elapsed)
+            except OperationalError:
+                with lock:
+                    stats["locked"] += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for th in threads:
+        th.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for th in threads:
+        th.join()
+
+    with _db.engine.connect() as conn:
+        journal = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+        sync = conn.exec_driver_sql("PRAGMA synchronous").scalar()
+    _db.close_db()
+
+    lat = sorted(stats["latencies"])
+    return {
+        "profile": profile,
+        "journal": journal,
+        "synchronous": sync,
+        "writes_s": stats["writes"] / args.seconds,
+        "reads_s": stats["reads"] / args.seconds,
+        "read_p95_ms": lat[int(len(lat) * 0.95) - 1] * 1000 if lat else 0.0,
+        "locked": stats["locked"],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--profiles", nargs="+", default=list(_db.SQLITE_PROFILES), choices=list(_db.SQLITE_PROFILES))
+    ap.add_argument("--seed", type=int, default=5000, help="articles inserted before the timed phase")
+    ap.add_argument("--writers", type=int, default=2, help="writer threads")
+    ap.add_argument("--readers", type=int, default=4, help="reader threads")
+    ap.add_argument("--batch", type=int, default=10, help="articles per write transaction")
+    ap.add_argument("--seconds", type=float, default=10.0, help="timed phase per profile")
+    args = ap.parse_args()
+
+    print(f"{'profile':<10} {'journal':<8} {'sync':>4} {'writes/s':>10} {'reads/s':>10} {'read p95':>10} {'locked':>7}")
+    for profile in args.profiles:
+        r = run_profile(profile, args)
+        print(f"{r['profile']:<10} {r['journal']:<8} {r['synchronous']:>4} {r['writes_s']:>10.0f} "
+              f"{r['reads_s']:>10.0f} {r['read_p95_ms']:>8.1f}ms {r['locked']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-article enrichment CPU: legacy three-pass tokenization vs single-pass analysis.
+
+Legacy = simhash(title + " " + content) with its own tokenizer, extract_keywords() with
+_WORD_RE and summarize_text()'s sentence split, each re-scanning (and lower-casing) the
+text. Single pass = ai.analysis.analyze() once, shared by all three.
+
+Usage:
+  uv run python backend/scripts/bench_text_analysis.py                 # synthetic zh/en corpus
+  uv run python backend/scripts/bench_text_analysis.py --db ../hua_news.db --limit 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import random
+import re
+import sqlite3
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+if str(BACKEND) not in sys.path:
+    sys.path.insert(0, str(BACKEND))
+
+from ai.analysis import analyze  # noqa: E402
+from ai.enrich import summarize_text, extract_keywords, _STOPWORDS  # noqa: E402
+from crawler.ingest_utils import simhash  # noqa: E402
+
+
+# ---- legacy implementations (as they were before single-pass analysis) -------------------
+
+_LEGACY_WORD_RE = re.compile(r"[\w\u4e00-\u9fff]{2,}")
+
+
+def legacy_simhash(text_: str, bits: int = 64) -> int:
+    tokens = re.findall(r"[\w\u4e00-\u9fff]+", (text_ or "").lower())
+    if not tokens:
+        return 0
+    v = [0] * bits
+    for token in tokens:
+        h = int(hashlib.md5(token.encode("utf-8")).hexdigest(), 16)
+        for i in range(bits):
+            v[i] += 1 if (h >> i) & 1 else -1
+    fingerprint = 0
+    for i in range(bits):
+        if v[i] >= 0:
+            fingerprint |= (1 << i)
+    return fingerprint
+
+
+def legacy_keywords(text: str, top_k: int = 10):
+    tokens = [t.lower() for t in _LEGACY_WORD_RE.findall(text)]
+    tokens = [t for t in tokens if t not in _STOPWORDS and len(t) > 1]
+    return [w for w, _ in Counter(tokens).most_common(top_k)]
+
+
+def legacy_enrich(title: str, content: str):
+    sh = legacy_simhash(title + " " + content)
+    summary = summarize_text(content, max_chars=200)
+    keywords = legacy_keywords(title + " " + content, top_k=8)
+    return sh, summary, keywords
+
+
+def single_pass_enrich(title: str, content: str):
+    analysis = analyze(title, content)
+    sh = simhash("", counts=analysis.counts)
+    summary = summarize_text(content, max_chars=200, sentences=analysis.sentence_texts())
+    keywords = extract_keywords("", top_k=8, counts=analysis.counts)
+    return sh, summary, keywords
+
+
+# ---- corpus ----------------------------------------------------------------------------
+
+_ZH = [
+    "人工智能在医疗影像领域取得重要进展，多家医院开始试点辅助诊断系统。",
+    "国家统计局今日发布数据显示，前三季度国内生产总值同比增长百分之五点二。",
+    "新能源汽车销量持续攀升，充电基础设施建设成为地方政府关注的重点。",
+    "研究人员表示，大模型的推理成本仍然较高，企业部署时需要权衡性能与费用。",
+    "专家认为，芯片供应链的稳定性将直接影响消费电子行业明年的出货量。",
+    "教育部门发布通知，要求各地加强校园网络安全与学生个人信息保护。",
+]
+_EN = [
+    "The central bank kept interest rates unchanged, citing persistent inflation in services.",
+    "Researchers released an open-source model that matches larger systems on reasoning benchmarks.",
+    "Shares of chipmakers rose after the company reported record data-center revenue.",
+    "Officials said the new policy would take effect next quarter, pending final approval.",
+]
+
+
+def synthetic_corpus(n: int, seed: int = 7):
+    rnd = random.Random(seed)
+    docs = []
+    for _ in range(n):
+        zh = rnd.random() < 0.7
+        bank = _ZH if zh else _EN
+        sentences = [rnd.choice(bank) for _ in range(rnd.randint(4, 30))]
+        content = ("" if zh else " ").join(sentences)
+        title = rnd.choice(bank)[:rnd.randint(12, 40)]
+        docs.append((title, content))
+    return docs
+
+
+def db_corpus(path: str, limit: int):
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT title, content FROM news_articles WHERE content IS NOT NULL ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [(t or "", c or "") for t, c in rows]
+
+
+def bench(fn, docs, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for title, content in docs:
+            fn(title, content)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", help="SQLite file to sample news_articles from (default: synthetic corpus)")
+    ap.add_argument("--limit", type=int, default=1000, help="articles to benchmark")
+    ap.add_argument("--repeat", type=int, default=3, help="runs per variant, best is reported")
+    args = ap.parse_args()
+
+    docs = db_corpus(args.db, args.limit) if args.db else synthetic_corpus(args.limit)
+    if not docs:
+        print("no articles found")
+        return
+    chars = sum(len(t) + len(c) for t, c in docs)
+    print(f"corpus: {len(docs)} articles, {chars / len(docs):.0f} chars/article")
+
+    legacy = bench(legacy_enrich, docs, args.repeat)
+    single = bench(single_pass_enrich, docs, args.repeat)
+    same_summary = all(legacy_enrich(t, c)[1] == single_pass_enrich(t, c)[1] for t, c in docs)
+    for name, sec in (("legacy (3 passes)", legacy), ("single pass", single)):
+        print(f"{name:<18} {sec:8.3f}s  {sec / len(docs) * 1e6:9.1f} us/article")
+    print(f"speedup: {legacy / single:.2f}x, summaries identical: {same_summary}")
+
+
+if __name__ == "__main__":
+    main()
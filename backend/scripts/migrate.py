@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+执行数据库结构迁移（data/migrations.py）
+
+Usage:
+  uv run python backend/scripts/migrate.py            # 执行全部待执行迁移
+  uv run python backend/scripts/migrate.py --status   # 查看当前版本与待执行迁移
+  uv run python backend/scripts/migrate.py --to 3     # 只迁移到指定版本
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+if str(BACKEND) not in sys.path:
+    sys.path.insert(0, str(BACKEND))
+
+from config import Settings  # noqa: E402
+from data import db as _db  # noqa: E402
+from data.migrations import current_version, pending_migrations, run_migrations  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Apply database schema migrations")
+    ap.add_argument("--status", action="store_true", help="show current version and pending migrations")
+    ap.add_argument("--to", type=int, default=None, help="migrate up to this version only")
+    args = ap.parse_args()
+
+    settings = Settings()
+    _db.init_db(settings.database_url, settings)
+    print(f"数据库: {settings.database_url}")
+    print(f"当前版本: {current_version()}")
+    if args.status:
+        pending = pending_migrations()
+        for version, name, _ in pending:
+            print(f"  待执行 {version:>3}  {name}")
+        if not pending:
+            print("没有待执行的迁移")
+        return
+    applied = run_migrations(target=args.to)
+    for version in applied:
+        print(f"✓ 已执行迁移 {version}")
+    print(f"完成，当前版本: {current_version()}")
+
+
+if __name__ == "__main__":
+    main()
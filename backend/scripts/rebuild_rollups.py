@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+重建分析汇总表（article_daily_rollup / ingest_log_daily_rollup / article_keywords）并校正 kb_counters
+
+汇总表在写入/删除时增量维护；直接改库、恢复备份或怀疑计数有偏差时，
+用本脚本从 news_articles / ingest_logs 全量回填（单个事务，期间读到的仍是旧汇总）。
+
+Usage:
+  uv run python backend/scripts/rebuild_rollups.py
+  uv run python backend/scripts/rebuild_rollups.py --extract-missing   # 先为没有关键词的文章提取并保存关键词
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+if str(BACKEND) not in sys.path:
+    sys.path.insert(0, str(BACKEND))
+
+from sqlalchemy import bindparam, select, update  # noqa: E402
+
+from ai.enrich import extract_keywords  # noqa: E402
+from config import Settings  # noqa: E402
+from data import db as _db, rollups  # noqa: E402
+from data.migrations import run_migrations  # noqa: E402
+from data.models import NewsArticle  # noqa: E402
+
+
+def extract_missing_keywords(batch: int = 500) -> int:
+    """Store keywords for articles that have none (older manual/imported rows)."""
+    t = NewsArticle.__table__
+    done, last_id = 0, 0
+    while True:
+        with _db.engine.begin() as conn:
+            rows = conn.execute(
+                select(t.c.id, t.c.title, t.c.content)
+                .where(t.c.id > last_id, (t.c.keywords.is_(None)) | (t.c.keywords == ""))
+                .order_by(t.c.id).limit(batch)
+            ).all()
+            if not rows:
+                return done
+            conn.execute(
+                update(t).where(t.c.id == bindparam("b_id")).values(keywords=bindparam("kw")),
+                [{"b_id": r.id, "kw": ",".join(extract_keywords(f"{r.title or ''} {r.content or ''}", top_k=8))}
+                 for r in rows],
+            )
+        done += len(rows)
+        last_id = rows[-1].id
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Rebuild the analytics rollup tables")
+    ap.add_argument("--extract-missing", action="store_true",
+                    help="extract and store keywords for articles without any first")
+    args = ap.parse_args()
+
+    settings = Settings()
+    _db.init_db(settings.database_url, settings)
+    run_migrations()
+    started = time.perf_counter()
+    if args.extract_missing:
+        print(f"已为 {extract_missing_keywords()} 篇文章补充关键词")
+    with _db.engine.begin() as conn:
+        stats = rollups.rebuild(conn)
+    print(f"完成：文章汇总 {stats['article_rows']} 行，采集日志汇总 {stats['ingest_log_rows']} 行，"
+          f"关键词 {stats['keyword_rows']} 行，校正计数器 {stats['counter_fixes']} 项，耗时 {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+重新计算已入库文章的 simhash 指纹
+
+simhash 改用 FNV-1a/fmix64 词哈希后，旧指纹（md5）与新指纹不可比较。迁移 11
+（news_articles_simhash_version）会在升级时自动重新计算一次；本脚本用于手动补算
+simhash_version 不是当前版本的文章（例如 DB_AUTO_MIGRATE=false 时、或升级期间旧版本
+服务仍在写入），--all 则全部重算。近似重复索引只加载当前版本的指纹；运行中的服务会在
+INDEX_SYNC_SEC 内重建索引。
+
+Usage:
+  uv run python backend/scripts/recompute_simhash.py [--batch 500] [--all]
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+if str(BACKEND) not in sys.path:
+    sys.path.insert(0, str(BACKEND))
+
+from config import Settings  # noqa: E402
+from data import db as _db, rollups  # noqa: E402
+from data.migrations import run_migrations  # noqa: E402
+from crawler.near_dup import recompute_fingerprints  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Recompute simhash fingerprints of stored articles")
+    ap.add_argument("--batch", type=int, default=500, help="articles per query")
+    ap.add_argument("--all", action="store_true", help="recompute every article, not only stale fingerprints")
+    args = ap.parse_args()
+
+    settings = Settings()
+    _db.init_db(settings.database_url, settings)
+    run_migrations()
+    with _db.engine.begin() as conn:
+        total = recompute_fingerprints(conn, batch=args.batch, stale_only=not args.all)
+        if total:
+            # 运行中的服务据此重建近似重复索引（core.index_sync）
+            rollups.bump_index_epoch(conn)
+    print(f"完成，共重新计算 {total} 篇文章的 simhash")
+
+
+if __name__ == "__main__":
+    main()
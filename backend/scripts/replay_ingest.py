@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Offline ingest replay: serve recorded feed fixtures from a local HTTP server and run
+the ingest pipeline against a temporary SQLite database.
+
+Served feeds:
+  fixtures/feeds/*.xml      recorded / hand-written RSS and Atom (incl. malformed ones)
+  generated large feeds     --large-feeds feeds of --large-items synthetic zh/en articles
+
+Each run starts from an empty database, so every run ingests the same articles.
+Reported per run: articles/sec, per-stage time (sum over sources, from
+ingest_log_stages), process peak RSS and, with --tracemalloc, the Python heap peak.
+
+Usage:
+  uv run python backend/scripts/replay_ingest.py                          # ingest_all path
+  uv run python backend/scripts/replay_ingest.py --mode single --runs 3   # ingest_rss_source per source
+  uv run python backend/scripts/replay_ingest.py --json after.json --compare before.json
+  uv run python backend/scripts/replay_ingest.py --record --db ../hua_news.db   # record active sources
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+BACKEND = Path(__file__).resolve().parents[1]
+if str(BACKEND) not in sys.path:
+    sys.path.insert(0, str(BACKEND))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures" / "feeds"
+STAGE_ORDER = ["request", "download", "archive", "parse", "extract", "dedup", "enrich", "persist", "total"]
+
+
+# ---- recording ------------------------------------------------------------------------
+
+def record(db_path: str, out_dir: Path, timeout: float):
+    """Download the feeds of active sources in ``db_path`` into ``out_dir``."""
+    import requests
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute("SELECT id, name, url FROM rss_sources WHERE is_active = 1 ORDER BY id").fetchall()
+    finally:
+        conn.close()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for sid, name, url in rows:
+        slug = re.sub(r"[^0-9A-Za-z]+", "_", name or "").strip("_").lower()[:40] or "source"
+        path = out_dir / f"recorded_{sid}_{slug}.xml"
+        try:
+            resp = requests.get(url, timeout=timeout, headers={"User-Agent": "hua-news-replay-recorder"})
+            resp.raise_for_status()
+        except Exception as e:
+            print(f"✗ {name} ({url}): {e}")
+            continue
+        path.write_bytes(resp.content)
+        print(f"✓ {name}: {len(resp.content)} bytes -> {path.name}")
+
+
+# ---- fixtures server ------------------------------------------------------------------
+
+def large_feed(index: int, items: int) -> bytes:
+    from bench_text_analysis import synthetic_corpus
+
+    parts = []
+    for i, (title, content) in enumerate(synthetic_corpus(items, seed=100 + index)):
+        parts.append(
+            f"<item><title>{escape(title)} #{i}</title>"
+            f"<link>http://replay.local/large{index}/{i}</link>"
+            f"<pubDate>Mon, 06 Oct 2025 08:00:00 GMT</pubDate>"
+            f"<description>{escape('<p>' + content + '</p>')}</description></item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel>'
+        f"<title>Large synthetic feed {index}</title>{''.join(parts)}</channel></rss>"
+    ).encode("utf-8")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    pages: dict = {}
+
+    def do_GET(self):
+        body = self.pages.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/xml; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(pages: dict) -> tuple[ThreadingHTTPServer, str]:
+    _Handler.pages = pages
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# ---- replay ---------------------------------------------------------------------------
+
+def peak_rss_mb() -> float | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round((kb / 1024 / 1024 if sys.platform == "darwin" else kb / 1024), 1)
+
+
+def replay_once(feeds: dict, base_url: str, mode: str, workdir: Path, run_no: int, trace: bool) -> dict:
+    from sqlalchemy import func
+
+    from config import Settings
+    from data import db as _db
+    from data.migrations import run_migrations
+    from data.models import IngestLogStage, RssSource
+    from crawler import job_queue
+    from crawler.circuit_breaker import circuit_breaker
+    from crawler.ingest import ingest_rss_source
+    from crawler.near_dup import simhash_index
+
+    settings = Settings()
+    db_file = workdir / f"replay_{run_no}.db"
+    _db.close_db()
+    _db.init_db(f"sqlite:///{db_file}", settings)
+    run_migrations(_db.engine)
+    simhash_index.rebuild()
+    circuit_breaker.reset()
+
+    db = _db.get_session()
+    for name in feeds:
+        db.add(RssSource(name=name, url=f"{base_url}/{name}", category="replay", is_active=True))
+    db.commit()
+    ids = [r.id for r in db.query(RssSource.id).order_by(RssSource.id)]
+    db.close()
+
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    if mode == "single":
+        results = [{"id": sid, **ingest_rss_source(sid)} for sid in ids]
+    else:
+        job_queue.enqueue(ids)
+        results = job_queue.run_jobs(source_ids=ids)["results"]
+    elapsed = time.perf_counter() - started
+    heap_peak = None
+    if trace:
+        heap_peak = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 1)
+        tracemalloc.stop()
+
+    db = _db.get_session()
+    stage_rows = (
+        db.query(IngestLogStage.stage, func.sum(IngestLogStage.duration_ms), func.sum(IngestLogStage.items),
+                 func.sum(IngestLogStage.bytes))
+        .group_by(IngestLogStage.stage)
+        .all()
+    )
+    db.close()
+    stages = {s: {"ms": round(ms or 0, 1), "items": int(items or 0), "bytes": int(nbytes or 0)}
+              for s, ms, items, nbytes in stage_rows}
+    names = dict(zip(ids, feeds))
+    sources = []
+    for r in results:
+        data = r.get("data") or {}
+        sources.append({"name": names.get(r["id"]), "code": r.get("code"), "created": data.get("created", 0),
+                        "skipped": data.get("skipped", 0), "msg": r.get("msg")})
+    created = sum(s["created"] for s in sources)
+    return {
+        "run": run_no,
+        "mode": mode,
+        "elapsed_sec": round(elapsed, 3),
+        "created": created,
+        "skipped": sum(s["skipped"] for s in sources),
+        "failed_sources": sum(1 for s in sources if s["code"] != 0),
+        "articles_per_sec": round(created / elapsed, 1) if elapsed else None,
+        "stages": dict(sorted(stages.items(), key=lambda kv: _stage_key(kv[0]))),
+        "peak_rss_mb": peak_rss_mb(),
+        "heap_peak_mb": heap_peak,
+        "sources": sources,
+    }
+
+
+def _stage_key(name: str):
+    return (STAGE_ORDER.index(name) if name in STAGE_ORDER else len(STAGE_ORDER), name)
+
+
+def print_run(r: dict, verbose: bool):
+    mem = f"peak RSS {r['peak_rss_mb']} MB" + (f", heap peak {r['heap_peak_mb']} MB" if r["heap_peak_mb"] is not None else "")
+    print(f"run {r['run']} [{r['mode']}]: {r['created']} created, {r['skipped']} skipped, "
+          f"{r['failed_sources']} failed sources in {r['elapsed_sec']:.2f}s "
+          f"-> {r['articles_per_sec']} articles/s; {mem}")
+    for name, s in r["stages"].items():
+        print(f"    {name:<10} {s['ms']:10.1f} ms  items={s['items']:<7} bytes={s['bytes']}")
+    if verbose:
+        for s in r["sources"]:
+            print(f"    · {s['name']:<32} code={s['code']} created={s['created']} skipped={s['skipped']}"
+                  + (f" msg={s['msg']}" if s["msg"] else ""))
+
+
+def summarize(runs: list) -> dict:
+    """Median over runs (the first run also pays imports and pool start-up)."""
+    def median(vals):
+        vals = sorted(v for v in vals if v is not None)
+        return vals[len(vals) // 2] if vals else None
+
+    stage_names = sorted({n for r in runs for n in r["stages"]}, key=_stage_key)
+    return {
+        "runs": len(runs),
+        "articles_per_sec": median([r["articles_per_sec"] for r in runs]),
+        "elapsed_sec": median([r["elapsed_sec"] for r in runs]),
+        "created": runs[-1]["created"],
+        "stages_ms": {n: median([r["stages"].get(n, {}).get("ms") for r in runs]) for n in stage_names},
+        "peak_rss_mb": max((r["peak_rss_mb"] or 0) for r in runs),
+        "heap_peak_mb": median([r["heap_peak_mb"] for r in runs]),
+    }
+
+
+def compare(current: dict, baseline: dict):
+    def delta(new, old, higher_is_better=False):
+        if not new or not old:
+            return ""
+        pct = (new - old) / old * 100
+        better = pct > 0 if higher_is_better else pct < 0
+        return f"{pct:+.1f}% {'✓' if better else '✗'}"
+
+    print("\ncompared with baseline:")
+    print(f"  articles/s   {baseline.get('articles_per_sec')} -> {current['articles_per_sec']}  "
+          f"{delta(current['articles_per_sec'], baseline.get('articles_per_sec'), True)}")
+    for name, ms in current["stages_ms"].items():
+        old = (baseline.get("stages_ms") or {}).get(name)
+        print(f"  {name:<12} {old} -> {ms} ms  {delta(ms, old)}")
+    print(f"  peak RSS     {baseline.get('peak_rss_mb')} -> {current['peak_rss_mb']} MB")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--mode", choices=["all", "single"], default="all",
+                    help="all: job queue + one pipeline run (ingest_all); single: ingest_rss_source per source")
+    ap.add_argument("--runs", type=int, default=3, help="replays, each on a fresh database")
+    ap.add_argument("--fixtures", default=str(FIXTURES), help="directory of recorded *.xml feeds")
+    ap.add_argument("--large-feeds", type=int, default=2, help="generated large feeds")
+    ap.add_argument("--large-items", type=int, default=2000, help="articles per generated feed")
+    ap.add_argument("--tracemalloc", action="store_true", help="track Python heap peak (slows the run)")
+    ap.add_argument("--json", help="write run results and summary to this file")
+    ap.add_argument("--compare", help="baseline JSON written by an earlier --json run")
+    ap.add_argument("--keep", action="store_true", help="keep the temporary databases")
+    ap.add_argument("-v", "--verbose", action="store_true", help="print per-source results")
+    ap.add_argument("--record", action="store_true", help="record feeds of active sources instead of replaying")
+    ap.add_argument("--db", help="SQLite file to read sources from (--record)")
+    ap.add_argument("--timeout", type=float, default=15, help="download timeout for --record")
+    args = ap.parse_args()
+
+    if args.record:
+        if not args.db:
+            ap.error("--record needs --db")
+        record(args.db, Path(args.fixtures), args.timeout)
+        return
+
+    workdir = Path(tempfile.mkdtemp(prefix="hua_replay_"))
+    # Settings reads the environment at import time: configure before importing app modules
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'replay_0.db'}"
+    os.environ.setdefault("RATE_LIMIT_DOMAIN_QPS", "1000")
+    os.environ.setdefault("ENABLE_ARTICLE_FETCH", "false")
+    os.environ.setdefault("FEED_ARCHIVE_DIR", str(workdir / "feed_archive"))
+
+    feeds = {p.name: p.read_bytes() for p in sorted(Path(args.fixtures).glob("*.xml"))}
+    for i in range(args.large_feeds):
+        feeds[f"large_{i}.xml"] = large_feed(i, args.large_items)
+    total_bytes = sum(len(b) for b in feeds.values())
+    print(f"{len(feeds)} feeds, {total_bytes / 1024 / 1024:.1f} MB, work dir {workdir}")
+
+    server, base_url = serve({f"/{name}": body for name, body in feeds.items()})
+    runs = []
+    try:
+        for n in range(1, max(1, args.runs) + 1):
+            result = replay_once(feeds, base_url, args.mode, workdir, n, args.tracemalloc)
+            print_run(result, args.verbose)
+            runs.append(result)
+    finally:
+        server.shutdown()
+        from data import db as _db
+        _db.close_db()
+        if not args.keep:
+            for f in workdir.glob("replay_*.db*"):
+                f.unlink()
+            shutil.rmtree(workdir / "feed_archive", ignore_errors=True)
+
+    summary = summarize(runs)
+    print(f"\nmedian of {summary['runs']} runs: {summary['articles_per_sec']} articles/s, "
+          f"{summary['elapsed_sec']}s, peak RSS {summary['peak_rss_mb']} MB")
+    if args.compare:
+        compare(summary, json.loads(Path(args.compare).read_text(encoding="utf-8")).get("summary", {}))
+    if args.json:
+        Path(args.json).write_text(json.dumps({"summary": summary, "runs": runs}, ensure_ascii=False, indent=2),
+                                   encoding="utf-8")
+        print(f"results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
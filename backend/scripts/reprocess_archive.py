@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+从原始 feed 归档重新处理文章（不访问网络）
+
+按抓取时间从新到旧读取归档的 feed 正文（相同内容只解析一次），重新执行解析
+（clean_html_to_text 等）与文本加工（simhash/摘要/关键词），更新已入库文章；
+同一 URL 以最新一次抓取为准。RSS 中没有正文、入库时靠网页抽取补全的条目不会被覆盖。
+写入会递增数据版本号与 index_epoch，运行中的服务随之使响应缓存失效并重建内存索引。
+
+Usage:
+  uv run python backend/scripts/reprocess_archive.py                       # 全部归档
+  uv run python backend/scripts/reprocess_archive.py --source-id 3 --since 2025-09-01
+  uv run python backend/scripts/reprocess_archive.py --insert-missing      # 同时补入库中没有的条目
+  uv run python backend/scripts/reprocess_archive.py --dry-run
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+BACKEND = Path(__file__).resolve().parents[1]
+if str(BACKEND) not in sys.path:
+    sys.path.insert(0, str(BACKEND))
+
+import feedparser  # noqa: E402
+from sqlalchemy import bindparam, select, update  # noqa: E402
+
+from config import Settings  # noqa: E402
+from data import db as _db, rollups  # noqa: E402
+from data.bulk import bulk_insert_articles  # noqa: E402
+from data.migrations import run_migrations  # noqa: E402
+from data.models import FeedArchiveEntry, NewsArticle, RssSource, article_search_fields  # noqa: E402
+from crawler.enrich_pool import get_enrich_pool  # noqa: E402
+from crawler.feed_archive import read_blob  # noqa: E402
+from crawler.ingest import _entry_to_item, _hash_url  # noqa: E402
+from crawler.ingest_utils import SIMHASH_VERSION  # noqa: E402
+
+
+def parse_day(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def archived_snapshots(source_ids, since, until):
+    """(sha256, source_id) of archived bodies, newest fetch first, each body once."""
+    t = FeedArchiveEntry.__table__
+    q = select(t.c.sha256, t.c.source_id, t.c.url).order_by(t.c.fetched_at.desc(), t.c.id.desc())
+    if source_ids:
+        q = q.where(t.c.source_id.in_(source_ids))
+    if since:
+        q = q.where(t.c.fetched_at >= since)
+    if until:
+        q = q.where(t.c.fetched_at < until)
+    seen = set()
+    with _db.engine.connect() as conn:
+        for row in conn.execute(q):
+            if row.sha256 in seen:
+                continue
+            seen.add(row.sha256)
+            yield row
+
+
+def process_batch(items: list[dict], insert_missing: bool, dry_run: bool, stats: dict):
+    table = NewsArticle.__table__
+    urls = [it["source_url"] for it in items]
+    with _db.engine.connect() as conn:
+        existing = {r.source_url: r for r in conn.execute(
+            select(table.c.source_url, table.c.id, table.c.created_at).where(table.c.source_url.in_(urls))
+        )}
+    todo = []
+    for it in items:
+        article_id = existing[it["source_url"]].id if it["source_url"] in existing else None
+        if it.pop("_needs_article", False) and article_id is not None:
+            # 入库内容来自网页抽取，归档里只有占位文本
+            stats["kept"] += 1
+            continue
+        if article_id is None and not insert_missing:
+            stats["missing"] += 1
+            continue
+        todo.append((article_id, it))
+    if not todo:
+        return
+    enriched = get_enrich_pool().run([(it["title"], it["content"]) for _, it in todo])
+    updates, inserts = [], []
+    now = datetime.utcnow()
+    for (article_id, it), (sh, summary, keywords) in zip(todo, enriched):
+        fields = {"content": it["content"], "simhash": sh, "simhash_version": SIMHASH_VERSION,
+                  "summary": summary, "keywords": keywords,
+                  "url_hash": _hash_url(it["source_url"]), **article_search_fields(it["title"], it["content"])}
+        if article_id is not None:
+            updates.append({"b_id": article_id, "updated_at": now, **fields})
+        else:
+            inserts.append({**{k: it.get(k) for k in ("title", "source_url", "source_name", "published_at", "category")},
+                            **fields})
+    stats["updated"] += len(updates)
+    stats["inserted"] += len(inserts)
+    if dry_run:
+        return
+    if updates:
+        with _db.engine.begin() as conn:
+            conn.execute(
+                update(table).where(table.c.id == bindparam("b_id")).values(
+                    **{k: bindparam(k) for k in ("content", "simhash", "simhash_version", "summary", "keywords",
+                                                  "url_hash", "snippet", "has_zh", "updated_at")}
+                ),
+                updates,
+            )
+            created = {r.id: r.created_at for r in existing.values()}
+            # 关键词表与数据版本号（响应缓存失效）同一事务更新
+            rollups.set_article_keywords(conn, [(u["b_id"], created[u["b_id"]], u["keywords"]) for u in updates])
+            # 运行中的服务据此重建 simhash/筛选/热词内存索引（core.index_sync）
+            rollups.bump_index_epoch(conn)
+    if inserts:
+        bulk_insert_articles(inserts)
+        with _db.engine.begin() as conn:
+            rollups.bump_index_epoch(conn)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Re-run parse and enrich for archived feed bodies")
+    ap.add_argument("--source-id", type=int, action="append", help="only these sources (repeatable)")
+    ap.add_argument("--since", help="fetched at or after this date/time (ISO, UTC)")
+    ap.add_argument("--until", help="fetched before this date/time (ISO, UTC)")
+    ap.add_argument("--insert-missing", action="store_true", help="insert archived items that are not stored")
+    ap.add_argument("--batch", type=int, default=200, help="articles per enrich/update batch")
+    ap.add_argument("--dry-run", action="store_true", help="parse and enrich, but write nothing")
+    args = ap.parse_args()
+
+    settings = Settings()
+    _db.init_db(settings.database_url, settings)
+    run_migrations()
+    db = _db.get_session()
+    sources = {s.id: s for s in db.query(RssSource).all()}
+    db.close()
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    stats = {"snapshots": 0, "entries": 0, "updated": 0, "inserted": 0, "missing": 0, "kept": 0, "errors": 0}
+    seen_urls: set[str] = set()
+    batch: list[dict] = []
+    for snap in archived_snapshots(args.source_id, parse_day(args.since), parse_day(args.until)):
+        try:
+            body = read_blob(settings.feed_archive_dir, snap.sha256)
+        except OSError as e:
+            print(f"✗ 归档缺失 {snap.sha256[:12]} (source {snap.source_id}): {e}")
+            stats["errors"] += 1
+            continue
+        stats["snapshots"] += 1
+        source = sources.get(snap.source_id) or SimpleNamespace(name=None, category=None, url=snap.url)
+        for entry in feedparser.parse(body).entries:
+            item = _entry_to_item(entry, source)
+            if item is None or item["source_url"] in seen_urls:
+                continue
+            item["title"] = (item.get("title") or "").strip()
+            item["content"] = (item.get("content") or "").strip()
+            if not item["title"] or not item["content"]:
+                continue
+            seen_urls.add(item["source_url"])
+            stats["entries"] += 1
+            batch.append(item)
+            if len(batch) >= args.batch:
+                process_batch(batch, args.insert_missing, args.dry_run, stats)
+                batch = []
+        print(f"✓ {stats['snapshots']} 个归档，{stats['entries']} 个条目")
+    if batch:
+        process_batch(batch, args.insert_missing, args.dry_run, stats)
+
+    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+    print(f"完成{'（dry-run，未写入）' if args.dry_run else ''}：更新 {stats['updated']}，新增 {stats['inserted']}，"
+          f"库中不存在 {stats['missing']}，保留抽取正文 {stats['kept']}，归档缺失 {stats['errors']}；"
+          f"耗时 {elapsed:.1f}s（本进程 CPU {cpu:.1f}s）")
+    if (stats["updated"] or stats["inserted"]) and not args.dry_run:
+        print(f"运行中的服务将在 INDEX_SYNC_SEC（{settings.index_sync_sec}s）内重建内存索引")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import { useEffect, useState } from 'react';
 import { api } from '@/lib/api';
 
 type KeywordRow = { keyword: string; count: number };
+type TrendingRow = { keyword: string; count: number; expected: number; lift: number };
 type TrendRow = { date: string; count: number };
 type SourceSeries = { name: string; data: number[] };
 
@@ -14,12 +15,15 @@ export default function AnalyticsPage() {
   const [sourcesSeries, setSourcesSeries] = useState<SourceSeries[]>([]);
   const [failTop, setFailTop] = useState<{error: string; count: number}[]>([]);
   const [heat, setHeat] = useState<number[][]>([]);
+  const [kwWindow, setKwWindow] = useState<'day' | 'week' | 'month' | 'all'>('all');
+  const [trending, setTrending] = useState<TrendingRow[]>([]);
+  const [trendingWindow, setTrendingWindow] = useState<'hour' | 'day'>('hour');
 
   useEffect(() => {
     async function load() {
       try {
         const [k, t, s, f, h] = await Promise.all([
-          api.get('/api/analytics/keywords_top'),
+          api.get('/api/analytics/keywords_top', { params: { window: kwWindow } }),
           api.get('/api/analytics/trend?days=14'),
           api.get('/api/analytics/sources_trend?days=14&topk=5'),
           api.get('/api/analytics/failures_top?days=14'),
@@ -38,6 +42,25 @@ export default function AnalyticsPage() {
     load();
   }, []);
 
+  // 热词（相对基线异常升高的关键词）
+  useEffect(() => {
+    api
+      .get('/api/analytics/trending', { params: { window: trendingWindow, limit: 10 } })
+      .then((res) => setTrending(res.data?.data || []))
+      .catch(() => setTrending([]));
+  }, [trendingWindow]);
+
+  // 切换关键词统计窗口时只重新拉取关键词
+  const changeKwWindow = async (w: 'day' | 'week' | 'month' | 'all') => {
+    setKwWindow(w);
+    try {
+      const k = await api.get('/api/analytics/keywords_top', { params: { window: w } });
+      setKeywords(k.data?.data || k.data || []);
+    } catch {
+      setKeywords([]);
+    }
+  };
+
   return (
     <main className="space-y-4">
       <h1 className="text-2xl font-semibold">数据分析</h1>
@@ -47,7 +70,19 @@ export default function AnalyticsPage() {
         <>
           <div className="grid grid-cols-1 lg:grid-cols-2 gap-4">
             <div className="rounded-xl border border-gray-100 bg-white/90 backdrop-blur-sm shadow-sm hover:shadow-md hover:-translate-y-0.5 transition-all duration-200 p-4">
-            <h2 className="font-medium mb-3">关键词 Top10</h2>
+            <div className="flex items-center justify-between mb-3">
+              <h2 className="font-medium">关键词 Top10</h2>
+              <select
+                value={kwWindow}
+                onChange={(e) => changeKwWindow(e.target.value as 'day' | 'week' | 'month' | 'all')}
+                className="rounded-md border border-gray-300 px-2 py-1 text-xs text-gray-700"
+              >
+                <option value="day">今日</option>
+                <option value="week">近7天</option>
+                <option value="month">近30天</option>
+                <option value="all">全部</option>
+              </select>
+            </div>
             <table className="w-full text-sm">
               <thead className="bg-gray-50">
                 <tr>
@@ -162,6 +197,43 @@ export default function AnalyticsPage() {
             {failTop.length === 0 && <li className="text-gray-400 text-sm">暂无数据</li>}
           </ul>
         </div>
+
+        <div className="rounded-xl border border-gray-100 bg-white/90 backdrop-blur-sm shadow-sm hover:shadow-md hover:-translate-y-0.5 transition-all duration-200 p-4">
+          <div className="flex items-center justify-between mb-3">
+            <h2 className="font-medium">热词（相对基线升高）</h2>
+            <select
+              value={trendingWindow}
+              onChange={(e) => setTrendingWindow(e.target.value as 'hour' | 'day')}
+              className="rounded-md border border-gray-300 px-2 py-1 text-xs text-gray-700"
+            >
+              <option value="hour">近1小时</option>
+              <option value="day">近1天</option>
+            </select>
+          </div>
+          <table className="w-full text-sm">
+            <thead className="bg-gray-50">
+              <tr>
+                <th className="text-left p-2">关键词</th>
+                <th className="text-left p-2">出现次数</th>
+                <th className="text-left p-2">基线预期</th>
+                <th className="text-left p-2">倍数</th>
+              </tr>
+            </thead>
+            <tbody>
+              {trending.map((r) => (
+                <tr key={r.keyword} className="border-t hover:bg-gray-50">
+                  <td className="p-2">{r.keyword}</td>
+                  <td className="p-2">{r.count}</td>
+                  <td className="p-2">{r.expected}</td>
+                  <td className="p-2">{r.lift}×</td>
+                </tr>
+              ))}
+              {trending.length === 0 && (
+                <tr><td colSpan={4} className="p-2 text-gray-400">暂无数据</td></tr>
+              )}
+            </tbody>
+          </table>
+        </div>
       </div>
 
       <div className="rounded-xl border border-gray-100 bg-white/90 backdrop-blur-sm shadow-sm hover:shadow-md hover:-translate-y-0.5 transition-all duration-200 p-4">
@@ -18,12 +18,35 @@ type KbItem = {
   summary?: string | null;
 };
 
+// 列表接口按游标分页，每次加载一页（不含正文）；分类/来源/日期筛选在服务端完成
+const KB_PAGE_SIZE = 200;
+
+type KbFilters = { category?: string; source_name?: string; date?: string };
+type FacetItem = { value: string | null; count: number };
+
+async function fetchKbPage(filters: KbFilters, cursor?: string | null, includeContent = false) {
+  const params: Record<string, string | number> = { limit: KB_PAGE_SIZE };
+  Object.entries(filters).forEach(([k, v]) => { if (v) params[k] = v; });
+  if (cursor) params.cursor = cursor;
+  if (includeContent) params.include_content = 1;
+  const res = await api.get('/api/kb/items', { params });
+  return {
+    items: (res.data?.data || []) as KbItem[],
+    nextCursor: (res.data?.next_cursor || null) as string | null,
+    total: (typeof res.data?.total === 'number' ? res.data.total : null) as number | null,
+  };
+}
+
 export default function KbListPage() {
   const notification = useNotification();
   const [createOpen, setCreateOpen] = useState(false);
   const [createForm, setCreateForm] = useState<{ title: string; content: string; category?: string; source_name?: string; source_url?: string; summary?: string }>({ title: '', content: '' });
   const [items, setItems] = useState<KbItem[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [serverTotal, setServerTotal] = useState<number | null>(null);
+  const [facets, setFacets] = useState<{ category: FacetItem[]; source_name: FacetItem[] }>({ category: [], source_name: [] });
   const [filteredItems, setFilteredItems] = useState<KbItem[]>([]);
   // 仪表盘汇总中的“知识库最近更新”(后端已综合手动/自动采集时间)
   const [latestUpdateISO, setLatestUpdateISO] = useState<string | null>(null);
@@ -52,12 +75,54 @@ export default function KbListPage() {
   const [isSelectAll, setIsSelectAll] = useState(false);
   const [showBatchDeleteConfirm, setShowBatchDeleteConfirm] = useState(false);
 
-  // 导出为 Excel（导出当前筛选结果）
-  const exportToExcel = () => {
+  const serverFilters: KbFilters = { category: categoryFilter, source_name: sourceFilter, date: dateFilter };
+
+  const loadFirstPage = async () => {
+    const page = await fetchKbPage(serverFilters);
+    setItems(page.items);
+    setFilteredItems(page.items);
+    setNextCursor(page.nextCursor);
+    setServerTotal(page.total);
+  };
+
+  const loadFacets = () => {
+    api
+      .get('/api/kb/items/facets')
+      .then((res) => {
+        const d = res.data?.data || {};
+        setFacets({ category: d.category || [], source_name: d.source_name || [] });
+      })
+      .catch(() => {});
+  };
+
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await fetchKbPage(serverFilters, nextCursor);
+      setItems(prev => [...prev, ...page.items]);
+      setNextCursor(page.nextCursor);
+    } catch (e) {
+      console.error('加载更多失败', e);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
+  // 导出为 Excel（导出当前筛选结果；正文按页补取）
+  const exportToExcel = async () => {
     try {
+      const contents = new Map<number, string>();
+      const wanted = new Set(filteredItems.map((it) => it.id));
+      let cursor: string | null = null;
+      do {
+        const page = await fetchKbPage(serverFilters, cursor, true);
+        page.items.forEach((it) => { if (wanted.has(it.id)) contents.set(it.id, it.content || ''); });
+        cursor = page.nextCursor;
+      } while (cursor && contents.size < wanted.size);
       const data = filteredItems.map((it) => ({
         标题: it.title,
-        内容: it.content || '',
+        内容: contents.get(it.id) ?? it.content ?? '',
         来源名称: it.source_name || '',
         来源链接: it.source_url || '',
         分类: it.category || '',
@@ -134,10 +199,8 @@ export default function KbListPage() {
       const resp = await api.post('/api/kb/items/import', { items: validItems });
       const d = resp.data?.data || {};
       // 成功后刷新列表
-      const res = await api.get('/api/kb/items');
-      const dataItems = res.data?.data || res.data || [];
-      setItems(dataItems);
-      setFilteredItems(dataItems);
+      await loadFirstPage();
+      loadFacets();
       alert(`导入完成：新增 ${d.inserted || 0} 条，跳过 ${d.skipped || 0} 条`);
       setImportOpen(false);
     } catch (e: any) {
@@ -152,21 +215,21 @@ export default function KbListPage() {
   const [contentModalOpen, setContentModalOpen] = useState(false);
   const [selectedItem, setSelectedItem] = useState<KbItem | null>(null);
 
+  // 筛选条件变化时从服务端重新加载第一页
   useEffect(() => {
-    api
-      .get('/api/kb/items')
-      .then((res) => {
-        const data = res.data?.data || res.data || [];
-        setItems(data);
-        setFilteredItems(data);
-      })
+    loadFirstPage()
+      .catch((e) => console.error('加载知识库失败', e))
       .finally(() => setLoading(false));
+  }, [categoryFilter, sourceFilter, dateFilter]);
+
+  useEffect(() => {
+    loadFacets();
   }, []);
 
   // 获取“知识库最近更新”时间（后端已取手动与自动采集的较新者）
   useEffect(() => {
     api
-      .get('/api/dashboard/summary', { params: { t: Date.now() } })
+      .get('/api/dashboard/summary')
       .then((res) => {
         const d = res.data?.data || res.data || {};
         setLatestUpdateISO(d.latest_update || null);
@@ -184,28 +247,9 @@ export default function KbListPage() {
 
   // 应用筛选
   useEffect(() => {
+    // 分类/来源/日期已由服务端筛选
     let filtered = [...items];
     
-    // 按分类筛选
-    if (categoryFilter) {
-      filtered = filtered.filter(item => item.category === categoryFilter);
-    }
-    
-    // 按来源筛选
-    if (sourceFilter) {
-      filtered = filtered.filter(item => item.source_name === sourceFilter);
-    }
-    
-    // 按时间筛选
-    if (dateFilter) {
-      const filterDate = new Date(dateFilter);
-      filtered = filtered.filter(item => {
-        if (!item.created_at) return false;
-        const itemDate = new Date(item.created_at);
-        return itemDate.toDateString() === filterDate.toDateString();
-      });
-    }
-    
     // 关键词搜索（标题/内容）
     if (keyword.trim()) {
       const q = keyword.trim().toLowerCase();
@@ -233,11 +277,11 @@ export default function KbListPage() {
     // 重置选择状态
     setSelectedIds(new Set());
     setIsSelectAll(false);
-  }, [items, categoryFilter, dateFilter, sourceFilter, keyword, sortBy, sortOrder]);
+  }, [items, keyword, sortBy, sortOrder]);
 
-  // 获取唯一的分类和来源列表
-  const categories = [...new Set(items.map(item => item.category).filter(Boolean))] as string[];
-  const sources = [...new Set(items.map(item => item.source_name).filter(Boolean))] as string[];
+  // 分类和来源选项来自服务端索引（覆盖全部条目，而非已加载的页）
+  const categories = facets.category.map(f => f.value).filter(Boolean) as string[];
+  const sources = facets.source_name.map(f => f.value).filter(Boolean) as string[];
 
   // 分页计算
   const totalPages = Math.ceil(filteredItems.length / itemsPerPage);
@@ -264,9 +308,22 @@ export default function KbListPage() {
   };
 
   // 打开内容弹窗
-  const openContentModal = (item: KbItem) => {
+  const openContentModal = async (item: KbItem) => {
     setSelectedItem(item);
     setContentModalOpen(true);
+    // 列表不含正文，打开时再取详情
+    if (item.content === undefined && item.id > 0) {
+      try {
+        const res = await api.get('/api/kb/item', { params: { id: item.id } });
+        const detail = res.data?.data;
+        if (detail) {
+          setItems(prev => prev.map(it => (it.id === item.id ? { ...it, content: detail.content } : it)));
+          setSelectedItem(prev => (prev && prev.id === item.id ? { ...prev, content: detail.content } : prev));
+        }
+      } catch (e) {
+        console.error('获取正文失败', e);
+      }
+    }
   };
 
   // 关闭内容弹窗
@@ -544,7 +601,7 @@ export default function KbListPage() {
                 <div className="space-y-2">
                   <label className="flex items-center space-x-2 text-sm font-medium text-gray-700">
                     <Calendar className="w-4 h-4 text-orange-600" />
-                    <span>创建日期</span>
+                    <span>创建日期（UTC）</span>
                   </label>
                   <input
                     type="date"
@@ -853,6 +910,19 @@ export default function KbListPage() {
                 </div>
               </div>
             )}
+
+            {/* 游标分页：继续加载更早的条目 */}
+            {nextCursor && (
+              <div className="flex justify-center">
+                <button
+                  onClick={loadMore}
+                  disabled={loadingMore}
+                  className="px-4 py-2 rounded-lg border border-gray-300 text-sm font-medium text-gray-700 hover:bg-gray-50 disabled:opacity-50 disabled:cursor-not-allowed transition-colors duration-200"
+                >
+                  {loadingMore ? '加载中...' : `已加载 ${items.length}${serverTotal !== null ? ` / ${serverTotal}` : ''} 条，加载更多`}
+                </button>
+              </div>
+            )}
           </>
         )}
 
@@ -924,10 +994,8 @@ export default function KbListPage() {
                 try {
                   await api.post('/api/kb/items', data);
                   notification.showSuccess('新增成功', '知识已创建');
-                  const res = await api.get('/api/kb/items');
-                  const dd = (res.data?.data || res.data || []) as KbItem[];
-                  setItems(dd);
-                  setFilteredItems(dd);
+                  await loadFirstPage();
+                  loadFacets();
                   setContentModalOpen(false);
                   setSelectedItem(null);
                 } catch (e: any) {
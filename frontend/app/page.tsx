@@ -22,9 +22,8 @@ export default function Page() {
     async function load() {
       try {
         const res = await api.get('/api/dashboard/summary', {
-          // 防缓存
+          // 每次向服务端校验：数据未变化时服务端按 ETag 返回 304
           headers: { 'Cache-Control': 'no-cache' },
-          params: { t: Date.now() },
         });
         const d = res.data?.data || res.data || {};
         setTotal(d.total_articles || 0);
@@ -39,7 +38,7 @@ export default function Page() {
         try {
           const kwRes = await api.get('/api/analytics/keywords_top', {
             headers: { 'Cache-Control': 'no-cache' },
-            params: { limit: 10, t: Date.now() },
+            params: { limit: 10 },
           });
           const kwData = kwRes.data?.data || kwRes.data || [];
           setTopKeywords(Array.isArray(kwData) ? kwData : []);
@@ -317,19 +317,31 @@ export default function RssSettingsPage() {
     setProgressType('batch');
     setProgressStatus('running');
     
-    // 启动批量按钮内进度
+    // 启动批量按钮内进度（按后台任务已完成的源数计算）
     setBatchProgress(0);
     if (batchTimer.current) {
       clearInterval(batchTimer.current);
       batchTimer.current = null;
     }
-    batchTimer.current = setInterval(() => {
-      setBatchProgress(prev => Math.min(90, prev + Math.floor(5 + Math.random() * 10)));
-    }, 300);
 
     setIsIngestingAll(true);
     try {
-      const response = await api.post('/api/settings/rss/ingest_all');
+      // 后台批量采集：先拿到 job_id，再轮询进度直至完成
+      const started = await api.post('/api/settings/rss/ingest_all');
+      let job = started.data?.data;
+      const jobId = job?.job_id;
+      while (job && !job.finished_at) {
+        await new Promise(resolve => setTimeout(resolve, 1000));
+        const res = await api.get('/api/settings/rss/ingest_all/status', { params: { job_id: jobId } });
+        job = res.data?.data;
+        if (job?.total) {
+          setBatchProgress(Math.min(95, Math.floor((job.done / job.total) * 100)));
+        }
+      }
+      if (!job || job.status !== 'done') {
+        throw new Error(job?.error || (job?.status === 'cancelled' ? '采集已取消' : '后台任务异常结束'));
+      }
+      const response = { data: { code: 0, data: job.result, msg: undefined as string | undefined } };
       
       // 设置成功状态
       setProgressStatus('success');
@@ -0,0 +1,22 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[1] / "backend"
+if str(BACKEND) not in sys.path:
+    sys.path.insert(0, str(BACKEND))
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Fresh migrated SQLite database bound to data.db for the duration of a test."""
+    from config import Settings
+    from data import db as _db
+    from data.migrations import run_migrations
+
+    url = f"sqlite:///{tmp_path}/test.db"
+    _db.init_db(url, Settings(database_url=url))
+    run_migrations()
+    yield _db
+    _db.close_db()
@@ -0,0 +1,146 @@
+import time
+import types
+
+import pytest
+import requests
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    from config import Settings
+    from crawler import circuit_breaker as cb
+
+    clock = Clock()
+    monkeypatch.setattr(cb, "time", types.SimpleNamespace(time=clock, strftime=time.strftime, gmtime=time.gmtime))
+    settings = Settings(circuit_failure_threshold=3, circuit_open_sec=10, circuit_max_open_sec=25,
+                        circuit_slow_call_sec=5)
+    b = cb.CircuitBreaker(settings)
+    b.clock = clock
+    return b
+
+
+def _state(b, domain="a.com"):
+    snap = {s["domain"]: s for s in b.snapshot()}
+    return snap[domain]["state"] if domain in snap else "closed"
+
+
+def _trip(b, domain="a.com", n=3):
+    for _ in range(n):
+        b.record_failure(domain, "boom")
+
+
+def test_opens_after_threshold_and_rejects(breaker):
+    from crawler.circuit_breaker import CircuitOpenError
+
+    _trip(breaker, n=2)
+    assert _state(breaker) == "closed"
+    breaker.before_request("a.com")
+    breaker.record_failure("a.com", "boom")
+    assert _state(breaker) == "open"
+
+    breaker.clock.now += 4
+    with pytest.raises(CircuitOpenError) as info:
+        breaker.before_request("a.com")
+    assert info.value.retry_in == pytest.approx(6)
+    breaker.before_request("b.com")  # 其他域名不受影响
+
+
+def test_success_resets_failure_count(breaker):
+    _trip(breaker, n=2)
+    breaker.record_success("a.com", 0.1)
+    _trip(breaker, n=2)
+    assert _state(breaker) == "closed"
+
+
+def test_half_open_single_probe_then_close(breaker):
+    from crawler.circuit_breaker import CircuitOpenError
+
+    _trip(breaker)
+    breaker.clock.now += 10
+    breaker.before_request("a.com")  # 探测请求放行
+    assert _state(breaker) == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request("a.com")  # 探测未返回前其余请求仍被拒绝
+    breaker.record_success("a.com", 0.2)
+    assert breaker.snapshot() == []
+    breaker.before_request("a.com")
+
+
+def test_failed_probe_reopens_with_doubled_capped_period(breaker):
+    from crawler.circuit_breaker import CircuitOpenError
+
+    _trip(breaker)
+    periods = []
+    for _ in range(3):
+        opened = breaker.clock.now
+        with pytest.raises(CircuitOpenError) as info:
+            breaker.before_request("a.com")
+        periods.append(info.value.retry_in)
+        breaker.clock.now = opened + info.value.retry_in
+        breaker.before_request("a.com")
+        breaker.record_failure("a.com", "still down")
+        assert _state(breaker) == "open"
+    assert periods == [10, 20, 25]
+    assert breaker.snapshot()[0]["trips"] == 4
+
+
+def test_lost_probe_is_replaced(breaker):
+    from crawler.circuit_breaker import CircuitOpenError
+
+    _trip(breaker)
+    breaker.clock.now += 10
+    breaker.before_request("a.com")
+    breaker.clock.now += 5
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request("a.com")
+    # 探测结果一直没有上报（响应体未读取），超过一个熔断周期后允许新的探测
+    breaker.clock.now += 6
+    breaker.before_request("a.com")
+
+
+def test_slow_success_counts_as_failure(breaker):
+    for _ in range(3):
+        breaker.record_success("a.com", 6.0)
+    snap = breaker.snapshot()[0]
+    assert snap["state"] == "open"
+    assert snap["last_latency_sec"] == 6.0
+    assert "slow" in snap["last_error"]
+
+
+def test_reset(breaker):
+    _trip(breaker, "a.com")
+    _trip(breaker, "b.com")
+    breaker.reset("a.com")
+    assert [s["domain"] for s in breaker.snapshot()] == ["b.com"]
+    breaker.reset()
+    assert breaker.snapshot() == []
+
+
+def _http_error(code):
+    resp = requests.Response()
+    resp.status_code = code
+    return requests.HTTPError(response=resp)
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (requests.ConnectionError(), True),
+    (requests.Timeout(), True),
+    (requests.exceptions.ChunkedEncodingError(), True),
+    (_http_error(503), True),
+    (_http_error(429), True),
+    (_http_error(404), False),
+    (_http_error(403), False),
+    (ValueError("parse"), False),
+])
+def test_is_breaker_failure(exc, expected):
+    from crawler.circuit_breaker import is_breaker_failure
+
+    assert is_breaker_failure(exc) is expected
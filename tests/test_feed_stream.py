@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import feedparser
+import pytest
+
+from crawler.feed_stream import iter_feed_entries
+
+FEEDS = Path(__file__).resolve().parents[1] / "backend" / "scripts" / "fixtures" / "feeds"
+
+
+def _chunked(body: bytes, size: int):
+    return (body[i:i + size] for i in range(0, len(body), size))
+
+
+@pytest.mark.parametrize("name", sorted(p.name for p in FEEDS.glob("*.xml")))
+@pytest.mark.parametrize("size", [7, 4096])
+def test_streamed_entries_match_feedparser(name, size):
+    body = (FEEDS / name).read_bytes()
+    streamed = list(iter_feed_entries(_chunked(body, size)))
+    expected = feedparser.parse(body).entries
+    assert [e.get("link") for e in streamed] == [e.get("link") for e in expected]
+
+
+def test_malformed_xml_falls_back_to_feedparser_without_repeats():
+    body = (b'<?xml version="1.0"?><rss><channel>'
+            b'<item><title>one</title><link>http://a/1</link></item>'
+            b'<item><title>Q&A</title><link>http://a/2</link></item>'
+            b'<item><title>three</title><link>http://a/3</link></item>'
+            b'</channel></rss>')
+    links = [e["link"] for e in iter_feed_entries(_chunked(body, 64))]
+    assert links == ["http://a/1", "http://a/2", "http://a/3"]
+
+
+def test_encoding_sniffed_after_declaration_split_across_chunks():
+    body = ('<?xml version="1.0" encoding="gb2312"?><rss><channel>'
+            '<item><title>中文标题</title><link>http://a/1</link></item>'
+            '</channel></rss>').encode("gb2312")
+    entries = list(iter_feed_entries([body[:10], body[10:30], body[30:]]))
+    assert [e["title"] for e in entries] == ["中文标题"]
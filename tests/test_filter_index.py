@@ -0,0 +1,101 @@
+import random
+from datetime import datetime
+
+import pytest
+
+
+def _sets(seed):
+    rnd = random.Random(seed)
+    sparse = {rnd.randrange(0, 1 << 20) for _ in range(300)}
+    # 同一块内超过 _ARRAY_MAX 个 id，转为位集
+    dense = set(rnd.sample(range(1 << 16, 2 << 16), 6000))
+    mixed = set(rnd.sample(range(0, 3 << 16), 9000))
+    return sparse, dense, mixed
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_bitmap_set_operations_match_python_sets(seed):
+    from data.filter_index import Bitmap, union_all
+
+    sets = _sets(seed)
+    bitmaps = [Bitmap(s) for s in sets]
+    for s, bm in zip(sets, bitmaps):
+        assert len(bm) == len(s)
+        assert list(bm.iter_desc()) == sorted(s, reverse=True)
+    for a, x in zip(sets, bitmaps):
+        for b, y in zip(sets, bitmaps):
+            assert set((x & y).iter_desc()) == a & b
+            assert set((x | y).iter_desc()) == a | b
+    assert set(union_all(bitmaps).iter_desc()) == set().union(*sets)
+
+
+def test_bitmap_iter_desc_below_and_discard():
+    from data.filter_index import Bitmap
+
+    ids = set(range(65000, 71000)) | {3, 5, 200000}
+    bm = Bitmap(ids)
+    for below in (0, 4, 65536, 65537, 70000, 1 << 20):
+        assert list(bm.iter_desc(below)) == sorted((i for i in ids if i < below), reverse=True)
+
+    copy = bm.copy()
+    for i in range(65000, 71000):
+        bm.discard(i)
+    bm.discard(12345)  # 不存在的 id
+    assert set(bm.iter_desc()) == {3, 5, 200000}
+    assert len(copy) == len(ids)
+    for i in (3, 5, 200000):
+        bm.discard(i)
+    assert not bm and len(bm) == 0
+
+
+def _index():
+    from data.filter_index import ArticleFilterIndex
+
+    idx = ArticleFilterIndex()
+    rows = [
+        {"id": 1, "category": "tech", "source_name": "A", "status": None, "created_at": datetime(2024, 1, 1, 8)},
+        {"id": 2, "category": "tech", "source_name": "B", "status": "active", "created_at": datetime(2024, 1, 2, 8)},
+        {"id": 3, "category": None, "source_name": "A", "status": "archived", "created_at": datetime(2024, 1, 3, 8)},
+        {"id": 4, "category": "world", "source_name": "A", "status": "active", "created_at": datetime(2024, 1, 3, 9)},
+    ]
+    for r in rows:
+        idx.add(r["id"], r["category"], r["source_name"], r["status"], r["created_at"])
+    return idx, rows
+
+
+def test_filter_index_match_and_facets():
+    from datetime import date
+
+    idx, _ = _index()
+    assert set(idx.match().iter_desc()) == {1, 2, 3, 4}
+    assert set(idx.match(category="tech").iter_desc()) == {1, 2}
+    assert set(idx.match(category="").iter_desc()) == {3}
+    assert set(idx.match(source_name="A", status="active").iter_desc()) == {1, 4}
+    assert set(idx.match(date_from=date(2024, 1, 2), date_to=date(2024, 1, 3)).iter_desc()) == {2, 3, 4}
+    assert set(idx.match(category="tech", date_from=date(2024, 1, 2)).iter_desc()) == {2}
+    assert not idx.match(category="missing")
+    assert idx.facets("source_name") == {"A": 3, "B": 1}
+    assert idx.facets("category", within=idx.match(source_name="A")) == {"tech": 1, None: 1, "world": 1}
+
+
+@pytest.mark.parametrize("with_rows", [True, False])
+def test_filter_index_remove(with_rows):
+    from datetime import date
+
+    idx, rows = _index()
+    idx.remove([1, 3], rows if with_rows else None)
+    assert len(idx) == 2
+    assert set(idx.match(source_name="A").iter_desc()) == {4}
+    assert set(idx.match(date_to=date(2024, 1, 1)).iter_desc()) == set()
+    # 空位图随之删除，不留下计数为 0 的分面
+    assert idx.facets("category") == {"tech": 1, "world": 1}
+    assert idx.facets("status") == {"active": 2}
+
+
+def test_filter_index_remove_with_outdated_row_falls_back_to_scan():
+    idx, rows = _index()
+    stale = dict(rows[0], category="world", created_at=datetime(2023, 1, 1))
+    idx.remove([1], [stale])
+    assert idx.facets("category") == {"tech": 1, None: 1, "world": 1}
+    assert 1 not in idx.match(category="tech")
+    assert 1 not in idx.match()
@@ -0,0 +1,65 @@
+from datetime import datetime
+from functools import partial
+
+import pytest
+
+
+def _rows(n):
+    return [
+        {"title": f"title {i}", "content": f"content {i}", "source_url": f"https://example.com/{i}",
+         "source_name": "Example", "category": "tech", "published_at": None, "summary": f"summary {i}",
+         "keywords": "a,b", "simhash": None, "created_at": datetime(2024, 1, 1)}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def failing_second_chunk(monkeypatch):
+    from data import rollups
+
+    add_articles = rollups.add_articles
+    calls = []
+
+    def flaky(conn, rows, ids):
+        calls.append(len(rows))
+        if len(calls) == 2:
+            raise RuntimeError("disk I/O error")
+        return add_articles(conn, rows, ids)
+
+    monkeypatch.setattr(rollups, "add_articles", flaky)
+    return calls
+
+
+def test_bulk_insert_error_reports_committed_prefix(db, failing_second_chunk):
+    from sqlalchemy import func, select
+    from data.bulk import BulkInsertError, bulk_insert_articles
+    from data.models import NewsArticle
+
+    with pytest.raises(BulkInsertError) as info:
+        bulk_insert_articles(_rows(5), chunk_size=2)
+    assert len(info.value.ids) == 2
+    assert isinstance(info.value.cause, RuntimeError)
+    with db.engine.connect() as conn:
+        stored = conn.execute(select(NewsArticle.source_url).order_by(NewsArticle.id)).scalars().all()
+        assert stored == ["https://example.com/0", "https://example.com/1"]
+        assert conn.execute(select(func.count()).select_from(NewsArticle)).scalar() == 2
+
+
+def test_committed_chunks_are_notified_when_a_later_chunk_fails(db, failing_second_chunk, monkeypatch):
+    from config import Settings
+    from crawler import ingest
+
+    monkeypatch.setattr(ingest, "bulk_insert_articles", partial(ingest.bulk_insert_articles, chunk_size=2))
+    sent = []
+    monkeypatch.setattr(ingest, "_notify_new_articles", lambda created, articles: sent.append((created, articles)) or {})
+    pipeline = ingest.IngestPipeline(Settings(near_duplicate_policy="off"))
+    run = ingest._SourceRun(source_id=1)
+
+    pipeline._persist_rows(run, _rows(5))
+    list(pipeline._notify(run))
+
+    assert run.code == 500 and run.created == 2
+    assert len(sent) == 1
+    created, articles = sent[0]
+    assert created == 2
+    assert [a["url"] for a in articles] == ["https://example.com/0", "https://example.com/1"]
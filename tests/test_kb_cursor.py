@@ -0,0 +1,37 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+
+def test_cursor_round_trip():
+    from routes.kb import _decode_cursor, _encode_cursor
+
+    for created_at, article_id in [
+        (datetime(2024, 1, 2, 3, 4, 5, 678901), 42),
+        (datetime(1999, 12, 31), 1),
+        (datetime(2030, 6, 1, 12), 10 ** 12),
+    ]:
+        cursor = _encode_cursor(created_at, article_id)
+        assert "=" not in cursor and "/" not in cursor and "+" not in cursor
+        assert _decode_cursor(cursor) == (created_at, article_id)
+
+
+def _b64(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not base64!",
+    _b64({"created_at": "2024-01-01"}),
+    _b64(["2024-01-01T00:00:00"]),
+    _b64(["yesterday", 1]),
+    _b64(["2024-01-01T00:00:00", "x"]),
+])
+def test_invalid_cursor_raises_value_error(cursor):
+    from routes.kb import _decode_cursor
+
+    with pytest.raises(ValueError):
+        _decode_cursor(cursor)
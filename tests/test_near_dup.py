@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+
+def _flip(fp, n, rnd):
+    for bit in rnd.sample(range(64), n):
+        fp ^= 1 << bit
+    return fp
+
+
+@pytest.mark.parametrize("threshold", [0, 3, 7, 63])
+def test_band_layout_covers_all_bits(threshold):
+    from crawler.near_dup import _band_layout
+
+    bands = _band_layout(threshold)
+    assert len(bands) == min(64, threshold + 1)
+    covered = 0
+    for shift, mask in bands:
+        assert covered & (mask << shift) == 0
+        covered |= mask << shift
+    assert covered == (1 << 64) - 1
+
+
+@pytest.mark.parametrize("threshold", [3, 6])
+def test_query_finds_every_fingerprint_within_threshold(threshold):
+    from crawler.near_dup import SimhashIndex
+
+    rnd = random.Random(threshold)
+    idx = SimhashIndex(threshold)
+    base = [rnd.getrandbits(64) | 1 for _ in range(200)]
+    for i, fp in enumerate(base, start=1):
+        idx.add(i, f"{fp:016x}")
+    for i, fp in enumerate(base, start=1):
+        d = rnd.randint(0, threshold)
+        probe = _flip(fp, d, rnd)
+        hits = {a: dist for a, dist, _ in idx.query(probe)}
+        assert hits.get(i) == d
+        far = _flip(fp, threshold + 1, rnd)
+        assert i not in {a for a, _, _ in idx.query(far)}
+
+
+def test_query_orders_by_distance_and_respects_max_distance():
+    from crawler.near_dup import SimhashIndex
+
+    idx = SimhashIndex(4)
+    fp = 0x0123456789ABCDEF
+    idx.add(10, fp ^ 0b111)
+    idx.add(11, fp ^ 0b1)
+    idx.add(12, fp)
+    assert [(a, d) for a, d, _ in idx.query(fp)] == [(12, 0), (11, 1), (10, 3)]
+    assert [a for a, _, _ in idx.query(fp, max_distance=1)] == [12, 11]
+    assert idx.nearest(fp)[0] == 12
+    # 超过建索引时的阈值不保证召回，按阈值截断
+    assert len(idx.query(fp, max_distance=40)) == 3
+
+
+def test_invalid_and_empty_fingerprints_are_ignored():
+    from crawler.near_dup import SimhashIndex, parse_fingerprint
+
+    assert parse_fingerprint(None) is None
+    assert parse_fingerprint("zz") is None
+    assert parse_fingerprint("0") is None
+    assert parse_fingerprint(1 << 64) is None
+    assert parse_fingerprint("ff") == 255
+    idx = SimhashIndex(3)
+    idx.add(1, "0")
+    idx.add(2, None)
+    assert len(idx) == 0
+    assert idx.query("0") == []
+
+
+def test_readd_remove_and_regroup():
+    from crawler.near_dup import SimhashIndex
+
+    idx = SimhashIndex(3)
+    fp = 0xDEADBEEF12345678
+    idx.add(1, fp)
+    idx.add(2, fp ^ 1, group_id=1)
+    idx.add(3, fp ^ 2, group_id=1)
+    idx.add(3, fp ^ 2, group_id=1)  # 重复添加不产生重复结果
+    assert [a for a, _, _ in idx.query(fp)] == [1, 2, 3]
+
+    idx.remove([1])
+    idx.regroup([1])
+    assert {a: g for a, _, g in idx.query(fp)} == {2: 2, 3: 2}
+
+    idx.add(2, fp ^ (0xFFFF << 40))  # 指纹变化后旧的分段不再命中
+    assert [a for a, _, _ in idx.query(fp)] == [3]
+    idx.remove([2, 3, 99])
+    assert len(idx) == 0
@@ -0,0 +1,46 @@
+import random
+from collections import Counter
+
+
+def _docs(seed=0):
+    rnd = random.Random(seed)
+    vocab = [f"w{i}" for i in range(500)] + ["经济", "选举", "气候", "芯片", "x" * 5000, "é"]
+    docs = [Counter(rnd.choices(vocab, k=rnd.randint(1, 80))) for _ in range(60)]
+    docs.insert(3, Counter())
+    docs.append({"single": 2.5})
+    return docs
+
+
+def test_simhash_many_matches_simhash():
+    from crawler.ingest_utils import simhash, simhash_many
+
+    docs = _docs()
+    assert simhash_many(docs) == [simhash("", counts=d) for d in docs]
+    assert simhash_many(docs, bits=32) == [simhash("", bits=32, counts=d) for d in docs]
+    assert simhash_many([]) == []
+
+
+def test_empty_document_has_zero_fingerprint():
+    from crawler.ingest_utils import simhash, simhash_many
+
+    assert simhash("") == 0
+    assert simhash_many([{}, {}]) == [0, 0]
+
+
+def test_hash_tokens64_is_batch_independent():
+    from crawler.ingest_utils import hash_tokens64
+
+    tokens = ["b", "a", "", "长词" * 300, "a"]
+    batch = [int(h) for h in hash_tokens64(tokens)]
+    assert batch == [int(hash_tokens64([t])[0]) for t in tokens]
+    assert batch[1] == batch[4]
+    assert len(set(batch)) == 4
+
+
+def test_similar_texts_are_close():
+    from crawler.ingest_utils import hamming_distance, simhash
+
+    a = "the central bank raised interest rates by a quarter point on tuesday amid inflation fears " * 3
+    b = a.replace("tuesday", "wednesday")
+    c = "local football club wins the championship after a dramatic penalty shootout in the final " * 3
+    assert hamming_distance(simhash(a), simhash(b)) < hamming_distance(simhash(a), simhash(c))
@@ -0,0 +1,95 @@
+import random
+from collections import Counter
+
+HOUR = 3600
+NOW = 1_700_000_000 // HOUR * HOUR + HOUR // 2
+
+
+def test_space_saving_bounds():
+    from crawler.trending import SpaceSaving
+
+    rnd = random.Random(0)
+    stream = ["hot"] * 400 + ["warm"] * 200 + [f"tail{rnd.randrange(300)}" for _ in range(1000)]
+    rnd.shuffle(stream)
+    ss = SpaceSaving(10)
+    for key in stream:
+        ss.add(key)
+    truth = Counter(stream)
+
+    assert len(ss.counts) == 10
+    assert sum(ss.counts.values()) == len(stream)
+    for key, count in ss.counts.items():
+        # 计数只会高估，误差不超过记录的 error
+        assert truth[key] <= count
+        assert count - ss.errors[key] <= truth[key]
+    assert {"hot", "warm"} <= set(ss.counts)
+
+
+def test_space_saving_weighted_and_clear():
+    from crawler.trending import SpaceSaving
+
+    ss = SpaceSaving(2)
+    ss.add("a", 5)
+    ss.add("b", 2)
+    ss.add("c")  # 顶替最小的 b，继承其计数作为误差
+    assert ss.counts == {"a": 5, "c": 3}
+    assert ss.errors == {"a": 0, "c": 2}
+    ss.clear()
+    assert ss.counts == {} and ss.errors == {}
+
+
+def _detector(**kw):
+    from crawler.trending import TrendingDetector
+
+    params = dict(bucket_minutes=60, baseline_hours=24, width=1024, depth=4, capacity=50, min_count=3)
+    params.update(kw)
+    return TrendingDetector(**params)
+
+
+def test_spike_ranks_above_steady_keyword():
+    det = _detector()
+    for h in range(1, 25):
+        det.add(["steady"] * 5, at=NOW - h * HOUR, now=NOW)
+    det.add(["steady"] * 5 + ["spike"] * 20 + ["rare"], at=NOW, now=NOW)
+
+    out = det.query("hour", now=NOW)
+    assert [r["keyword"] for r in out] == ["spike", "steady"]
+    spike, steady = out
+    assert spike["count"] == 20 and spike["expected"] == 0 and spike["lift"] == 21
+    assert steady["count"] == 5 and steady["expected"] == 5 and steady["lift"] == 1
+    assert [r["keyword"] for r in det.query("hour", now=NOW, min_count=1)] == ["spike", "rare", "steady"]
+    assert [r["keyword"] for r in det.query("hour", limit=1, now=NOW)] == ["spike"]
+
+
+def test_day_window_and_short_baseline_scaling():
+    det = _detector()
+    # 只有 2 小时基线：期望值按实际覆盖时长折算，而不是按 24 小时稀释
+    det.add(["kw"] * 4, at=NOW - 2 * HOUR, now=NOW)
+    det.add(["kw"] * 4, at=NOW - HOUR, now=NOW)
+    det.add(["kw"] * 4, at=NOW, now=NOW)
+    hour = det.query("hour", now=NOW)
+    assert hour[0]["count"] == 4 and hour[0]["expected"] == 4
+
+    day = det.query("day", now=NOW)
+    assert day[0]["count"] == 12
+
+
+def test_old_and_future_events():
+    det = _detector()
+    det.add(["old"] * 10, at=NOW - 100 * HOUR, now=NOW)  # 超出环形缓冲覆盖范围
+    det.add(["future"] * 3, at=NOW + 10 * HOUR, now=NOW)  # 计入当前桶
+    out = det.query("hour", now=NOW)
+    assert [r["keyword"] for r in out] == ["future"]
+    # 一小时后当前桶滑出窗口
+    assert det.query("hour", now=NOW + HOUR) == []
+
+
+def test_ring_slot_reuse_clears_old_counts():
+    det = _detector()
+    det.add(["a"] * 5, at=NOW, now=NOW)
+    later = NOW + det.n_buckets * HOUR
+    det.add(["b"] * 5, at=later, now=later)
+    assert [r["keyword"] for r in det.query("hour", now=later)] == ["b"]
+    # 已被覆盖的旧桶不再接受写入
+    det.add(["a"] * 5, at=NOW, now=later)
+    assert [r["keyword"] for r in det.query("hour", now=later)] == ["b"]